@@ -0,0 +1,52 @@
+'''Analyse a position with the engine on several processes at once (see engine.ParallelEngine). Prints the best move, how deep the search got, and each process's nodes per second. With --scaling, searches to the same depth with 1, 2, 4, ... up to the given number of workers and prints the speedup and efficiency of each.
+Usage: python analyse.py [mode] [--fen FEN] [--seconds S] [--depth D] [--workers N] [--scaling]'''
+from __future__ import annotations
+import argparse
+import os
+import time
+import modes
+from modes import engine
+from modes.rules import HeadlessGame
+from perft import move_name
+
+def main():
+    parser=argparse.ArgumentParser(description="Analyse a position with the engine on several processes.")
+    parser.add_argument("mode",nargs="?",default="standard",choices=[mode for mode in modes.__all__ if engine.supports(getattr(modes,mode))],help="module name of the mode")
+    parser.add_argument("--fen",default=None,help="starting position, as FEN (see modes/fen)")
+    parser.add_argument("--seconds",type=float,default=None,help="time to think")
+    parser.add_argument("--depth",type=int,default=None,help="depth to search to (default 4 if --seconds isn't given)")
+    parser.add_argument("--workers",type=int,default=os.cpu_count(),help="processes to search with")
+    parser.add_argument("--hash",type=float,default=16,help="transposition table size per process, in megabytes")
+    parser.add_argument("--scaling",action="store_true",help="compare the time to --depth with 1 to --workers processes")
+    args=parser.parse_args()
+    game=HeadlessGame(getattr(modes,args.mode),args.fen)
+    depth=args.depth if args.depth != None or args.seconds != None else 4
+    if args.scaling:
+        counts=[1]
+        while counts[-1]*2 < args.workers:
+            counts.append(counts[-1]*2)
+        if counts[-1] != args.workers:
+            counts.append(args.workers)
+        print("Workers  Time      Nodes     Nodes/s   Speedup  Efficiency")
+        for count, elapsed, nodes, speedup, efficiency in engine.scaling(game,depth,counts,args.hash):
+            print(f"{count:<8} {elapsed:<9.3f} {nodes:<9} {nodes/elapsed:<9.0f} {speedup:<8.2f} {efficiency:.0%}")
+        return
+    with engine.ParallelEngine(args.workers,args.hash) as searcher:
+        start=time.perf_counter()
+        move=searcher.search(game,args.seconds,depth)
+        elapsed=time.perf_counter()-start
+        rates=searcher.worker_rates()
+    if move == None:
+        print("No legal moves.")
+        return
+    print(f"Best move: {move_name(game,move)}")
+    print(f"Depth: {searcher.depth}")
+    print(f"Score: {searcher.score}")
+    print(f"Nodes: {searcher.nodes}")
+    print(f"Time: {elapsed:.3f}s")
+    print(f"Nodes/s: {searcher.nodes/elapsed:.0f}" if elapsed > 0 else "Nodes/s: -")
+    for pid, rate in sorted(rates.items()):
+        print(f"  worker {pid}: {rate:.0f} nodes/s")
+
+if __name__ == "__main__":
+    main()
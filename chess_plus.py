@@ -1,14 +1,26 @@
-'''Main game. Why would you want to import this?'''
+'''Main game. Why would you want to import this?
+python chess_plus.py --profile-startup writes startup_profile.json and startup_profile.txt on exit (see modes/profiling).'''
 
+import sys
+from modes import profiling
+if "--profile-startup" in sys.argv:
+    profiling.start()
 import modes as m
 import time as t
 import math as ma
 from modes import basic as b
 from modes import standard
+from modes import engine
+from modes import background
+from modes import position
+from modes import fen
+from modes.rules import MoveTable
+from modes.frames import frame_times, COLUMNS
+from modes.record import RecordWriter, Turn, result_text
 from pygame import *
 from collections.abc import Callable
 from os.path import join
-import copy
+import random
 
 type Piece=b.Piece
 type Tile=b.Tile
@@ -18,7 +30,9 @@ type BoardCoord=tuple[int,int]
 type BoardLayout=list[list[Tile]]
 type Colour=tuple[int,int,int]
 
-display.init()
+RECORD_FILE="games.rec" #games are added here as they are left, see modes/record
+
+b.init_display()
 scrap.init()
 key.set_repeat(500,125)
 
@@ -33,10 +47,10 @@ class Game():
         self.menu:str="main"
         self.submenu:str="main"
         self.last_menu:str=None
-        self.mode_infos:dict[str,b.Info]={}
+        self.mode_infos:dict[str,b.Page]={} #almanac pages opened so far, by module name
         self.mode_info_buttons:list[Button]=[]
         self.mode_choose_buttons:list[Button]=[]
-        self.piece_infos:dict[str,b.Info]={}
+        self.piece_infos:dict[str,b.Page]={} #by piece name
         self.piece_info_buttons:list[Button]=[]
         self.additional=None
         self.mode:Gamemode=None
@@ -49,25 +63,51 @@ class Game():
         self.prev_selected:Tile|None=None
         self.board:b.Board|None=None
         self.win:list[bool|int]=[False, -1]
-        self.log:list[list[list[Piece|None]]]=[]
+        self.log:list[bytes]=[] #each turn's position, as modes.position bytes
         self.log_pointer=0
+        self.tables:dict[tuple,MoveTable]={} #see MoveTable.of()
+        self.computer:int|None=None #the colour the engine plays, if any
+        self.turns:list[Turn]=[] #the moves that led from each entry of log to the next, for the game record
+        self.pending:Turn=[] #moves of the turn in progress (a duck placement or another jump can follow)
+        self.record_tags:dict[str,str|int]={}
+        self.background=background.Background() #computes the engine's moves while frames carry on
 
     def begin(self):
-        self.board=copy.copy(self.mode.board)
+        seed=random.randrange(2**32) #recorded, so games of modes that set up at random can be replayed
+        random.seed(seed)
+        self.record_tags={"Clock":f"{time_field.text}+{inc_field.text}+{del_field.text}","Seed":seed}
+        start=import_field.text.strip() or None
+        if start != None:
+            try:
+                fen.load(start,self.mode) #tried on a headless board first, so one that doesn't fit starts the usual way
+            except ValueError:
+                start=None
+            else:
+                self.record_tags["Start"]=start
+        self.turns=[]
+        self.pending=[]
+        self.log=[]
+        self.log_pointer=0
+        self.board=b.Board.of(self.mode.board)
         self.board.construct((10,b.WIN_HEIGHT/2-(self.board.tile_dim[1]*self.board.height)/2),int(time_field.text),int(inc_field.text),int(del_field.text),msrt_small)
-        self.board.populate(import_field.text)
+        self.board.populate(start)
         self.board.construct_img(b.CREAM_TILE,b.GREEN_TILE,None)
-        if hasattr(self.mode,"game_start"):
+        if hasattr(self.mode,"game_start") and start == None:
             self.mode.game_start(self)
-        self.log.append(self.board.get_layout())
+        self.log.append(position.encode(self))
+        self.tables.clear()
+        if self.computer != None and not engine.supports(self.mode):
+            self.computer=None
 
     def reset(self):
+        save_record()
         self.menu="main"
         self.submenu="main"
         self.last_menu=None
         self.mode=None
         self.additional=None
         self.win=[False, -1]
+        self.background.cancel()
 
 v=Game()
 
@@ -139,7 +179,8 @@ class Button():
         self.shad_offset:int=int(0.15*size[1])
         self.rect=Rect(centre[0]-size[0]/2,centre[1]-size[1]/2,size[0],size[1])
         self.shad_rect=Rect(centre[0]-size[0]/2,centre[1]-size[1]/2+self.shad_offset,size[0],size[1])
-        self.text=font.render(text,True,text_colour)
+        self.area=self.rect.union(self.shad_rect) #everything display() draws on
+        self.text=b.texts.render(font,text,True,text_colour)
         self.text_pos=self.text.get_rect(center=centre).topleft
         self.centre=centre
         self.colour=colour
@@ -182,7 +223,7 @@ class Button():
 class Text():
     def __init__(self, text:str, font:font.Font, colour:Colour, centre:Coord):
         self.raw_text=text
-        self.text=font.render(text,True,colour)
+        self.text=b.texts.render(font,text,True,colour)
         self.pos=self.text.get_rect(center=centre).topleft
 
     def display(self,surface:Surface):
@@ -199,7 +240,7 @@ class Input():
         self.active=False
         self.size=size
         self.rect=Rect(centre[0]-size[0]/2,centre[1]-size[1]/2,size[0],size[1])
-        self.text_render:Surface=font.render(plc_text,True,b.WHITE)
+        self.text_render:Surface=b.texts.render(font,plc_text,True,b.WHITE)
 
     def display(self,surface:Surface,mp:Coord,md:bool,key:event.Event=None,mods:int=0):
         if md:
@@ -229,7 +270,7 @@ class Input():
                 else:
                     self.text += key.unicode
                     self.text=self.control(self.text)
-                self.text_render=self.font.render(self.text,True,contrast(self.colour))
+                self.text_render=b.texts.render(self.font,self.text,True,contrast(self.colour))
 
 class Static():
     def __init__(self, centre:Coord, image:Surface):
@@ -253,9 +294,9 @@ def gen_change_submenu(final:str):
         v.additional=None
     return change_submenu
 
-def gen_set_gamemode(mode):
+def gen_set_gamemode(mode:str):
     def set_gamemode(mode=mode):
-        v.mode=mode
+        v.mode=m.load(mode)
     return set_gamemode
 
 def gen_change_additional(final:str):
@@ -301,7 +342,7 @@ def paste_check(strinput:str) -> str:
     return "".join(strinput.split("\x00"))
 
 def copy_board():
-    scrap.put(SCRAP_TEXT,v.board.internal_to_human().encode())
+    scrap.put(SCRAP_TEXT,fen.write(v).encode())
 
 def concede():
     v.win=[True,v.board.you]
@@ -313,6 +354,126 @@ def gen_func(instr:str):
         exec(instr)
     return res_func
 
+def move_selected():
+    '''Move the piece on v.prev_selected to v.selected, which is one of its targets.'''
+    prev_turn=v.board.turn
+    v.pending.append((v.prev_selected.boardpos,v.selected.boardpos,None))
+    capture=False
+    if isinstance(v.selected.piece, b.Piece):
+        capture=True
+        captured_piece=v.selected.piece
+    if capture and (not hasattr(v.selected.piece, "pointless") or not v.selected.piece.pointless):
+        v.board.pointless=0
+    else:
+        v.board.pointless += 1
+    v.prev_selected.piece.move_to(v.selected,v)
+    if hasattr(v.mode,"after_capture") and capture:
+        v.mode.after_capture(v,v.selected,captured_piece)
+    v.selected.selected=False
+    v.prev_selected=None
+    v.selected=None
+    if hasattr(v.mode,"after_move"):
+        v.mode.after_move(v)
+    else:
+        standard.after_move(v)
+    if v.board.turn != prev_turn:
+        if v.log_pointer != len(v.log)-1:
+            v.log=v.log[:v.log_pointer+1]
+        v.log.append(position.encode(v))
+        v.turns[v.log_pointer:]=[v.pending]
+        v.pending=[]
+        v.log_pointer += 1
+
+def update_win() -> MoveTable:
+    '''Put the mode's win condition for this position into v.win, and return the position's MoveTable, which only runs it the first time.'''
+    table=MoveTable.of(v)
+    v.win[0], v.win[1]=table.win
+    return table
+
+def computer_move():
+    '''Called every frame while the engine is to move. Ask the background worker for its move for v.computer, given the time its Timer allows, and once the move is ready play it the same way a click on the target would.'''
+    move=v.background.request("engine",v.board.hash,background.think,engine.pack(v),engine.think_time(v.board.timers[1-v.computer]))
+    if move == None or move is background.PENDING:
+        return
+    v.prev_selected=v.board.get(move[0])
+    v.selected=v.board.get(move[1])
+    move_selected()
+    if move[2] != None and v.board.active_options != None:
+        options=v.board.active_options
+        options.on_click(options.contains[move[2]],options)
+        v.board.active_options=None
+        record_choice(move[2])
+    v.board.scrub()
+    update_win()
+
+def game_rects(pos_rect:Rect) -> list[Rect]|None:
+    '''The parts of the screen the game can change from one frame to the next: tiles the board drew again, timers, buttons and the mouse position. None if the whole screen should be updated, as in other menus or while something else (the win screen, an OptionsBar, pockets, arrows) is showing.'''
+    board=v.board
+    if v.menu != "game" or v.win[0] != False or board.active_options != None or board.arrows or grid or any(isinstance(pocket,b.Pocket) and pocket.contains for pocket in (board.whitepocket,board.blackpocket)):
+        return None
+    return board.dirty+[timer.area() for timer in board.timers]+[undo_button.area,redo_button.area,settings_button.area,pos_rect]
+
+untimed_win=MoveTable.run_win
+def timed_win(game:Game) -> tuple[list[BoardCoord],bool|None,int]:
+    '''MoveTable.run_win, counted as the frame's "win" phase. Set up here rather than in rules, so headless code never touches the timing.'''
+    with frame_times.phase("win"):
+        return untimed_win(game)
+MoveTable.run_win=staticmethod(timed_win)
+
+untimed_lock=MoveTable.run_lock
+def timed_lock(game:Game) -> list[BoardCoord]:
+    '''MoveTable.run_lock, also counted as the "win" phase.'''
+    with frame_times.phase("win"):
+        return untimed_lock(game)
+MoveTable.run_lock=staticmethod(timed_lock)
+
+def restore(rect:Rect):
+    '''Paint over whatever was drawn on rect: the background, with the board's canvas where the board lies under it.'''
+    v.screen.fill(b.SHADES[1],rect)
+    overlap=rect.clip(v.board.rect)
+    if overlap:
+        v.screen.blit(v.board.canvas,overlap,overlap.move(-v.board.anchor[0],-v.board.anchor[1]))
+
+timings_text:list[list[Surface]]=[]
+timings_age:int=0
+
+def draw_timings(surface:Surface) -> Rect:
+    '''The F3 overlay in the top right corner: p50, p95 and p99 of each phase of the frame (see modes/frames), in milliseconds. The figures are worked out again every half second.'''
+    global timings_text, timings_age
+    timings_age-=1
+    if timings_age <= 0:
+        timings_age=30
+        stats=frame_times.stats()
+        rows=[["ms","p50","p95","p99"]]+[[column]+[f"{stats[column][percentile]:.2f}" for percentile in ("p50","p95","p99")] for column in COLUMNS]
+        timings_text=[[msrt_vsmall.render(cell,True,b.WHITE) for cell in row] for row in rows] #not through b.texts: the figures change too often to be worth keeping
+    line=msrt_vsmall.get_height()
+    area=Rect(b.WIN_WIDTH-330,0,330,line*len(timings_text)+10)
+    draw.rect(surface,b.SHADES[0],area)
+    for y, row in enumerate(timings_text):
+        for x, cell in enumerate(row):
+            surface.blit(cell,(area.left+10+x*80,area.top+5+y*line))
+    return area
+
+def record_choice(index:int):
+    '''Add an OptionsBar choice to the move that brought it up: the last of the turn in progress, or of the one before if that move ended the turn.'''
+    turn=v.pending if v.pending else v.turns[-1] if v.turns else None
+    if turn:
+        start, end, choice=turn[-1]
+        turn[-1]=(start,end,index)
+
+def save_record():
+    '''Add the game being left to RECORD_FILE, up to the position on screen, if any move was made.'''
+    if v.mode == None or v.board == None or not (v.turns or v.pending):
+        return
+    with open(RECORD_FILE,"a") as file:
+        writer=RecordWriter(file)
+        writer.begin(v.mode.__name__.split(".")[-1],v.board.width,v.board.height,v.record_tags)
+        for turn in v.turns[:v.log_pointer]+([v.pending] if v.pending else []):
+            writer.turn(turn)
+        writer.end(result_text(v.win))
+    v.turns=[]
+    v.pending=[]
+
 def crement_log(value:int):
     def res_crement_log(value=value):
         if v.log_pointer+value < 0:
@@ -323,14 +484,16 @@ def crement_log(value:int):
             return
         else:
             v.log_pointer += value
-            v.board.restore(v.log[v.log_pointer])
+            position.decode(v.log[v.log_pointer],v)
+            v.pending=[]
+            v.tables.clear() #decode() can swap pieces for new ones, see MoveTable.of()
     return res_crement_log
 
 font.init()
-msrt_title=font.Font(join(b.FNT_IMG_DIR,"bold++.ttf"),100)
-msrt_norm=font.Font(join(b.FNT_IMG_DIR,"bold+.ttf"),40)
-msrt_small=font.Font(join(b.FNT_IMG_DIR,"bold.ttf"),30)
-msrt_vsmall=font.Font(join(b.FNT_IMG_DIR,"thin.ttf"),20)
+msrt_title=b.load_font(join(b.FNT_IMG_DIR,"bold++.ttf"),100)
+msrt_norm=b.load_font(join(b.FNT_IMG_DIR,"bold+.ttf"),40)
+msrt_small=b.load_font(join(b.FNT_IMG_DIR,"bold.ttf"),30)
+msrt_vsmall=b.load_font(join(b.FNT_IMG_DIR,"thin.ttf"),20)
 
 title_text=Text("Chess+",msrt_title,b.WHITE,(b.WIN_WIDTH/2,100))
 almanac_text=Text("Almanac",msrt_title,b.WHITE,(b.WIN_WIDTH/2,80))
@@ -352,7 +515,8 @@ back_button=Button((b.WIN_WIDTH/2,b.WIN_HEIGHT-90),(300,70),back_button_func,"Ba
 almanac_modes_button=Button((250,40),(150,35),gen_change_submenu("modes"),"Modes",msrt_small,toggle=True)
 almanac_pieces_button=Button((250,100),(150,35),gen_change_submenu("pieces"),"Pieces",msrt_small,toggle=True)
 onlineplay_button=Button((b.WIN_WIDTH/3,250),(400,70),gen_change_single("v.connect","True"),"Online Play",msrt_norm,toggle=True)
-localplay_button=Button((2*b.WIN_WIDTH/3,250),(400,70),gen_change_single("v.connect","False"),"Local Play",msrt_norm,toggle=True)
+localplay_button=Button((2*b.WIN_WIDTH/3,250),(400,70),gen_change_many({"v.connect":"False","v.computer":"None"}),"Local Play",msrt_norm,toggle=True)
+computer_button=Button((b.WIN_WIDTH/2,530),(400,70),gen_change_many({"v.connect":"False","v.computer":"1"}),"Vs Computer",msrt_norm,toggle=True)
 to_game_button=Button((b.WIN_WIDTH/2,b.WIN_HEIGHT-190),(300,70),gen_compound_func(gen_change_menu("game",None),v.begin),"Play",msrt_norm)
 m_next_button=Button((2*b.WIN_WIDTH/3,b.WIN_HEIGHT-90),(200,70),gen_func("v.a_m_offset += 1"),"Next",msrt_norm)
 m_prev_button=Button((b.WIN_WIDTH/3,b.WIN_HEIGHT-90),(200,70),gen_func("v.a_m_offset -= 1"),"Prev",msrt_norm)
@@ -395,55 +559,59 @@ def draw_grid(surface:Surface, points:list[Coord]=debug_grid, tags:list[Surface]
 
 module_count=0
 piece_count=0
-for module in m.__all__:
-    temp=__import__("modes",fromlist=[module])
-    temp:Gamemode=getattr(temp,module)
-    if temp.hidden:
+listed_pieces:set[str]=set()
+for module in m.__all__: #from the manifest: modules are only imported when chosen or opened in the almanac
+    entry=m.registry[module]
+    if entry["hidden"]:
         continue
-    try:
-        v.mode_infos[module]=temp.info
-        v.mode_info_buttons.append(Button((b.WIN_WIDTH/2,200+module_count%5 *120),(b.INFO_BORDERS[1]-b.INFO_BORDERS[0],100),gen_change_additional(module),temp.info.name,msrt_norm))
-        v.mode_choose_buttons.append(Button((b.WIN_WIDTH/2,200+module_count%5 *120),(b.INFO_BORDERS[1]-b.INFO_BORDERS[0],100),gen_compound_func(gen_change_submenu("players"),gen_set_gamemode(temp)),temp.info.name,msrt_norm))
-    except AttributeError:
-        v.mode_info_buttons.append(Button((b.WIN_WIDTH/2,200+module_count%5 *120),(b.INFO_BORDERS[1]-b.INFO_BORDERS[0],100),gen_change_additional(None),"Incorrect Format",msrt_norm))
+    v.mode_info_buttons.append(Button((b.WIN_WIDTH/2,200+module_count%5 *120),(b.INFO_BORDERS[1]-b.INFO_BORDERS[0],100),gen_change_additional(module),entry["name"],msrt_norm))
+    v.mode_choose_buttons.append(Button((b.WIN_WIDTH/2,200+module_count%5 *120),(b.INFO_BORDERS[1]-b.INFO_BORDERS[0],100),gen_compound_func(gen_change_submenu("players"),gen_set_gamemode(module)),entry["name"],msrt_norm))
     module_count += 1
-    if hasattr(temp,"piece_infos"):
-        try:
-            temp_i:b.Info=getattr(temp,"piece_infos")
-            for piece in temp_i:
-                if piece.name not in v.piece_infos:
-                    v.piece_infos[piece.name]=piece
-                    v.piece_info_buttons.append(Button((b.WIN_WIDTH/2,200+piece_count%5 *120),(b.INFO_BORDERS[1]-b.INFO_BORDERS[0],100),gen_change_additional(piece.name),piece.name,msrt_norm))
-                    piece_count += 1
-        except AttributeError:
-            v.piece_info_buttons.append(Button((b.WIN_WIDTH/2,200+piece_count%5 *120),(b.INFO_BORDERS[1]-b.INFO_BORDERS[0],100),gen_change_additional(None),"Incorrect Format",msrt_norm))
+    for piece in entry["pieces"]:
+        if piece not in listed_pieces:
+            listed_pieces.add(piece)
+            v.piece_info_buttons.append(Button((b.WIN_WIDTH/2,200+piece_count%5 *120),(b.INFO_BORDERS[1]-b.INFO_BORDERS[0],100),gen_change_additional(piece),piece,msrt_norm))
             piece_count += 1
 
 md:bool=False
 grid:bool=False
+last_rects:list[Rect]|None=None
+profiling.mark_ready()
 while v.running:
-    v.screen.fill((b.SHADES[1]))
+    frame_times.begin()
+    partial:bool=last_rects != None #the last frame was a game one with nothing over the board, so the screen only needs what changed drawn again
+    if partial:
+        for rect in last_rects:
+            restore(rect)
+    else:
+        v.screen.fill((b.SHADES[1]))
     mp:Coord=mouse.get_pos()
     mu:bool=False
     kp:event=None
     km:int=key.get_mods()
     ms_x:int=0
     ms_y:int=0
-    for e in event.get():
-        if e.type == QUIT:
-            v.running=False
-        if e.type == MOUSEBUTTONDOWN:
-            md=True
-        if e.type == MOUSEBUTTONUP:
-            md=False
-            mu=True
-        if e.type == KEYDOWN:
-            kp=e
-        if e.type == MOUSEWHEEL:
-            ms_x=e.x
-            ms_y=e.y
-        if e.type == KEYDOWN and e.key == K_g:
-            grid=not grid
+    with frame_times.phase("events"):
+        for e in event.get():
+            if e.type == QUIT:
+                v.running=False
+            if e.type == MOUSEBUTTONDOWN:
+                md=True
+            if e.type == MOUSEBUTTONUP:
+                md=False
+                mu=True
+            if e.type == KEYDOWN:
+                kp=e
+            if e.type == MOUSEWHEEL:
+                ms_x=e.x
+                ms_y=e.y
+            if e.type == KEYDOWN and e.key == K_g:
+                grid=not grid
+            if e.type == KEYDOWN and e.key == K_F3:
+                frame_times.toggle()
+            if e.type == KEYDOWN and e.key == K_F4 and frame_times.enabled:
+                frame_times.export()
+                print("Frame timings written to frame_timings.json.")
 
     if v.menu == "main":
         title_text.display(v.screen)
@@ -467,11 +635,15 @@ while v.running:
                 p_prev_button.display(v.screen,mp,md,mu,unusable=v.a_p_offset == 0)
         else:
             if v.submenu == "modes":
+                if v.additional not in v.mode_infos:
+                    v.mode_infos[v.additional]=b.Page(m.load(v.additional).info)
                 hyperlink=v.mode_infos[v.additional].display(v.screen,ms_y,mp,mu)
                 if isinstance(hyperlink, str):
                     v.submenu="pieces"
                     v.additional=hyperlink
             elif v.submenu == "pieces":
+                if v.additional not in v.piece_infos:
+                    v.piece_infos[v.additional]=b.Page(m.piece_info(v.additional))
                 hyperlink=v.piece_infos[v.additional].display(v.screen,ms_y,mp,mu)
                 if isinstance(hyperlink, str):
                     v.submenu="modes"
@@ -485,7 +657,8 @@ while v.running:
             m_next_button.display(v.screen,mp,md,mu,unusable=5*(v.a_m_offset+1) >= len(v.mode_info_buttons))
             m_prev_button.display(v.screen,mp,md,mu,unusable=v.a_m_offset == 0)
         elif v.submenu == "players":
-            localplay_button.display(v.screen,mp,md,mu,unusable=not v.mode.local_play,toggle=not v.connect)
+            localplay_button.display(v.screen,mp,md,mu,unusable=not v.mode.local_play,toggle=not v.connect and v.computer == None)
+            computer_button.display(v.screen,mp,md,mu,unusable=not v.mode.local_play or not engine.supports(v.mode),toggle=v.computer != None)
             onlineplay_button.display(v.screen,mp,md,mu,unusable=not v.mode.online_play,toggle=v.connect)
             time_field.display(v.screen,mp,md,kp)
             seconds_text.display(v.screen)
@@ -503,58 +676,30 @@ while v.running:
         v.prev_selected=v.selected
         undo_button.display(v.screen,mp,md,mu,unusable=v.log_pointer == 0)
         redo_button.display(v.screen,mp,md,mu,unusable=v.log_pointer == len(v.log)-1)
-        temp=v.board.display(v.screen,mp,mu)
+        options=v.board.active_options
+        with frame_times.phase("board"):
+            temp=v.board.display(v.screen,mp,mu,full=not partial)
+        if options != None and v.board.active_options is not options and options.selected in options.contains: #a choice was clicked
+            record_choice(options.contains.index(options.selected))
         if mu and not v.win[0]:
             if temp != None: #select a tile
                 v.selected=temp
             if temp == False or temp == None: #deselect a tile
                 v.selected=None
             if v.selected != None and (v.selected.move_target or v.selected.capture_target): #move a piece
-                prev_turn=v.board.turn
-                capture=False
-                if isinstance(v.selected.piece, b.Piece):
-                    capture=True
-                    captured_piece=v.selected.piece
-                if capture and (not hasattr(v.selected.piece, "pointless") or not v.selected.piece.pointless):
-                    v.board.pointless=0
-                else:
-                    v.board.pointless += 1
-                v.prev_selected.piece.move_to(v.selected,v)
-                if hasattr(v.mode,"after_capture") and capture:
-                    v.mode.after_capture(v,v.selected,captured_piece)
-                v.selected.selected=False
-                v.prev_selected=None
-                v.selected=None
-                if hasattr(v.mode,"after_move"):
-                    v.mode.after_move(v)
-                else:
-                    standard.after_move(v)
-                if v.board.turn != prev_turn:
-                    if v.log_pointer != len(v.log)-1:
-                        v.log=v.log[:v.log_pointer+1]
-                    v.log.append(v.board.get_layout())
-                    v.log_pointer += 1
+                move_selected()
             v.board.scrub()
-            if hasattr(v.mode,"win"):
-                locked, v.win[0], v.win[1]=v.mode.win(v)
-            else:
-                locked, v.win[0], v.win[1]=b.Rules.win(v)
+            table=update_win()
             if v.selected != None: #redraw board state
-                if isinstance(v.selected.piece,b.Piece):
-                    for tile in locked:
-                        v.board.get(tile).locked=True
-                    if hasattr(v.mode,"move_filter"):
-                        for tile in v.mode.move_filter(v.selected.piece.moves(v),v):
-                            v.board.get(tile).move_target=True
-                    else:
-                        for tile in v.selected.piece.moves(v):
-                            v.board.get(tile).move_target=True
-                    if hasattr(v.mode,"capture_filter"):
-                        for tile in v.mode.capture_filter(v.selected.piece.capture_squares(v),v):
-                            v.board.get(tile).capture_target=True
-                    else:
-                        for tile in v.selected.piece.capture_squares(v):
-                            v.board.get(tile).capture_target=True
+                with frame_times.phase("moves"):
+                    moves, captures=table.select(v,v.selected)
+                for tile in moves:
+                    v.board.get(tile).move_target=True
+                for tile in captures:
+                    v.board.get(tile).capture_target=True
+
+        if v.computer == v.board.turn and v.win[0] == False and v.board.active_options == None and v.log_pointer == len(v.log)-1: #not while looking back through the log
+            computer_move()
 
         if v.board.timers[0].tripped:
             v.win=[True,1]
@@ -587,8 +732,23 @@ while v.running:
     
     if grid:
         draw_grid(v.screen)
-    pos_text=msrt_vsmall.render(str(mp),True,b.BLACK)
-    draw.rect(v.screen,b.WHITE,Rect(mp,pos_text.get_size()))
+    pos_text=b.texts.render(msrt_vsmall,str(mp),True,b.BLACK)
+    pos_rect=Rect(mp,pos_text.get_size())
+    draw.rect(v.screen,b.WHITE,pos_rect)
     v.screen.blit(pos_text,mp)
-    display.update()
-    v.clock.tick(60)
\ No newline at end of file
+    if frame_times.enabled:
+        timings_rect=draw_timings(v.screen)
+    rects=game_rects(pos_rect)
+    if rects != None and frame_times.enabled:
+        rects.append(timings_rect)
+    with frame_times.phase("update"):
+        if rects != None and last_rects != None: #last frame's too, for whatever has moved or shrunk since
+            display.update(rects+last_rects)
+        else:
+            display.update()
+    last_rects=rects
+    frame_times.end()
+    v.clock.tick(60)
+save_record()
+v.background.close()
+profiling.write()
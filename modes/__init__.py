@@ -1,19 +1,57 @@
-'''Contains all the chess gamemodes as well as a separate file (basic) for objects common to all of them.'''
+'''Contains all the chess gamemodes as well as the files they are built on: rules for the game logic common to all of them, and basic for drawing it.
+What the menus need to know about each mode (its name, flags and pieces) is read from manifest.json, so a mode's module is only imported by load(), when it is played or its almanac page is opened. After adding a mode or changing one's info, piece_infos or flags, run python -m modes to write the manifest again.'''
 
 from os.path import dirname, basename, isfile, join
 import glob
+import importlib
+import json
 
 hidden=True
-blacklist=["__init__.py","basic.py","tests.py"]
-namespace=''
+blacklist=["__init__.py","__main__.py","basic.py","rules.py","bitboard.py","engine.py","background.py","profiling.py","frames.py","record.py","position.py","fen.py"]
+MANIFEST=join(dirname(__file__),"manifest.json")
+
+type Entry=dict[str,str|bool|list[str]] #name, hidden, local_play, online_play and pieces (the names of its piece_infos)
+
+def module_names() -> list[str]:
+    '''File names of every mode module, without the .py.'''
+    return sorted(basename(f)[:-3] for f in glob.glob(join(dirname(__file__),"*.py")) if isfile(f) and basename(f) not in blacklist)
+
+def load(module:str):
+    '''The module of a mode, imported the first time it is asked for.'''
+    return importlib.import_module("."+module,__name__)
+
+def describe(module:str) -> Entry:
+    '''A mode's manifest entry, read off its module (which imports it).'''
+    mode=load(module)
+    return {"name":mode.info.name,"hidden":mode.hidden,"local_play":mode.local_play,"online_play":mode.online_play,"pieces":[piece.name for piece in getattr(mode,"piece_infos",[])]}
+
+def write_manifest():
+    global registry
+    registry={module:describe(module) for module in module_names()}
+    with open(MANIFEST,"w") as file:
+        json.dump(registry,file,indent=4)
+
+def piece_info(name:str):
+    '''The almanac page of a piece, from the first shown mode in __all__ that has it.'''
+    for module in __all__:
+        if not registry[module]["hidden"] and name in registry[module]["pieces"]:
+            for piece in load(module).piece_infos:
+                if piece.name == name:
+                    return piece
+    raise KeyError(name)
+
+def __getattr__(name:str):
+    '''modes.<mode> and getattr(modes,<mode>) import the mode on first use.'''
+    if name in registry:
+        return load(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 try:
-    __import__("standard")
-except:
-    namespace="modes."
-modules = glob.glob(join(dirname(__file__), "*.py"))
-original_modules=[basename(f)[:-3] for f in modules if isfile(f) and not any([f.endswith(blacklist[i]) for i in range(len(blacklist))])] #original module file names
-module_list=[getattr(getattr(__import__(namespace+mdl,fromlist=[namespace]),"info"),"name") for mdl in original_modules] # sorted module proper names
-module_list.sort()
-module_dict={getattr(getattr(__import__(namespace+mdl,fromlist=[namespace]),"info"),"name"):mdl for mdl in original_modules}
-__all__ = [module_dict[item] for item in module_list] 
-# for every proper name in module_list (the sorted one), add the corresponding module name from the list of file names
\ No newline at end of file
+    with open(MANIFEST) as file:
+        registry:dict[str,Entry]=json.load(file)
+except (OSError, ValueError):
+    registry={}
+registry={module:registry[module] if module in registry else describe(module) for module in module_names()} #a mode missing from the manifest is imported to fill in its entry
+module_dict={entry["name"]:module for module, entry in registry.items()} #proper name: module file name
+module_list=sorted(module_dict) # sorted module proper names
+__all__ = [module_dict[item] for item in module_list]
@@ -0,0 +1,5 @@
+'''python -m modes: writes manifest.json again from the mode modules themselves.'''
+import modes
+
+modes.write_manifest()
+print(f"Wrote {len(modes.registry)} modes to {modes.MANIFEST}.")
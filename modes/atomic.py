@@ -1,6 +1,5 @@
-from modes.basic import *
+from modes.rules import *
 import modes.standard as s
-from pygame import *
 
 hidden=False
 board=Board(8,8,["8","8","8","8","8","8","8","8"],piecesdict=s.STD_PCS_DICT,initpos=s.STD_INIT_POS)
@@ -9,8 +8,7 @@ win=Rules.win
 
 piece_infos=[]
 lore="Boom boom! [I'll add some proper stuff later]"
-info=Info("Atomic Chess","The nuclear age begins.",lore,join(OTR_IMG_DIR,"atomic.png"),GREEN_TILE,"mode",[s.pawn_info,s.bishop_info,s.knight_info,s.rook_info,s.queen_info,s.king_info],internal_name="atomic")
-info.construct()
+info=Info("Atomic Chess","The nuclear age begins.",lore,join(OTR_IMG_DIR,"atomic.png"),GREEN_SQUARE,"mode",[s.pawn_info,s.bishop_info,s.knight_info,s.rook_info,s.queen_info,s.king_info],internal_name="atomic")
 
 def after_capture(game:Game, final_tile:Tile, *args):
     for coord in [(1,0),(-1,0),(0,1),(0,-1),(1,1),(-1,1),(1,-1),(-1,-1)]:
@@ -0,0 +1,81 @@
+'''Runs slow work (the engine's moves, for now) away from the UI loop, so no frame has to wait for it. The UI asks Background.request() for the result every frame and gets PENDING until it is ready.
+Jobs run one at a time in a forked worker process. Where processes can't be forked they run in a thread instead: a freshly started interpreter would run chess_plus's loop again, as it isn't behind a __main__ check.'''
+from __future__ import annotations
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from types import SimpleNamespace
+import multiprocessing
+import os
+from modes import engine
+
+type Job=tuple[int,int,Future] #position key, job id and its Future
+
+PENDING=object() #what request() returns while a job is still running
+
+#Globals of the worker process (or thread), set by start_worker() and run_job()
+cancel_id=None #shared with the Background: holds the id of a running job that should stop
+current_id=0
+worker_engine:engine.Engine|None=None
+
+def start_worker(shared, process:bool):
+    global cancel_id
+    cancel_id=shared
+    if process and hasattr(os,"nice"):
+        os.nice(10) #on a machine with few cores, the UI should still get its frames out while the worker searches
+
+def run_job(job_id:int, function:Callable, args:tuple):
+    global current_id
+    current_id=job_id
+    return function(*args)
+
+def cancelled() -> bool:
+    '''For jobs to ask now and then: whether the Background has given up on the one running.'''
+    return cancel_id.value == current_id
+
+def think(packed:engine.Packed, seconds:float) -> engine.Move|None:
+    '''Job: the engine's move in a position from engine.pack(). The Engine (and its transposition table) is kept from one move to the next.'''
+    global worker_engine
+    if worker_engine == None:
+        worker_engine=engine.Engine()
+    worker_engine.stop=cancelled
+    return worker_engine.search(engine.unpack(packed),seconds)
+
+class Background():
+    def __init__(self):
+        if "fork" in multiprocessing.get_all_start_methods():
+            context=multiprocessing.get_context("fork")
+            self.cancel_id=context.Value("q",0,lock=False)
+            self.executor:Executor=ProcessPoolExecutor(1,context,start_worker,(self.cancel_id,True))
+        else:
+            self.cancel_id=SimpleNamespace(value=0)
+            self.executor=ThreadPoolExecutor(1,"background",start_worker,(self.cancel_id,False))
+        self.jobs:dict[str,Job]={}
+        self.next_id:int=1
+
+    def request(self, name:str, key:int, function:Callable, *args):
+        '''The result of function(*args) (a module-level function, so it can be sent to the worker) for the position key, usually Board.hash. The first request for a key starts the job and later ones return PENDING until it is done. A request under the same name with another key cancels the old job first, since its position has gone.'''
+        job=self.jobs.get(name)
+        if job != None and job[0] != key:
+            self.cancel(name)
+            job=None
+        if job == None:
+            self.jobs[name]=(key,self.next_id,self.executor.submit(run_job,self.next_id,function,args))
+            self.next_id+=1
+            return PENDING
+        if not job[2].done():
+            return PENDING
+        del self.jobs[name]
+        return job[2].result()
+
+    def cancel(self, name:str|None=None):
+        '''Drop the job under name, or every job. One still queued never starts; the running one is asked to stop through cancelled().'''
+        for job_name in [name] if name != None else list(self.jobs):
+            job=self.jobs.pop(job_name,None)
+            if job != None and not job[2].cancel():
+                self.cancel_id.value=job[1]
+
+    def close(self):
+        self.cancel()
+        self.executor.shutdown(wait=False,cancel_futures=True)
+
+print('Module "background" (worker for slow jobs) loaded.')
@@ -0,0 +1,413 @@
+'''Integer bitboards for plain 8x8 boards. Square n is bit n, where n=y*8+x as in Board.squares, so bit 0 is the top left square and White moves towards the low bits.
+Sliding attacks come from occupancy-indexed line tables: for each square and each of its four lines, a dict from the occupancy of that line (edges excluded, since they never change the result) to the attacked squares. This is the kindergarten idea with a dict standing in for the multiply-and-shift hash, which is cheaper than 64-bit wrapping multiplication in Python.'''
+from __future__ import annotations
+from collections.abc import Generator
+
+type BoardCoord=tuple[int,int]
+type Bitboard=int
+
+DIRECTIONS:list[tuple[int,int]]=[(0,-1),(0,1),(-1,0),(1,0),(1,-1),(-1,-1),(-1,1),(1,1)] #forward, backward, left, right, then top-right, top-left, bottom-left, bottom-right
+ORTHOGONALS:list[tuple[int,int]]=DIRECTIONS[:4] #in Movement.orthogonals order
+DIAGONALS:list[tuple[int,int]]=DIRECTIONS[4:] #in Movement.diagonals order
+LINE_OF:dict[tuple[int,int],int]={(0,-1):0,(0,1):0,(-1,0):1,(1,0):1,(1,-1):2,(-1,1):2,(-1,-1):3,(1,1):3} #file, rank, anti-diagonal, diagonal
+ROLES:list[str]=["pawn","knight","bishop","rook","queen","king"] #what Piece.role can be for the backend to understand a piece
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING=range(6)
+COORDS:list[BoardCoord]=[(index%8,index//8) for index in range(64)]
+
+def _ray(index:int, step:tuple[int,int], edge:bool=True) -> Bitboard:
+    '''Squares from index in the direction of step. Without edge, the last square before the edge of the board is left out.'''
+    result=0
+    x, y=index%8+step[0], index//8+step[1]
+    while 0 <= x < 8 and 0 <= y < 8:
+        if not edge and not (0 <= x+step[0] < 8 and 0 <= y+step[1] < 8):
+            break
+        result|=1<<(y*8+x)
+        x+=step[0]
+        y+=step[1]
+    return result
+
+def _slide(index:int, steps:list[tuple[int,int]], occupied:Bitboard) -> Bitboard:
+    '''The slow way of finding sliding attacks, used to fill the tables.'''
+    result=0
+    for step in steps:
+        x, y=index%8+step[0], index//8+step[1]
+        while 0 <= x < 8 and 0 <= y < 8:
+            result|=1<<(y*8+x)
+            if occupied&(1<<(y*8+x)):
+                break
+            x+=step[0]
+            y+=step[1]
+    return result
+
+def _leaps(index:int, offsets:list[tuple[int,int]]) -> Bitboard:
+    result=0
+    for dx, dy in offsets:
+        x, y=index%8+dx, index//8+dy
+        if 0 <= x < 8 and 0 <= y < 8:
+            result|=1<<(y*8+x)
+    return result
+
+RAYS:dict[tuple[int,int],list[Bitboard]]={step:[_ray(index,step) for index in range(64)] for step in DIRECTIONS}
+LINE_MASKS:list[list[Bitboard]]=[]
+LINE_ATTACKS:list[list[dict[Bitboard,Bitboard]]]=[]
+for steps in [[(0,-1),(0,1)],[(-1,0),(1,0)],[(1,-1),(-1,1)],[(-1,-1),(1,1)]]:
+    masks=[]
+    tables=[]
+    for index in range(64):
+        mask=_ray(index,steps[0],False)|_ray(index,steps[1],False)
+        table={}
+        subset=0
+        while True: #every subset of mask, by the carry-rippler trick
+            table[subset]=_slide(index,steps,subset)
+            subset=(subset-mask)&mask
+            if subset == 0:
+                break
+        masks.append(mask)
+        tables.append(table)
+    LINE_MASKS.append(masks)
+    LINE_ATTACKS.append(tables)
+KNIGHT_ATTACKS:list[Bitboard]=[_leaps(index,[(1,2),(-1,2),(1,-2),(-1,-2),(2,1),(2,-1),(-2,1),(-2,-1)]) for index in range(64)]
+KING_ATTACKS:list[Bitboard]=[_leaps(index,[(0,1),(0,-1),(1,0),(-1,0),(1,1),(1,-1),(-1,1),(-1,-1)]) for index in range(64)]
+PAWN_ATTACKS:list[list[Bitboard]]=[[_leaps(index,[(-1,-1),(1,-1)]) for index in range(64)],[_leaps(index,[(-1,1),(1,1)]) for index in range(64)]] #by colour
+PAWN_STEP:list[int]=[-8,8] #by colour
+FULL:Bitboard=(1<<64)-1
+
+def rook_attacks(index:int, occupied:Bitboard) -> Bitboard:
+    return LINE_ATTACKS[0][index][occupied&LINE_MASKS[0][index]]|LINE_ATTACKS[1][index][occupied&LINE_MASKS[1][index]]
+
+def bishop_attacks(index:int, occupied:Bitboard) -> Bitboard:
+    return LINE_ATTACKS[2][index][occupied&LINE_MASKS[2][index]]|LINE_ATTACKS[3][index][occupied&LINE_MASKS[3][index]]
+
+def to_coords(bitboard:Bitboard) -> list[BoardCoord]:
+    '''Translate a bitboard into board coordinates, lowest square first.'''
+    result=[]
+    while bitboard:
+        low=bitboard&-bitboard
+        result.append(COORDS[low.bit_length()-1])
+        bitboard^=low
+    return result
+
+def to_indexes(bitboard:Bitboard) -> list[int]:
+    result=[]
+    while bitboard:
+        low=bitboard&-bitboard
+        result.append(low.bit_length()-1)
+        bitboard^=low
+    return result
+
+def _nearest_first(bitboard:Bitboard, step:tuple[int,int]) -> Generator[int]:
+    '''Square numbers of a single ray, starting from the end nearest the piece.'''
+    if step[0]+8*step[1] > 0:
+        while bitboard:
+            low=bitboard&-bitboard
+            yield low.bit_length()-1
+            bitboard^=low
+    else:
+        while bitboard:
+            index=bitboard.bit_length()-1
+            yield index
+            bitboard^=1<<index
+
+class Bitboards():
+    '''The bitboard side of an 8x8 Board. Board.place() keeps it up to date, so it always agrees with Board.squares.
+    Occupancy and colours cover every piece. Per-role boards only cover pieces whose class has a Piece.role; anything else is counted in foreign, and legal_moves() refuses to run while there are any.
+    It also keeps an attack map for each colour: how many of its role pieces attack each square, by standard chess rules. Foreign pieces block lines but attack nothing, so the maps can only be trusted while foreign is 0.'''
+    def __init__(self, squares:list):
+        self.squares=squares #Board.squares, for the piece state (moved, has_moved, en_passantable) that isn't worth mirroring
+        self.occupied:Bitboard=0
+        self.colours:list[Bitboard]=[0,0] #squares holding a piece friendly to each colour. Pieces of colour "all" are in both, Brick Walls in neither.
+        self.pieces:list[list[Bitboard]]=[[0]*len(ROLES),[0]*len(ROLES)] #by colour, then by role
+        self.foreign:int=0 #pieces on the board that legal_moves() doesn't understand
+        self.attack_counts:list[list[int]]=[[0]*64,[0]*64] #by colour, then square: how many pieces attack it
+        self.attacked_by:list[Bitboard]=[0,0] #by colour: the squares with a non-zero count
+
+    def place(self, index:int, old, new):
+        '''Called by Board.place() before it overwrites old with new. Only the pieces whose attacks can change are re-tallied: the old and new pieces themselves and, if the square is being emptied or filled, the sliders that can see it.'''
+        bit=1<<index
+        sliders=0
+        if (old == None) != (new == None):
+            sliders=self.sliders_seeing(index)&~bit
+            for square in to_indexes(sliders):
+                self._tally(square,self.squares[square],-1)
+        if old != None:
+            self.occupied&=~bit
+            self.colours[0]&=~bit
+            self.colours[1]&=~bit
+            role=self.role(old)
+            if role == None:
+                self.foreign-=1
+            else:
+                self._tally(index,old,-1)
+                self.pieces[old.colour][role]&=~bit
+        if new != None:
+            self.occupied|=bit
+            if new.colour == 0 or new.colour == "all":
+                self.colours[0]|=bit
+            if new.colour == 1 or new.colour == "all":
+                self.colours[1]|=bit
+            role=self.role(new)
+            if role == None:
+                self.foreign+=1
+            else:
+                self.pieces[new.colour][role]|=bit
+                self._tally(index,new,1)
+        for square in to_indexes(sliders):
+            self._tally(square,self.squares[square],1)
+
+    def rebuild(self):
+        '''Work everything out again from squares, for when most of the board has changed at once (see Board.place_many()). Each piece is tallied once, with every other piece already in place, rather than sliders being re-tallied as the squares around them fill.'''
+        self.__init__(self.squares)
+        tallied=[]
+        for index, piece in enumerate(self.squares):
+            if piece == None:
+                continue
+            bit=1<<index
+            self.occupied|=bit
+            if piece.colour == 0 or piece.colour == "all":
+                self.colours[0]|=bit
+            if piece.colour == 1 or piece.colour == "all":
+                self.colours[1]|=bit
+            role=self.role(piece)
+            if role == None:
+                self.foreign+=1
+            else:
+                self.pieces[piece.colour][role]|=bit
+                tallied.append((index,piece))
+        for index, piece in tallied:
+            self._tally(index,piece,1)
+
+    def sliders_seeing(self, index:int) -> Bitboard:
+        '''Bishops, rooks and queens of either colour with a clear line to the square.'''
+        straight=self.pieces[0][ROOK]|self.pieces[0][QUEEN]|self.pieces[1][ROOK]|self.pieces[1][QUEEN]
+        diagonal=self.pieces[0][BISHOP]|self.pieces[0][QUEEN]|self.pieces[1][BISHOP]|self.pieces[1][QUEEN]
+        return (rook_attacks(index,self.occupied)&straight)|(bishop_attacks(index,self.occupied)&diagonal)
+
+    def attacks_from(self, index:int, piece, occupied:Bitboard|None=None) -> Bitboard:
+        '''The squares a role piece standing on index attacks.'''
+        if occupied == None:
+            occupied=self.occupied
+        role=ROLES.index(piece.role)
+        if role == PAWN:
+            return PAWN_ATTACKS[piece.colour][index]
+        if role == KNIGHT:
+            return KNIGHT_ATTACKS[index]
+        if role == KING:
+            return KING_ATTACKS[index]
+        result=0
+        if role != BISHOP:
+            result|=rook_attacks(index,occupied)
+        if role != ROOK:
+            result|=bishop_attacks(index,occupied)
+        return result
+
+    def _tally(self, index:int, piece, delta:int):
+        '''Add (delta 1) or remove (delta -1) a piece's attacks from its colour's attack map.'''
+        counts=self.attack_counts[piece.colour]
+        attacks=self.attacks_from(index,piece)
+        attacked_by=self.attacked_by[piece.colour]
+        if delta > 0:
+            attacked_by|=attacks
+        while attacks:
+            low=attacks&-attacks
+            square=low.bit_length()-1
+            counts[square]+=delta
+            if counts[square] == 0:
+                attacked_by&=~low
+            attacks^=low
+        self.attacked_by[piece.colour]=attacked_by
+
+    def safe_squares(self, king:int, colour:int, candidates:Bitboard) -> Bitboard:
+        '''The candidate squares that the colour's king, standing on king, could go to without being attacked. The attack maps are read with the king on the board, so lines through the king are looked at again with it taken off.'''
+        enemy=1-colour
+        unsafe=candidates&self.attacked_by[enemy]
+        pieces=self.pieces[enemy]
+        if self.attackers(king,enemy)&(pieces[BISHOP]|pieces[ROOK]|pieces[QUEEN]):
+            occupied=self.occupied&~(1<<king)
+            for square in to_indexes(candidates&~unsafe):
+                if self.attacked(square,enemy,occupied):
+                    unsafe|=1<<square
+        return candidates&~unsafe
+
+    @staticmethod
+    def role(piece) -> int|None:
+        role=getattr(piece,"role",None)
+        if role == None or piece.colour not in (0,1):
+            return None
+        return ROLES.index(role)
+
+    def friendly(self, colour:int|str) -> Bitboard:
+        '''Squares whose piece belongs_to(colour).'''
+        if colour == 0 or colour == 1:
+            return self.colours[colour]
+        return self.colours[0]&self.colours[1]
+
+    def slide_moves(self, coord:BoardCoord, steps:list[tuple[int,int]], board) -> Generator[BoardCoord]:
+        '''Movement.orthogonals/diagonals for an unlimited slider on the whole board.'''
+        index=coord[1]*8+coord[0]
+        if not self.squares[index].belongs_to(board.turn):
+            return
+        occupied, flags=self.occupied, board.flags
+        for step in steps:
+            line=LINE_OF[step]
+            for target in _nearest_first(LINE_ATTACKS[line][index][occupied&LINE_MASKS[line][index]]&RAYS[step][index]&~occupied,step):
+                if not flags[target]&2:
+                    yield COORDS[target]
+
+    def slide_captures(self, coord:BoardCoord, steps:list[tuple[int,int]], board, colour:int|str, hypo:bool=False) -> Generator[BoardCoord]:
+        '''Capture.orthogonals/diagonals for an unlimited slider on the whole board.'''
+        index=coord[1]*8+coord[0]
+        if not self.squares[index].belongs_to(board.turn) and not hypo:
+            return
+        occupied, flags=self.occupied, board.flags
+        targets=occupied if hypo else occupied&~self.friendly(colour)
+        for step in steps:
+            line=LINE_OF[step]
+            attacks=LINE_ATTACKS[line][index][occupied&LINE_MASKS[line][index]]&RAYS[step][index]
+            if not hypo:
+                attacks&=targets
+            for target in _nearest_first(attacks,step):
+                if not flags[target]&2:
+                    yield COORDS[target]
+
+    def attackers(self, index:int, colour:int, occupied:Bitboard|None=None, removed:Bitboard=0) -> Bitboard:
+        '''The colour's pieces attacking a square, as standard chess pieces. removed takes pieces off the board for the question, as when they have just been captured.'''
+        if occupied == None:
+            occupied=self.occupied
+        pieces=self.pieces[colour]
+        keep=~removed
+        result=KNIGHT_ATTACKS[index]&pieces[KNIGHT]
+        result|=KING_ATTACKS[index]&pieces[KING]
+        result|=PAWN_ATTACKS[1-colour][index]&pieces[PAWN]
+        result|=rook_attacks(index,occupied)&(pieces[ROOK]|pieces[QUEEN])
+        result|=bishop_attacks(index,occupied)&(pieces[BISHOP]|pieces[QUEEN])
+        return result&keep
+
+    def attacked(self, index:int, colour:int, occupied:Bitboard|None=None, removed:Bitboard=0) -> bool:
+        return self.attackers(index,colour,occupied,removed) != 0
+
+    def pseudo_moves(self, colour:int) -> list[tuple[int,int]]:
+        '''Every (from, to) square pair the colour could play, ignoring whether it leaves the king attacked. Follows this codebase's conventions: en passant targets the captured pawn's square, castling moves the king two squares, promotion is a plain move to the last row.'''
+        if self.foreign:
+            raise TypeError("The bitboard move generator only understands standard chess pieces.")
+        squares=self.squares
+        occupied=self.occupied
+        own=self.colours[colour]
+        enemy=self.colours[1-colour]
+        pieces=self.pieces[colour]
+        result=[]
+        step=PAWN_STEP[colour]
+        for index in to_indexes(pieces[PAWN]):
+            target=index+step
+            if 0 <= target < 64 and not occupied&(1<<target):
+                result.append((index,target))
+                if not squares[index].moved and 0 <= target+step < 64 and not occupied&(1<<(target+step)):
+                    result.append((index,target+step))
+            for target in to_indexes(PAWN_ATTACKS[colour][index]&enemy):
+                result.append((index,target))
+            for side in (-1,1):
+                if 0 <= index%8+side < 8 and enemy&(1<<(index+side)):
+                    target=squares[index+side]
+                    if target.role == "pawn" and target.en_passantable:
+                        result.append((index,index+side))
+        for index in to_indexes(pieces[KNIGHT]):
+            for target in to_indexes(KNIGHT_ATTACKS[index]&~own):
+                result.append((index,target))
+        for index in to_indexes(pieces[BISHOP]|pieces[QUEEN]):
+            for target in to_indexes(bishop_attacks(index,occupied)&~own):
+                result.append((index,target))
+        for index in to_indexes(pieces[ROOK]|pieces[QUEEN]):
+            for target in to_indexes(rook_attacks(index,occupied)&~own):
+                result.append((index,target))
+        for index in to_indexes(pieces[KING]):
+            for target in to_indexes(KING_ATTACKS[index]&~own):
+                result.append((index,target))
+            result.extend(self.castling(index,colour))
+        return result
+
+    def castling(self, index:int, colour:int) -> list[tuple[int,int]]:
+        '''Castling as WhiteKing.moves allows it: the king and rook haven't moved, the squares between them are empty, and none of the king's path (plus b1/b8 on the long side) is attacked.'''
+        king=self.squares[index]
+        if king.has_moved:
+            return []
+        result=[]
+        x=index%8
+        for side, rook_x in ((1,x+3),(-1,x-4)):
+            if not 0 <= rook_x < 8:
+                continue
+            rook=self.squares[index-x+rook_x]
+            if rook == None or rook.role != "rook" or rook.colour != colour or rook.has_moved:
+                continue
+            between=range(index+side,index-x+rook_x,side)
+            if any(self.occupied&(1<<square) for square in between):
+                continue
+            if any(self.attacked(square,1-colour) for square in range(index,index-x+rook_x,side)):
+                continue
+            result.append((index,index+2*side))
+        return result
+
+    def check_info(self, colour:int) -> tuple[Bitboard,Bitboard,dict[int,Bitboard]]:
+        '''What the colour's king needs answered, in one pass over the lines through it: the enemy pieces giving check, the squares a non-king move has to land on (every square out of check, the checker and the squares between it and the king in single check, none in double check), and the pinned pieces, each with the squares of its pin line up to and including the pinner.'''
+        kings=self.pieces[colour][KING]
+        if not kings:
+            return 0, FULL, {}
+        king=kings.bit_length()-1
+        pieces=self.pieces[1-colour]
+        occupied=self.occupied
+        own=self.colours[colour]
+        checkers=(KNIGHT_ATTACKS[king]&pieces[KNIGHT])|(PAWN_ATTACKS[colour][king]&pieces[PAWN])
+        block=checkers
+        pins={}
+        straight=pieces[ROOK]|pieces[QUEEN]
+        diagonal=pieces[BISHOP]|pieces[QUEEN]
+        for number, step in enumerate(DIRECTIONS):
+            ray=RAYS[step][king]
+            sliders=ray&(straight if number < 4 else diagonal)
+            if not sliders:
+                continue
+            blockers=_nearest_first(ray&occupied,step)
+            first=next(blockers)
+            if sliders&(1<<first):
+                checkers|=1<<first
+                block|=ray&~RAYS[step][first]
+            elif own&(1<<first):
+                second=next(blockers,None)
+                if second != None and sliders&(1<<second):
+                    pins[first]=ray&~RAYS[step][second]
+        if not checkers:
+            block=FULL
+        elif checkers&(checkers-1):
+            block=0
+        return checkers, block, pins
+
+    def legal_moves(self, colour:int) -> list[tuple[int,int]]:
+        '''pseudo_moves() without the ones that leave the colour's king attacked. If the colour has no king, every pseudo move is legal.
+        Built on check_info(): king moves are checked against the enemy's attacks with the king lifted off the board, other moves only have to answer the check and stay on their pin line. En passant takes two pieces off one line, so it is still made on the bitboards and tested.'''
+        kings=self.pieces[colour][KING]
+        pseudo=self.pseudo_moves(colour)
+        if not kings:
+            return pseudo
+        king=kings.bit_length()-1
+        checkers, block, pins=self.check_info(colour)
+        enemy=1-colour
+        squares=self.squares
+        occupied=self.occupied
+        lifted=occupied&~(1<<king)
+        result=[]
+        for start, end in pseudo:
+            end_bit=1<<end
+            if start == king:
+                if not self.attacked(end,enemy,lifted,end_bit):
+                    result.append((start,end))
+            elif start//8 == end//8 and squares[start].role == "pawn": #en passant: the pawn lands behind the pawn it captures
+                new_occupied=(occupied&~(1<<start)&~end_bit)|(1<<(end+PAWN_STEP[colour]))
+                if not self.attacked(king,enemy,new_occupied,end_bit):
+                    result.append((start,end))
+            elif block&end_bit and (start not in pins or pins[start]&end_bit):
+                result.append((start,end))
+        return result
+
+    def legal_coords(self, colour:int) -> list[tuple[BoardCoord,BoardCoord]]:
+        '''legal_moves() translated into board coordinates.'''
+        return [(COORDS[start],COORDS[end]) for start, end in self.legal_moves(colour)]
+
+print('Module "bitboard" (8x8 bitboards) loaded.')
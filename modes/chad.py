@@ -1,4 +1,4 @@
-import modes.basic as b
+import modes.rules as r
 import modes.standard as s
 from modes.wotk import no_win
 from itertools import chain
@@ -20,14 +20,16 @@ Note: Kings are not subject to this rule, instead capturing as they move.
 '''
 
 class WhiteChadRook(s.Piece):
+    capture_pattern=s.ORTHOGONAL_LINES #capture_squares(game,True) ignores the castles
+
     def __init__(self):
-        b.Piece.__init__(self,"Rook",1,0,b.join(b.PCS_IMG_DIR,"rook_w.png"))
+        r.Piece.__init__(self,"Rook",1,0,r.join(r.PCS_IMG_DIR,"rook_w.png"))
 
     def moves(self, game):
-        return b.Movement.orthogonals((0,11,0,11),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game)
+        return r.Movement.orthogonals((0,11,0,11),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game)
     
     def capture_squares(self, game, hypo = False):
-        raw=b.Capture.orthogonals((0,11,0,11),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game,self.colour,hypo)
+        raw=r.Capture.orthogonals((0,11,0,11),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game,self.colour,hypo)
         if hypo:
             for a in raw:
                 yield a
@@ -42,30 +44,33 @@ class WhiteChadRook(s.Piece):
                     yield tile
 
     def move_to(self, final, game):
-        b.Piece.move_to(self, final, game)
+        r.Piece.move_to(self, final, game)
         if final.boardpos in castle[(self.colour+1)%2]:
             if self.colour == 0:
                 final.set_piece(WhiteChadQueen())
             else:
                 final.set_piece(BlackChadQueen())
 
-class BlackChadRook(b.Piece):
+class BlackChadRook(r.Piece):
+    capture_pattern=s.ORTHOGONAL_LINES
+
     def __init__(self):
-        b.Piece.__init__(self,"Rook",1,1,b.join(b.PCS_IMG_DIR,"rook_b.png"))
+        r.Piece.__init__(self,"Rook",1,1,r.join(r.PCS_IMG_DIR,"rook_b.png"))
         self.moves=partial(WhiteChadRook.moves,self)
         self.capture_squares=partial(WhiteChadRook.capture_squares,self)
         self.move_to=partial(WhiteChadRook.move_to,self)
 
 class WhiteChadQueen(s.Piece):
+    capture_pattern=s.ORTHOGONAL_LINES+s.DIAGONAL_LINES
+
     def __init__(self):
-        b.Piece.__init__(self,"Queen",2,0,b.join(b.PCS_IMG_DIR,"chad_w.png"))
-        self.image=b.transform.scale(self.image,(66,66))
+        r.Piece.__init__(self,"Queen",2,0,r.join(r.PCS_IMG_DIR,"chad_w.png"),img_size=(66,66))
 
     def moves(self, game):
-        return chain(b.Movement.orthogonals((0,11,0,11),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game),b.Movement.diagonals((0,11,0,11),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game))
+        return chain(r.Movement.orthogonals((0,11,0,11),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game),r.Movement.diagonals((0,11,0,11),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game))
     
     def capture_squares(self, game, hypo = False):
-        raw=chain(b.Capture.orthogonals((0,11,0,11),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game,self.colour,hypo),b.Capture.diagonals((0,11,0,11),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game,self.colour,hypo))
+        raw=chain(r.Capture.orthogonals((0,11,0,11),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game,self.colour,hypo),r.Capture.diagonals((0,11,0,11),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game,self.colour,hypo))
         if hypo:
             for a in raw:
                 yield a
@@ -79,46 +84,44 @@ class WhiteChadQueen(s.Piece):
                 if tile in walls[self.colour]:
                     yield tile
 
-class BlackChadQueen(b.Piece):
+class BlackChadQueen(r.Piece):
+    capture_pattern=s.ORTHOGONAL_LINES+s.DIAGONAL_LINES
+
     def __init__(self):
-        b.Piece.__init__(self,"Queen",2,1,b.join(b.PCS_IMG_DIR,"chad_b.png"))
-        self.image=b.transform.scale(self.image,(66,66))
+        r.Piece.__init__(self,"Queen",2,1,r.join(r.PCS_IMG_DIR,"chad_b.png"),img_size=(66,66))
         self.moves=partial(WhiteChadQueen.moves,self)
         self.capture_squares=partial(WhiteChadQueen.capture_squares,self)
 
 class WhiteChadKing(s.Piece):
     def __init__(self):
-        b.Piece.__init__(self,"King",s.inf,0,b.join(s.PCS_IMG_DIR,"king_w.png"),True)
+        r.Piece.__init__(self,"King",s.inf,0,r.join(s.PCS_IMG_DIR,"king_w.png"),True)
 
     def moves(self, game):
-        raw=chain(b.Movement.orthogonals((0,11,0,11),(1,1,1,1),self.parent.boardpos,game),b.Movement.diagonals((0,11,0,11),(1,1,1,1),self.parent.boardpos,game),b.Movement.l_shape((0,11,0,11),1,self.parent.boardpos,game,2,1))
-        enemy_captures=[]
-        for tile in game.board.get_matching(lambda t: True if isinstance(t.piece,b.Piece) and not t.piece.belongs_to(self.colour) else False):
-            enemy_captures.extend(tile.piece.capture_squares(game,True))
+        raw=chain(r.Movement.orthogonals((0,11,0,11),(1,1,1,1),self.parent.boardpos,game),r.Movement.diagonals((0,11,0,11),(1,1,1,1),self.parent.boardpos,game),r.Movement.l_shape((0,11,0,11),1,self.parent.boardpos,game,2,1))
+        raw=[tile for tile in raw if tile in castle[self.colour]]
+        enemy_captures=r.Rules.attacked_among(game,raw,1-self.colour)
         for tile in raw:
-            if tile not in enemy_captures and tile in castle[self.colour]:
+            if tile not in enemy_captures:
                 yield tile
 
     def capture_squares(self, game, hypo=False):
-        raw=chain(b.Capture.orthogonals((0,11,0,11),(1,1,1,1),self.parent.boardpos,game,self.colour,hypo),b.Capture.diagonals((0,11,0,11),(1,1,1,1),self.parent.boardpos,game,self.colour,hypo),b.Capture.l_shape((0,11,0,11),1,self.parent.boardpos,game,2,1,self.colour,hypo))
-        enemy_captures=[]
-        for tile in game.board.get_matching(lambda t: True if isinstance(t.piece,b.Piece) and not t.piece.belongs_to(self.colour) and not t.piece.name == "King" else False):
-            enemy_captures.extend(tile.piece.capture_squares(game,True))
+        raw=chain(r.Capture.orthogonals((0,11,0,11),(1,1,1,1),self.parent.boardpos,game,self.colour,hypo),r.Capture.diagonals((0,11,0,11),(1,1,1,1),self.parent.boardpos,game,self.colour,hypo),r.Capture.l_shape((0,11,0,11),1,self.parent.boardpos,game,2,1,self.colour,hypo))
+        raw=[tile for tile in raw if tile in castle[self.colour]]
+        enemy_captures=r.Rules.attacked_among(game,raw,1-self.colour,royals=False)
         for tile in raw:
-            if tile not in enemy_captures and tile in castle[self.colour]:
+            if tile not in enemy_captures:
                 yield tile
 
-class BlackChadKing(b.Piece):
+class BlackChadKing(r.Piece):
     def __init__(self):
-        b.Piece.__init__(self,"King",s.inf,1,b.join(b.PCS_IMG_DIR,"king_b.png"),True)
+        r.Piece.__init__(self,"King",s.inf,1,r.join(r.PCS_IMG_DIR,"king_b.png"),True)
         self.moves=partial(WhiteChadKing.moves,self)
         self.capture_squares=partial(WhiteChadKing.capture_squares,self)
 
-pcsdict={"r":BlackChadRook,"R":WhiteChadRook,"q":BlackChadQueen,"Q":BlackChadQueen,"k":BlackChadKing,"K":WhiteChadKing}
-board=b.Board(12,12,["93"]*12,(66,66),["93","93","7rrr2","7rkr2","7rrr2","93","93","2RRR7","2RKR7","2RRR7","93","93"],pcsdict,b.denest(walls,1),True)
+pcsdict={"r":BlackChadRook,"R":WhiteChadRook,"q":BlackChadQueen,"Q":WhiteChadQueen,"k":BlackChadKing,"K":WhiteChadKing}
+board=r.Board(12,12,["93"]*12,(66,66),["93","93","7rrr2","7rkr2","7rrr2","93","93","2RRR7","2RKR7","2RRR7","93","93"],pcsdict,r.denest(walls,1),True)
 
 piece_infos=[]
-info=b.Info("Chad","It is said that only True Chads stand even a chance at winning this game.","WIP",b.join(b.PCS_IMG_DIR,"chad_b.png"),b.CREAM_TILE,"mode",[s.king_info,s.rook_info,s.queen_info],"chad")
-info.construct()
+info=r.Info("Chad","It is said that only True Chads stand even a chance at winning this game.","WIP",r.join(r.PCS_IMG_DIR,"chad_b.png"),r.CREAM_SQUARE,"mode",[s.king_info,s.rook_info,s.queen_info],"chad")
 
 #win=no_win
\ No newline at end of file
@@ -1,8 +1,8 @@
-import modes.basic as b
+import modes.rules as r
 import modes.standard as s
 from modes.wotk import no_win
 
-def after_capture(game:b.Game, final_tile:b.Tile, captured:b.Piece):
+def after_capture(game:r.Game, final_tile:r.Tile, captured:r.Piece):
     if isinstance(captured,s.WhitePawn):
         check_pos=(final_tile.boardpos[0],6)
     elif isinstance(captured,s.BlackPawn):
@@ -42,16 +42,15 @@ def after_capture(game:b.Game, final_tile:b.Tile, captured:b.Piece):
     elif isinstance(captured,s.BlackQueen):
         check_pos=(3,0)
     check_square=game.board.get(check_pos)
-    if not isinstance(check_square.piece,b.Piece):
+    if not isinstance(check_square.piece,r.Piece):
         check_square.set_piece(captured)
 
 hidden=False
-board=b.Board(8,8,["8","8","8","8","8","8","8","8"],piecesdict=s.STD_PCS_DICT,initpos=s.STD_INIT_POS)
+board=r.Board(8,8,["8","8","8","8","8","8","8","8"],piecesdict=s.STD_PCS_DICT,initpos=s.STD_INIT_POS)
 local_play=True
 online_play=False
 
 piece_infos=[]
-info=b.Info("Circe Chess","The path to the underworld is not a one-way street.","WIP",b.join(b.PCS_IMG_DIR,"bishop_b.png"),b.CREAM_TILE,"mode",[s.pawn_info,s.bishop_info,s.knight_info,s.rook_info,s.queen_info,s.king_info],"circe")
-info.construct()
+info=r.Info("Circe Chess","The path to the underworld is not a one-way street.","WIP",r.join(r.PCS_IMG_DIR,"bishop_b.png"),r.CREAM_SQUARE,"mode",[s.pawn_info,s.bishop_info,s.knight_info,s.rook_info,s.queen_info,s.king_info],"circe")
 
 win=no_win
\ No newline at end of file
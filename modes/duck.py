@@ -1,11 +1,12 @@
-from modes.basic import *
+from modes.rules import *
 import modes.standard as s
-from pygame import *
 
 pcs_dict=copy.copy(s.STD_PCS_DICT)
 init_pos=copy.copy(s.STD_INIT_POS)
 
 class Duck(Piece):
+    capture_pattern=[] #captures nothing
+
     def __init__(self):
         super().__init__("Duck",0,"all",join(PCS_IMG_DIR,"duck.png"))
 
@@ -22,7 +23,7 @@ class Duck(Piece):
         game.board.submove=2
         return super().move_to(final, game)
 
-duck_info=Info("Duck","Just a little yellow guy.","The gimmick of the chess variant 'Duck Chess'. Can go anywhere and is controlled by either player. Cannot capture or be captured.",join(PCS_IMG_DIR,"duck.png"),CREAM_TILE,"piece",None)
+duck_info=Info("Duck","Just a little yellow guy.","The gimmick of the chess variant 'Duck Chess'. Can go anywhere and is controlled by either player. Cannot capture or be captured.",join(PCS_IMG_DIR,"duck.png"),CREAM_SQUARE,"piece",None)
 
 pcs_dict["d"]=Duck
 init_pos[3]="d7"
@@ -59,10 +60,8 @@ def move_filter(captures, game):
 
 piece_infos=[duck_info]
 lore="In a strange twist of fate, an invincible duck has wandered onto the battlefield?!"
-info=Info("Duck Chess","Quack quack.",lore,join(PCS_IMG_DIR,"duck.png"),GREEN_TILE,"mode",[s.pawn_info,s.bishop_info,s.knight_info,s.rook_info,s.queen_info,s.king_info,duck_info],internal_name="duck")
-info.construct()
+info=Info("Duck Chess","Quack quack.",lore,join(PCS_IMG_DIR,"duck.png"),GREEN_SQUARE,"mode",[s.pawn_info,s.bishop_info,s.knight_info,s.rook_info,s.queen_info,s.king_info,duck_info],internal_name="duck")
 duck_info.set_links([info])
-duck_info.construct()
 
 local_play=True
 online_play=False
\ No newline at end of file
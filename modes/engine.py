@@ -0,0 +1,420 @@
+'''A computer opponent for standard chess, and for modes that play exactly like it with standard pieces.
+Iterative-deepening alpha-beta (negamax) with a fixed-size transposition table keyed by Board.hash, move ordering (the table's move, then MVV-LVA captures, killers and history) and a quiescence search over captures. Moves come from Bitboards.legal_moves() and are played with Board.make_move()/unmake_move() on a HeadlessGame copy of the position, so the game being played is never touched. Like rules, never imports pygame.'''
+from __future__ import annotations
+from collections.abc import Callable
+from math import inf
+from multiprocessing import Pool
+import time
+import os
+from modes.rules import HeadlessGame, BoardCoord
+from modes.bitboard import ROLES, KING, COORDS, to_indexes
+from modes.position import encode, load
+
+type Move=tuple[BoardCoord,BoardCoord,int|None] #start, end and the promotion choice (an index into the OptionsBar), as Board.make_move() takes it
+type IndexMove=tuple[int,int,int|None] #the same with square numbers, as the search keeps them
+type Packed=bytes #see pack()
+
+MATE:int=100000 #score for being mated on the spot. Mates further off score closer to 0
+MATE_BOUND:int=MATE-1000 #scores beyond this are mates
+DEFAULT_THINK:float=2.0 #seconds per move when the game has no clock
+RULE_HOOKS:list[str]=["win","lock","after_capture","move_filter","capture_filter","game_start"] #mode functions that change the rules behind the bitboards' back
+PROMOTIONS:int=4 #queen, rook, bishop, knight, in the order WhitePawn.get_options() offers them
+EXACT, LOWER, UPPER=range(3) #what a transposition table score is: the score itself, or a bound on it from a cutoff
+ROLE_INDEX:dict[str,int]={role:number for number, role in enumerate(ROLES)}
+ORDER_VALUES:list[int]=[1,3,3,5,9,20] #by role, for MVV-LVA. The king is only ever the attacker
+
+#piece-square tables in centipawns, by role, as White sees the board (square 0 is a8). Black reads them upside down
+TABLES:list[list[int]]=[
+    [0,0,0,0,0,0,0,0, 50,50,50,50,50,50,50,50, 10,10,20,30,30,20,10,10, 5,5,10,25,25,10,5,5, 0,0,0,20,20,0,0,0, 5,-5,-10,0,0,-10,-5,5, 5,10,10,-20,-20,10,10,5, 0,0,0,0,0,0,0,0],
+    [-50,-40,-30,-30,-30,-30,-40,-50, -40,-20,0,0,0,0,-20,-40, -30,0,10,15,15,10,0,-30, -30,5,15,20,20,15,5,-30, -30,0,15,20,20,15,0,-30, -30,5,10,15,15,10,5,-30, -40,-20,0,5,5,0,-20,-40, -50,-40,-30,-30,-30,-30,-40,-50],
+    [-20,-10,-10,-10,-10,-10,-10,-20, -10,0,0,0,0,0,0,-10, -10,0,5,10,10,5,0,-10, -10,5,5,10,10,5,5,-10, -10,0,10,10,10,10,0,-10, -10,10,10,10,10,10,10,-10, -10,5,0,0,0,0,5,-10, -20,-10,-10,-10,-10,-10,-10,-20],
+    [0,0,0,0,0,0,0,0, 5,10,10,10,10,10,10,5, -5,0,0,0,0,0,0,-5, -5,0,0,0,0,0,0,-5, -5,0,0,0,0,0,0,-5, -5,0,0,0,0,0,0,-5, -5,0,0,0,0,0,0,-5, 0,0,0,5,5,0,0,0],
+    [-20,-10,-10,-5,-5,-10,-10,-20, -10,0,0,0,0,0,0,-10, -10,0,5,5,5,5,0,-10, -5,0,5,5,5,5,0,-5, 0,0,5,5,5,5,0,-5, -10,5,5,5,5,5,0,-10, -10,0,5,0,0,0,0,-10, -20,-10,-10,-5,-5,-10,-10,-20],
+    [-30,-40,-40,-50,-50,-40,-40,-30, -30,-40,-40,-50,-50,-40,-40,-30, -30,-40,-40,-50,-50,-40,-40,-30, -30,-40,-40,-50,-50,-40,-40,-30, -20,-30,-30,-40,-40,-30,-30,-20, -10,-20,-20,-20,-20,-20,-20,-10, 20,20,0,0,0,0,20,20, 20,30,10,0,0,10,30,20]]
+
+def supports(mode) -> bool:
+    '''Whether the engine can play a mode: an 8x8 board of pieces that all have a Piece.role, and none of the mode functions that change the rules. A mode's own after_move() is only allowed if it is the standard one.'''
+    board=mode.board
+    if board.width != 8 or board.height != 8 or board.piecesdict == None:
+        return False
+    if any(getattr(kind,"role",None) == None for kind in board.piecesdict.values()):
+        return False
+    if any(hasattr(mode,hook) for hook in RULE_HOOKS):
+        return False
+    return getattr(getattr(mode,"after_move",None),"__module__","modes.standard") == "modes.standard"
+
+def position(game) -> HeadlessGame:
+    '''A HeadlessGame in the same position as game (the UI's, say), for the engine to search. The UI's board can't be searched directly: its progress_turn() switches the Timers.'''
+    result=HeadlessGame(game.mode)
+    layout=game.board.get_layout()
+    layout["pointless"]=game.board.pointless
+    result.restore(layout)
+    return result
+
+def pack(game) -> Packed:
+    '''The position as modes.position.encode() bytes, which pickle small, for sending to worker processes. unpack() makes a HeadlessGame of it again.'''
+    return encode(game)
+
+def unpack(packed:Packed) -> HeadlessGame:
+    return load(packed)
+
+def think_time(timer) -> float:
+    '''How many seconds to spend on a move, given the mover's basic.Timer: a thirtieth of the time left plus most of the increment, but never more than half of what's left, with most of the delay on top since the clock doesn't run during it. DEFAULT_THINK if the game has no clock.'''
+    if not timer.activatable or timer.internal_time <= 0:
+        return DEFAULT_THINK
+    return min(timer.internal_time/30+timer.increment*0.8,timer.internal_time/2)+timer.delay*0.9
+
+class SearchTimeout(Exception):
+    '''Raised from deep inside a search when its time is up. Engine.search() catches it and keeps what it found before.'''
+
+class TranspositionTable():
+    '''Search results by position. The number of slots is fixed when it is made, so memory stays capped however long the engine runs. A position goes in slot hash&mask, one entry per slot.
+    Replacement: a new entry always replaces one left over from an earlier search or for the same position, and otherwise only one searched less deeply.'''
+    SLOT_BYTES:int=200 #what a filled slot costs, roughly: the entry tuple, the ints in it and the list's pointer
+
+    def __init__(self, megabytes:float=16):
+        slots=1
+        while slots*2*self.SLOT_BYTES <= megabytes*2**20:
+            slots*=2
+        self.mask=slots-1
+        self.slots:list[tuple[int,int,int,int,IndexMove|None,int]|None]=[None]*slots #key, depth, score, bound, best move, generation
+        self.generation=0
+
+    def new_search(self):
+        '''Mark what is in the table as left over, so it gives way to anything the next search finds.'''
+        self.generation+=1
+
+    def get(self, key:int) -> tuple[int,int,int,int,IndexMove|None,int]|None:
+        entry=self.slots[key&self.mask]
+        if entry != None and entry[0] == key:
+            return entry
+        return None
+
+    def put(self, key:int, depth:int, score:int, bound:int, move:IndexMove|None):
+        index=key&self.mask
+        old=self.slots[index]
+        if old == None or old[5] != self.generation or old[0] == key or depth >= old[1]:
+            self.slots[index]=(key,depth,score,bound,move,self.generation)
+
+class Engine():
+    '''Finds moves for HeadlessGames. Keep one for a whole game, so the transposition table carries over from move to move.'''
+    def __init__(self, megabytes:float=16, max_depth:int=32):
+        self.table=TranspositionTable(megabytes)
+        self.max_depth=max_depth
+        self.nodes=0 #positions visited by the last search(), quiescence included
+        self.depth=0 #the deepest iteration the last search() finished
+        self.score=0 #what that iteration thought of the position, in centipawns for the side to move
+        self.deadline:float=inf
+        self.killers:list[list[IndexMove|None]]=[]
+        self.history:dict[tuple[int,int],int]={}
+        self.seen:list[int]=[] #Board.hash of the positions leading to the one being searched, for repetitions
+        self.root_move:IndexMove|None=None
+        self.stop:Callable[[],bool]|None=None #asked now and then during a search; returning True ends it as if time had run out
+
+    def search(self, game:HeadlessGame, seconds:float|None=None, depth:int|None=None, history:list[int]=[]) -> Move|None:
+        '''The best move for the side to move, found by searching one ply deeper at a time until seconds are up or depth is reached. history holds the Board.hash of earlier positions in the game, which count as draws if the search gets back to them. None if there are no legal moves.'''
+        board=game.board
+        started=time.perf_counter()
+        depth=self.prepare(game,seconds,depth,history)
+        self.table.new_search()
+        moves=self.moves(board)
+        if moves == []:
+            return None
+        best=self.order(board,moves,0,None)[0]
+        for current in range(1,depth+1):
+            self.root_move=None
+            try:
+                score=self.alphabeta(game,current,-inf,inf,0)
+            except SearchTimeout:
+                if self.root_move != None: #the previous best is searched first, so anything that beat it is better
+                    best=self.root_move
+                break
+            best=self.root_move
+            self.depth, self.score=current, score
+            if abs(score) > MATE_BOUND or (seconds != None and time.perf_counter()-started > seconds/2):
+                break #another iteration would take longer than the time left
+        return self.to_move(best)
+
+    def prepare(self, game:HeadlessGame, seconds:float|None, depth:int|None, history:list[int]) -> int:
+        '''Reset the counters and tables that belong to one search, and return the depth it may go to.'''
+        if game.board.attack_maps() == None:
+            raise TypeError("The engine only plays 8x8 boards of standard chess pieces.")
+        self.deadline=time.perf_counter()+seconds if seconds != None else inf
+        depth=min(depth or self.max_depth,self.max_depth)
+        self.nodes=0
+        self.depth=0
+        self.killers=[[None,None] for ply in range(depth+64)]
+        self.history={}
+        self.seen=list(history)
+        return depth
+
+    def tick(self):
+        self.nodes+=1
+        if self.nodes&255 == 0 and (time.perf_counter() > self.deadline or (self.stop != None and self.stop())):
+            raise SearchTimeout
+
+    @staticmethod
+    def to_move(move:IndexMove) -> Move:
+        return COORDS[move[0]], COORDS[move[1]], move[2]
+
+    @staticmethod
+    def moves(board) -> list[IndexMove]:
+        '''Every legal move, with one move per promotion choice.'''
+        result=[]
+        squares=board.squares
+        for start, end in board.bitboards.legal_moves(board.turn):
+            if squares[start].role == "pawn" and end//8 in (0,7) and start//8 != end//8:
+                result.extend((start,end,option) for option in range(PROMOTIONS))
+            else:
+                result.append((start,end,None))
+        return result
+
+    @staticmethod
+    def in_check(board) -> bool:
+        maps=board.bitboards
+        kings=maps.pieces[board.turn][KING]
+        return kings != 0 and maps.attacked(kings.bit_length()-1,1-board.turn)
+
+    def order(self, board, moves:list[IndexMove], ply:int, first:IndexMove|None) -> list[IndexMove]:
+        '''Sort moves best-looking first: the transposition table's move, captures by MVV-LVA, queen promotions, killers, then quiet moves by history. Underpromotions go last.'''
+        squares=board.squares
+        killers=self.killers[ply]
+        history=self.history
+        def score(move:IndexMove) -> int:
+            if move == first:
+                return 1<<30
+            start, end, option=move
+            victim=squares[end]
+            if victim != None:
+                return 100000+ORDER_VALUES[ROLE_INDEX[victim.role]]*10-ORDER_VALUES[ROLE_INDEX[squares[start].role]]
+            if option != None:
+                return 90000 if option == 0 else -1
+            if move in killers:
+                return 80000
+            return min(history.get((start,end),0),79999)
+        moves.sort(key=score,reverse=True)
+        return moves
+
+    def evaluate(self, board) -> int:
+        '''Material (Piece.value, in centipawns) plus the piece-square tables, for the side to move.'''
+        maps=board.bitboards
+        squares=board.squares
+        score=0
+        for colour, sign, flip in ((0,1,0),(1,-1,56)):
+            for role, table in enumerate(TABLES):
+                for index in to_indexes(maps.pieces[colour][role]):
+                    score+=sign*table[index^flip]
+                    if role != KING:
+                        score+=sign*100*squares[index].value
+        return score if board.turn == 0 else -score
+
+    def alphabeta(self, game:HeadlessGame, depth:int, alpha:float, beta:float, ply:int) -> int:
+        board=game.board
+        self.tick()
+        key=board.hash
+        if ply > 0 and (board.pointless > 75 or key in self.seen): #Rules.win's draw, or a repetition
+            return 0
+        if depth <= 0:
+            return self.quiesce(game,alpha,beta,ply)
+        entry=self.table.get(key)
+        first=None
+        if entry != None:
+            first=entry[4]
+            if entry[1] >= depth and ply > 0:
+                score=entry[2]
+                if score > MATE_BOUND:
+                    score-=ply
+                elif score < -MATE_BOUND:
+                    score+=ply
+                if entry[3] == EXACT or (entry[3] == LOWER and score >= beta) or (entry[3] == UPPER and score <= alpha):
+                    return score
+        moves=self.moves(board)
+        if moves == []:
+            return -MATE+ply if self.in_check(board) else 0
+        original=alpha
+        best=-inf
+        best_move=None
+        self.seen.append(key)
+        try:
+            for move in self.order(board,moves,ply,first):
+                record=board.make_move(self.to_move(move),game,False)
+                try:
+                    score=-self.alphabeta(game,depth-1,-beta,-alpha,ply+1)
+                finally:
+                    board.unmake_move(record)
+                if score > best:
+                    best, best_move=score, move
+                    if ply == 0:
+                        self.root_move=move
+                if score > alpha:
+                    alpha=score
+                if alpha >= beta:
+                    if board.squares[move[1]] == None and move[2] == None: #a quiet move: remember it for its siblings
+                        killers=self.killers[ply]
+                        if move != killers[0]:
+                            killers[1]=killers[0]
+                            killers[0]=move
+                        self.history[move[:2]]=self.history.get(move[:2],0)+depth*depth
+                    break
+        finally:
+            self.seen.pop()
+        stored=best
+        if best > MATE_BOUND:
+            stored+=ply
+        elif best < -MATE_BOUND:
+            stored-=ply
+        self.table.put(key,depth,stored,UPPER if best <= original else LOWER if best >= beta else EXACT,best_move)
+        return best
+
+    def quiesce(self, game:HeadlessGame, alpha:float, beta:float, ply:int) -> int:
+        '''Search captures (and queen promotions) until the position is quiet, so the search doesn't stop in the middle of an exchange. In check, every move is searched, since standing still isn't an option.'''
+        board=game.board
+        self.tick()
+        moves=self.moves(board)
+        checked=self.in_check(board)
+        if moves == []:
+            return -MATE+ply if checked else 0
+        if ply >= len(self.killers)-1:
+            return self.evaluate(board)
+        if checked:
+            best=-MATE+ply
+        else:
+            best=self.evaluate(board)
+            if best >= beta:
+                return best
+            alpha=max(alpha,best)
+            squares=board.squares
+            moves=[move for move in moves if squares[move[1]] != None or move[2] == 0]
+        for move in self.order(board,moves,ply,None):
+            record=board.make_move(self.to_move(move),game,False)
+            try:
+                score=-self.quiesce(game,-beta,-alpha,ply+1)
+            finally:
+                board.unmake_move(record)
+            if score > best:
+                best=score
+                if score > alpha:
+                    alpha=score
+                    if alpha >= beta:
+                        break
+        return best
+
+worker_engine:Engine|None=None #each pool process's own Engine, and the position it last unpacked
+worker_game:tuple[Packed,HeadlessGame]|None=None
+
+def start_worker(megabytes:float):
+    global worker_engine
+    worker_engine=Engine(megabytes)
+
+def search_root_move(task:tuple[Packed,IndexMove,int,float,float,float|None]) -> tuple[IndexMove,int|None,int,int,float]:
+    '''Run in a pool process by ParallelEngine: play one root move and search the reply to depth-1 within (alpha, beta). Returns the move, its score (None if time ran out), the process id, and the nodes and seconds it took.'''
+    global worker_game
+    packed, move, depth, alpha, beta, seconds=task
+    if worker_game == None or worker_game[0] != packed:
+        worker_game=(packed,unpack(packed))
+        worker_engine.table.new_search()
+    game=worker_game[1]
+    board=game.board
+    engine=worker_engine
+    started=time.perf_counter()
+    engine.prepare(game,seconds,depth,[board.hash])
+    record=board.make_move(Engine.to_move(move),game,False)
+    try:
+        score=-engine.alphabeta(game,depth-1,-beta,-alpha,1)
+    except SearchTimeout:
+        score=None
+    finally:
+        board.unmake_move(record)
+    return move, score, os.getpid(), engine.nodes, time.perf_counter()-started
+
+class ParallelEngine():
+    '''Engine.search() spread over a multiprocessing pool by splitting the root. Each iteration searches the best move so far with a full window first, then hands the other root moves out with a null window around its score; one that does better is searched again with a full window. Every process has its own Engine and transposition table.
+    Use it in a with block, or call close(), to shut the processes down.'''
+    def __init__(self, workers:int|None=None, megabytes:float=16, max_depth:int=32):
+        self.workers=workers or os.cpu_count()
+        self.max_depth=max_depth
+        self.pool=Pool(self.workers,start_worker,(megabytes,))
+        self.depth=0
+        self.score=0
+        self.nodes=0
+        self.worker_stats:dict[int,list[float]]={} #process id to nodes and seconds spent searching, over the last search()
+
+    def __enter__(self) -> ParallelEngine:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def worker_rates(self) -> dict[int,float]:
+        '''Nodes per second for each process, over the last search().'''
+        return {pid:nodes/seconds for pid, (nodes, seconds) in self.worker_stats.items() if seconds > 0}
+
+    def run(self, tasks:list[tuple]) -> list[tuple[IndexMove,int|None]]:
+        results=[]
+        for move, score, pid, nodes, seconds in self.pool.imap_unordered(search_root_move,tasks):
+            stats=self.worker_stats.setdefault(pid,[0,0.0])
+            stats[0]+=nodes
+            stats[1]+=seconds
+            self.nodes+=nodes
+            results.append((move,score))
+        return results
+
+    def search(self, game:HeadlessGame, seconds:float|None=None, depth:int|None=None) -> Move|None:
+        '''As Engine.search(), without the history of earlier positions.'''
+        started=time.perf_counter()
+        local=Engine(1)
+        depth=local.prepare(game,seconds,depth,[])
+        packed=pack(game)
+        moves=local.order(game.board,local.moves(game.board),0,None)
+        self.depth, self.score, self.nodes, self.worker_stats=0, 0, 0, {}
+        if moves == []:
+            return None
+        best=moves[0]
+        left=lambda: None if seconds == None else max(seconds-(time.perf_counter()-started),0)
+        for current in range(1,depth+1):
+            (first, score),=self.run([(packed,moves[0],current,-inf,inf,left())])
+            if score == None:
+                break
+            scores={first:score}
+            timed_out=False
+            for move, result in self.run([(packed,move,current,score,score+1,left()) for move in moves[1:]]):
+                if result == None:
+                    timed_out=True
+                elif result > score:
+                    (move, result),=self.run([(packed,move,current,score,inf,left())])
+                    if result == None:
+                        timed_out=True
+                        scores[move]=score+1 #it beat the best move, by how much is not known
+                    else:
+                        score=result
+                        scores[move]=result
+                else:
+                    scores[move]=result
+            best=max(scores,key=scores.get)
+            if timed_out:
+                break
+            self.depth, self.score=current, scores[best]
+            moves.sort(key=lambda move: scores.get(move,-inf),reverse=True)
+            if abs(self.score) > MATE_BOUND or (seconds != None and time.perf_counter()-started > seconds/2):
+                break
+        return Engine.to_move(best)
+
+def scaling(game:HeadlessGame, depth:int, counts:list[int], megabytes:float=16) -> list[tuple[int,float,int,float,float]]:
+    '''Search game to a fixed depth with each number of workers in counts. For each: the workers, seconds taken, nodes, speedup over the first count, and efficiency (speedup per worker, relative to the first count).'''
+    result=[]
+    for count in counts:
+        with ParallelEngine(count,megabytes) as engine:
+            started=time.perf_counter()
+            engine.search(game,None,depth)
+            elapsed=time.perf_counter()-started
+        if result == []:
+            base=(count,elapsed)
+        speedup=base[1]/elapsed
+        result.append((count,elapsed,engine.nodes,speedup,speedup*base[0]/count))
+    return result
+
+print('Module "engine" (computer opponent) loaded.')
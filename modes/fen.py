@@ -0,0 +1,345 @@
+'''FEN and EPD for every mode. write() gives a game's position as FEN, read() and place() put one on a board, and read_epd() streams the positions of an EPD file (a test suite, say) through a single HeadlessGame, so loading tens of thousands of them builds no more boards, tiles or pieces than the first one needed. Like rules, never imports pygame.
+The six standard fields are read as usual, with the mode's piecesdict for the letters, digits of any length for runs of empty (or void) squares and a-z for files. Two things standard FEN takes for granted are worked out from the mode's starting layout (Board.initpos) instead: a piece with a moved or has_moved is taken to have moved if it isn't on a square where the starting layout has its letter. Castling rights go to every unmoved rook on an unmoved king's rank, named as in X-FEN: K or Q (k or q for black) for the outermost rook of that colour on each side of the king, and by file otherwise. The fullmove number is turn_number//2+1, so reading one back gives a turn_number whose parity matches the side to move.
+Anything else Board.hash covers goes in an optional seventh field, the variant field: |-separated items, each name=value for the mode's own board attributes (duck's submove, checkers' select_again...) and square.name=value for a piece's undo_state (WOTK's adventurer levels and alignments, a pawn back on its starting square that has moved, an unmoved king with no rook to castle with, a pawn that can still be taken en passant after duck's submove). Only values that differ from what the other fields imply are written, so standard positions have no variant field. Values are Python literals, or @square for a Tile; an item with no "=" means the attribute isn't there.'''
+from __future__ import annotations
+from ast import literal_eval
+from collections.abc import Generator, Iterable
+from functools import cache
+import copy
+import re
+from modes.rules import Board, Game, HeadlessGame, Piece, Tile, MISSING, numbers
+
+PRESENTATION:list[str]=["sprite","_image"] #how a piece looks, worked out again by its change_costume(), if it has one, instead of being written
+DEFAULTS:list[str]=["w","-","-","0","1",""] #fields a FEN can leave off the end, after the placement
+SQUARE=re.compile(r"([a-z])(\d+)")
+PLACEMENT=re.compile(r"\d+|.")
+TOKEN=re.compile(r'"[^"]*"|;|[^\s;"]+') #an EPD operand, opcode or the ; that ends an operation
+
+def square_name(board:Board, index:int) -> str:
+    return chr(97+index%board.width)+str(board.height-index//board.width)
+
+def square_index(board:Board, name:str) -> int:
+    match=SQUARE.fullmatch(name)
+    if match == None:
+        raise ValueError(f"Not a square: {name!r}")
+    index=board.index(ord(match[1])-97,board.height-int(match[2]))
+    if index == -1:
+        raise ValueError(f"{name} is off the board.")
+    return index
+
+@cache
+def start_letters(initpos:tuple[str,...], width:int, height:int) -> tuple[str|None,...]:
+    '''The letter on each square of a starting layout, in Board.initpos form (where each digit is that many empty squares), or None.'''
+    result=[]
+    for row in initpos:
+        for code in row:
+            if code in numbers:
+                result.extend([None]*int(code))
+            else:
+                result.append(code)
+    return tuple(result)+(None,)*(width*height-len(result))
+
+def castles(piece:Piece) -> bool:
+    '''Whether the piece's has_moved is a castling right: it is a king (royal) or a Rook.'''
+    return "has_moved" in piece.__dict__ and (piece.royal or piece.name == "Rook")
+
+@cache
+def implied_state(kind:type, at_start:bool) -> tuple:
+    '''The undo_state a piece of this type is read with before the castling, en passant and variant fields have their say: a new piece's, but having moved unless it is at_start (on a square where the starting layout has its letter), and with no castling rights.'''
+    piece=kind()
+    for name in ("moved","has_moved"):
+        if name in piece.__dict__:
+            setattr(piece,name,not at_start)
+    if castles(piece):
+        piece.has_moved=True
+    return piece.save_state()
+
+def castling_grants(board:Board, castling:str) -> list[Piece]:
+    '''The kings and rooks a castling field says haven't moved. Raises ValueError for a right with no king and rook to go with it.'''
+    if castling == "-":
+        return []
+    squares=board.squares
+    width=board.width
+    result=[]
+    for char in castling:
+        colour=0 if char.isupper() else 1
+        letter=char.lower()
+        for king in squares:
+            if king == None or king.colour != colour or not king.royal or not castles(king):
+                continue
+            x, y=king.parent.boardpos
+            rooks=[rook_x for rook_x in range(width) if (rook := squares[y*width+rook_x]) != None and castles(rook) and not rook.royal and rook.colour == colour]
+            if letter == "k":
+                rook_x=max((rook_x for rook_x in rooks if rook_x > x),default=None)
+            elif letter == "q":
+                rook_x=min((rook_x for rook_x in rooks if rook_x < x),default=None)
+            else:
+                rook_x=ord(letter)-97 if ord(letter)-97 in rooks else None
+            if rook_x != None:
+                result+=[king,squares[y*width+rook_x]]
+                break
+        else:
+            raise ValueError(f"Castling right {char} without a king and rook to castle with.")
+    return result
+
+def castling_rights(board:Board) -> str:
+    '''The castling field for the board: a right for each unmoved rook on an unmoved king's rank, white's first and each side's from the h-file down.'''
+    squares=board.squares
+    width=board.width
+    rights=["",""]
+    for king in squares:
+        if king == None or not king.royal or not castles(king) or king.has_moved or king.colour not in (0,1):
+            continue
+        x, y=king.parent.boardpos
+        rooks=[rook_x for rook_x in range(width) if (rook := squares[y*width+rook_x]) != None and castles(rook) and not rook.royal and rook.colour == king.colour]
+        for rook_x in reversed(rooks):
+            if squares[y*width+rook_x].has_moved:
+                continue
+            letter="K" if rook_x == max(rooks) and rook_x > x else "Q" if rook_x == min(rooks) and rook_x < x else chr(65+rook_x)
+            letter=letter if king.colour == 0 else letter.lower()
+            if letter not in rights[king.colour]:
+                rights[king.colour]+=letter
+    return "".join(rights) or "-"
+
+def passant_pawn(board:Board, index:int) -> Piece|None:
+    '''The pawn that passed over the square: the side that just moved's if it has one there, or else the other side's (duck's submove leaves the mover's flag standing into the next turn).'''
+    squares=board.squares
+    for colour in (1-board.turn,board.turn):
+        pawn_index=index-board.width if colour == 0 else index+board.width
+        pawn=squares[pawn_index] if 0 <= pawn_index < len(squares) else None
+        if pawn != None and pawn.colour == colour and "en_passantable" in pawn.__dict__:
+            return pawn
+    return None
+
+def defaults(mode) -> dict[str,object]:
+    '''The mode's own board attributes and the values a game starts with, which place() puts back when a position doesn't say otherwise.'''
+    board=mode.board
+    return {var:value for var, value in board.__dict__.items() if var not in board.__basevars__ and var != "__basevars__"}
+
+def value_text(board:Board, value:object) -> str:
+    if isinstance(value,Tile):
+        return "@"+square_name(board,value.index)
+    text=repr(value)
+    if not isinstance(value,(int,str,type(None))) or " " in text or "|" in text:
+        raise TypeError(f"{text} can't be written in a FEN.")
+    return text
+
+def read_value(board:Board, text:str) -> object:
+    if text.startswith("@"):
+        return board.tiles[square_index(board,text[1:])]
+    try:
+        return literal_eval(text)
+    except (ValueError, SyntaxError):
+        raise ValueError(f"Not a value: {text!r}")
+
+def hashed(value:object) -> bool:
+    '''Whether Board.hash looks at the value (False and None count as its absence).'''
+    return value is not False and isinstance(value,(int,str,Tile))
+
+def write(game:Game|HeadlessGame) -> str:
+    '''The position on game.board, as FEN.'''
+    board=game.board
+    width=board.width
+    squares=board.squares
+    letters=board.reversed
+    start=start_letters(tuple(board.initpos or ()),width,board.height)
+    rows=[]
+    for y in range(board.height):
+        row=""
+        empty=0
+        for piece in squares[y*width:(y+1)*width]:
+            if piece == None:
+                empty+=1
+                continue
+            if type(piece) not in letters:
+                raise TypeError(f"{type(piece).__name__} has no letter in the piecesdict, so it can't be written in a FEN.")
+            if empty:
+                row+=str(empty)
+                empty=0
+            row+=letters[type(piece)]
+        rows.append(row+(str(empty) if empty else ""))
+    castling=castling_rights(board)
+    granted=castling_grants(board,castling)
+    passant="-"
+    passed=None #the pawn the en passant field speaks for. Any others that can be taken en passant go in the variant field.
+    flagged=[index for index, piece in enumerate(squares) if piece != None and piece.__dict__.get("en_passantable")]
+    for index in sorted(flagged,key=lambda index: squares[index].colour != 1-board.turn):
+        behind=index+width if squares[index].colour == 0 else index-width
+        if 0 <= behind < len(squares) and passant_pawn(board,behind) is squares[index]:
+            passant=square_name(board,behind)
+            passed=squares[index]
+            break
+    items=[]
+    for index, piece in enumerate(squares):
+        if piece == None:
+            continue
+        for name, value, expected in zip(piece.undo_state,piece.save_state(),implied_state(type(piece),start[index] == letters[type(piece)])):
+            if name in PRESENTATION:
+                continue
+            if name == "has_moved" and castles(piece):
+                expected=not any(piece is granted_piece for granted_piece in granted)
+            elif name == "en_passantable" and piece is passed:
+                expected=True
+            if (value is expected or (value == expected and type(value) is type(expected))) or not (hashed(value) or hashed(expected)):
+                continue
+            square=square_name(board,index)
+            items.append(f"{square}.{name}" if value is MISSING else f"{square}.{name}={value_text(board,value)}")
+    base=defaults(game.mode)
+    for var, value in board.__dict__.items():
+        if var in board.__basevars__ or var == "__basevars__":
+            continue
+        expected=base.get(var,MISSING)
+        if (value is expected or (value == expected and type(value) is type(expected))) or not (hashed(value) or hashed(expected)):
+            continue
+        items.append(f"{var}={value_text(board,value)}")
+    fields=["/".join(rows),"w" if board.turn == 0 else "b",castling,passant,str(board.pointless),str(board.turn_number//2+1)]
+    if items:
+        fields.append("|".join(items))
+    return " ".join(fields)
+
+def place(board:Board, text:str, extras:dict[str,object]|None=None):
+    '''Set the board to the position in a FEN (see the top of this module). Only the placement is required; the other fields default to w - - 0 1 and no variant field. Pieces already on the right squares are reused, as in position.decode(). extras are the values the mode's own board attributes go back to when the variant field doesn't name them (see defaults()); with None, they are left as they are. Raises ValueError if the FEN doesn't fit the board.'''
+    fields=text.split()
+    if not 1 <= len(fields) <= 7:
+        raise ValueError(f"A FEN has 1 to 7 fields, not {len(fields)}: {text!r}")
+    placement, side, castling, passant, halfmove, fullmove, variant=fields+DEFAULTS[len(fields)-1:]
+    width=board.width
+    rows=placement.split("/")
+    if len(rows) != board.height:
+        raise ValueError(f"The placement has {len(rows)} rows, the board {board.height}.")
+    dictionary=board.piecesdict
+    letters=[]
+    for row in rows:
+        length=len(letters)
+        for code in PLACEMENT.findall(row):
+            if code.isdigit():
+                letters.extend([None]*int(code))
+            elif code in dictionary:
+                letters.append(code)
+            else:
+                raise ValueError(f"{code!r} isn't a piece of this mode.")
+        if len(letters)-length != width:
+            raise ValueError(f"The row {row!r} is {len(letters)-length} squares long, the board {width}.")
+    if side not in ("w","b") or not (halfmove.isdigit() and fullmove.isdigit() and int(fullmove) > 0):
+        raise ValueError(f"Bad side to move or counters in {text!r}")
+    squares=board.squares
+    tiles=board.tiles
+    start=start_letters(tuple(board.initpos or ()),width,board.height)
+    board.scrub()
+    changes=[]
+    for index, letter in enumerate(letters):
+        old=squares[index]
+        if letter == None:
+            if old != None:
+                changes.append((index,None))
+            continue
+        if tiles[index].base == "void":
+            raise ValueError(f"{square_name(board,index)} is void.")
+        kind=dictionary[letter]
+        if type(old) is kind:
+            piece=old
+        else:
+            piece=kind()
+            changes.append((index,piece))
+        piece.parent=tiles[index]
+        piece.load_state(implied_state(kind,start[index] == letter))
+    board.place_many(changes)
+    board.turn=0 if side == "w" else 1
+    board.turn_number=(int(fullmove)-1)*2+board.turn
+    board.pointless=int(halfmove)
+    board.active_options=None
+    for piece in castling_grants(board,castling):
+        piece.has_moved=False
+    if passant != "-":
+        pawn=passant_pawn(board,square_index(board,passant))
+        if pawn == None:
+            raise ValueError(f"No pawn can be taken en passant on {passant}.")
+        pawn.en_passantable=True
+    if extras != None:
+        for var, value in extras.items():
+            setattr(board,var,copy.copy(value) if isinstance(value,list) else value)
+    changed=[]
+    for item in variant.split("|") if variant else []:
+        name, equals, value=item.partition("=")
+        square, dot, attribute=name.rpartition(".")
+        value=read_value(board,value) if equals else MISSING
+        if not dot:
+            setattr(board,name,value)
+            continue
+        piece=squares[square_index(board,square)]
+        if piece == None:
+            raise ValueError(f"Variant item {item!r} names an empty square.")
+        if value is MISSING:
+            piece.__dict__.pop(attribute,None)
+        else:
+            setattr(piece,attribute,value)
+        changed.append(piece)
+    for piece in changed:
+        if hasattr(piece,"change_costume"):
+            piece.change_costume()
+
+def read(text:str, game:Game|HeadlessGame):
+    '''Put the position in a FEN on game.board, with the mode's own board attributes as the FEN says or as a game starts.'''
+    place(game.board,text,defaults(game.mode))
+    game.selected=None
+    game.prev_selected=None
+    game.win=[False,-1]
+    game.tables.clear() #pieces can have been swapped for new ones, see MoveTable.of()
+
+def load(text:str, mode) -> HeadlessGame:
+    '''A HeadlessGame of the mode in the position in a FEN.'''
+    game=HeadlessGame(mode)
+    read(text,game)
+    return game
+
+def write_epd(game:Game|HeadlessGame, operations:dict[str,str]={}) -> str:
+    '''The position as EPD: the first four FEN fields, then the counters as hmvc and fmvn, the variant field (if any) as variant, and the operations given, whose operands are written as they are (so quote a string with spaces in it).'''
+    fields=write(game).split(" ")
+    result=" ".join(fields[:4])+f" hmvc {fields[4]}; fmvn {fields[5]};"
+    if len(fields) > 6:
+        result+=f" variant {fields[6]};"
+    for opcode, operand in operations.items():
+        result+=f" {opcode} {operand};" if operand != "" else f" {opcode};"
+    return result
+
+def parse_epd(line:str) -> tuple[str,dict[str,str]]:
+    '''A line of EPD as a FEN (for place()) and its other operations, by opcode. Operands are kept as text, with the quotes taken off a lone quoted string. Also takes the common form with full six-field FENs in front of the operations (as perft suites have).'''
+    tokens=TOKEN.findall(line)
+    if len(tokens) < 4 or ";" in tokens[:4]:
+        raise ValueError(f"Not an EPD line: {line!r}")
+    fields=tokens[:4]
+    rest=tokens[4:]
+    clocks=["0","1"]
+    if len(rest) >= 2 and rest[0].isdigit() and rest[1].isdigit():
+        clocks=rest[:2]
+        rest=rest[2:]
+    operations:dict[str,str]={}
+    current:list[str]=[]
+    for token in rest+[";"]:
+        if token != ";":
+            current.append(token)
+        elif current:
+            operands=current[1:]
+            operations[current[0]]=operands[0][1:-1] if len(operands) == 1 and operands[0].startswith('"') else " ".join(operands)
+            current=[]
+    fields+=[operations.pop("hmvc",clocks[0]),operations.pop("fmvn",clocks[1])]
+    if "variant" in operations:
+        fields.append(operations.pop("variant"))
+    return " ".join(fields), operations
+
+def read_epd(lines:Iterable[str], mode) -> Generator[tuple[HeadlessGame,dict[str,str]]]:
+    '''Each position in an EPD file (or any lines of text) and its operations, one at a time. Blank lines and lines starting with # are skipped. Every position is put on the same HeadlessGame, so take what's needed of it (position.encode(), say) before asking for the next.'''
+    game=HeadlessGame(mode)
+    extras=defaults(mode)
+    for line in lines:
+        line=line.strip()
+        if line == "" or line.startswith("#"):
+            continue
+        text, operations=parse_epd(line)
+        place(game.board,text,extras)
+        game.selected=None
+        game.win=[False,-1]
+        game.tables.clear()
+        yield game, operations
+
+print('Module "fen" (FEN and EPD) loaded.')
@@ -0,0 +1,82 @@
+'''Where each frame of chess_plus's loop goes, for the timing overlay (F3) and its JSON export (F4). The loop marks its phases with frame_times.phase(), and so do the places those phases reach: Board.redraw() for tile drawing, and MoveTable.run_win()/run_lock() for the win condition and the locks, which chess_plus wraps in one so rules stays free of UI timing. A phase's time leaves out the phases inside it, and "other" is whatever no phase covers. Like rules, never imports pygame.
+While it is off (the default), phase() hands back a shared do-nothing context, so perft and the engine don't pay for it.'''
+from __future__ import annotations
+from collections import deque
+from collections.abc import Generator
+from contextlib import contextmanager, nullcontext
+import json
+import time
+
+PHASES:list[str]=["events","board","tiles","win","moves","update"]
+COLUMNS:list[str]=PHASES+["other","frame"]
+HISTORY:int=600 #frames kept for the percentiles: 10 seconds at 60 FPS
+PERCENTILES:list[int]=[50,95,99]
+IDLE=nullcontext()
+
+class FrameTimes():
+    def __init__(self, size:int=HISTORY):
+        self.enabled:bool=False
+        self.frames:deque[dict[str,float]]=deque(maxlen=size) #seconds spent in each column, one dict per frame
+        self.current:dict[str,float]|None=None #the frame being timed, if begin() has been called since enabling
+        self.started:float=0.0
+        self.stack:list[list[str|float]]=[] #phases open in the current frame: name and the time spent in phases inside it
+
+    def toggle(self):
+        '''Start timing frames afresh, or stop.'''
+        self.enabled=not self.enabled
+        self.frames.clear()
+        self.current=None
+
+    def begin(self):
+        if self.enabled:
+            self.current=dict.fromkeys(PHASES,0.0)
+            self.started=time.perf_counter()
+
+    def end(self):
+        '''Close the frame begun by begin(). Call it before waiting for the next frame, so only the work is counted.'''
+        if self.current != None:
+            frame=self.current
+            frame["frame"]=time.perf_counter()-self.started
+            frame["other"]=max(frame["frame"]-sum(frame[phase] for phase in PHASES),0.0)
+            self.frames.append(frame)
+            self.current=None
+
+    def phase(self, name:str):
+        '''A context manager that adds the time spent in its body to the named phase of the current frame.'''
+        if self.current == None:
+            return IDLE
+        return self.timed(name)
+
+    @contextmanager
+    def timed(self, name:str) -> Generator[None]:
+        entry=[name,0.0]
+        self.stack.append(entry)
+        start=time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed=time.perf_counter()-start
+            self.stack.pop()
+            if self.current != None:
+                self.current[name]+=elapsed-entry[1]
+                if self.stack:
+                    self.stack[-1][1]+=elapsed
+
+    def stats(self) -> dict[str,dict[str,float]]:
+        '''p50, p95, p99 and the worst time of each column over the frames kept, in milliseconds.'''
+        result={}
+        count=len(self.frames)
+        for column in COLUMNS:
+            samples=sorted(frame[column] for frame in self.frames)
+            result[column]={f"p{percentile}":samples[min(count-1,percentile*count//100)]*1000 if count else 0.0 for percentile in PERCENTILES}
+            result[column]["max"]=samples[-1]*1000 if count else 0.0
+        return result
+
+    def export(self, path:str="frame_timings.json"):
+        '''Write stats() and every frame kept (in milliseconds) to path.'''
+        with open(path,"w") as file:
+            json.dump({"frames":len(self.frames),"stats":self.stats(),"samples":[{column:frame[column]*1000 for column in COLUMNS} for frame in self.frames]},file,indent=4)
+
+frame_times=FrameTimes()
+
+print('Module "frames" (frame timings) loaded.')
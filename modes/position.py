@@ -0,0 +1,256 @@
+'''A compact binary form of a position, for the undo log, sending positions between processes or over the network, and storing them by the thousand. encode() turns a game's board into bytes, decode() puts them back on a board of the same mode, and load() makes a HeadlessGame of them. Like rules, never imports pygame.
+Layout, all little-endian:
+    version (B), length of the mode's module name (B), the name
+    width (B), height (B), side to move (B), turn number (I), pointless counter (I), palette size (H)
+    the palette: for each entry, its piece type (B, an index into kinds(mode)) and a value for each name in that type's undo_state
+    the squares: one code per square, y*width+x, 0 for empty and otherwise 1 + a palette index. A byte each, or two (H) if the palette has more than 255 entries
+    the extras: how many (B), and for each its name (a length byte, then the name) and value
+Castling and en passant rights are kept where the rules keep them, in the pieces' undo_state (has_moved, en_passantable), so they travel in the palette: a rook that has moved and one that hasn't are two entries. The extras are the board attributes a mode adds of its own (duck's submove, checkers' select_again and cs_storage, Fischer random's rook files).
+A value is a tag byte, followed by what that tag needs (see write()). Anything with no tag, such as an image, is written as SKIPPED and left as a new piece has it on decoding; a piece with a change_costume() (WOTK's adventurers) has it called then, to work its look out again from its level. A piece's _image is never written, being only a cache of its sprite. A pending OptionsBar isn't kept either, just as Board.get_layout() doesn't keep it.'''
+from __future__ import annotations
+from array import array
+from functools import cache
+import struct
+from types import ModuleType
+from modes.rules import Board, Game, HeadlessGame, Piece, Tile, MISSING
+
+VERSION:int=1
+HEADER=struct.Struct("<BB")
+BOARD=struct.Struct("<BBBIIH")
+#value tags
+ABSENT=0 #MISSING: the piece doesn't have the attribute
+NONE=1
+FALSE=2
+TRUE=3
+SMALL=4 #an int from -128 to 127, in a signed byte
+INT=5 #any other int, in 8 bytes
+STRING=6 #up to 255 bytes of UTF-8, after a length byte
+TUPLE=7 #up to 255 values, after a count byte
+LIST=8 #up to 65535 values, after a count (H)
+TILE=9 #a square of the board, by its index (H)
+SKIPPED=10
+SKIP=object() #stands in for a SKIPPED value once read
+
+@cache
+def kinds(mode) -> tuple[type,...]:
+    '''Every piece type a mode's positions can hold, in the order their type bytes are handed out: the board's piecesdict first, then the other Piece classes in the mode's module, then those in the modes it imports (Fischer random promotes to standard's pieces, say). Every process works out the same order, so bytes from one can be read in another.'''
+    result=list(dict.fromkeys(mode.board.piecesdict.values()))
+    sources=[mode]+[value for value in vars(mode).values() if isinstance(value,ModuleType) and value.__name__.startswith("modes.")]
+    for source in sources:
+        for value in vars(source).values():
+            if isinstance(value,type) and issubclass(value,Piece) and value is not Piece and value not in result:
+                result.append(value)
+    if len(result) > 256:
+        raise TypeError(f"{mode.__name__} has more piece types than a byte can tell apart.")
+    return tuple(result)
+
+@cache
+def kind_numbers(mode) -> dict[type,int]:
+    return {kind:number for number, kind in enumerate(kinds(mode))}
+
+def write(value:object, out:bytearray):
+    if value is MISSING:
+        out.append(ABSENT)
+    elif value is None:
+        out.append(NONE)
+    elif value is False:
+        out.append(FALSE)
+    elif value is True:
+        out.append(TRUE)
+    elif type(value) is int:
+        if -128 <= value < 128:
+            out+=struct.pack("<Bb",SMALL,value)
+        else:
+            out+=struct.pack("<Bq",INT,value)
+    elif type(value) is str and len(value.encode()) < 256:
+        text=value.encode()
+        out+=struct.pack("<BB",STRING,len(text))
+        out+=text
+    elif type(value) is tuple and len(value) < 256:
+        out+=struct.pack("<BB",TUPLE,len(value))
+        for item in value:
+            write(item,out)
+    elif type(value) is list and len(value) < 65536:
+        out+=struct.pack("<BH",LIST,len(value))
+        for item in value:
+            write(item,out)
+    elif isinstance(value,Tile) and value.board != None:
+        out+=struct.pack("<BH",TILE,value.index)
+    else:
+        out.append(SKIPPED)
+
+def read(data:bytes, offset:int, board:Board) -> tuple[object,int]:
+    '''The value written at data[offset] and the offset just past it. TILE values are read as the board's Tiles.'''
+    tag=data[offset]
+    offset+=1
+    if tag == ABSENT:
+        return MISSING, offset
+    if tag == NONE:
+        return None, offset
+    if tag == FALSE:
+        return False, offset
+    if tag == TRUE:
+        return True, offset
+    if tag == SMALL:
+        return struct.unpack_from("<b",data,offset)[0], offset+1
+    if tag == INT:
+        return struct.unpack_from("<q",data,offset)[0], offset+8
+    if tag == STRING:
+        end=offset+1+data[offset]
+        return data[offset+1:end].decode(), end
+    if tag == TUPLE or tag == LIST:
+        if tag == TUPLE:
+            count=data[offset]
+            offset+=1
+        else:
+            count=struct.unpack_from("<H",data,offset)[0]
+            offset+=2
+        items=[]
+        for i in range(count):
+            item, offset=read(data,offset,board)
+            items.append(item)
+        return tuple(items) if tag == TUPLE else items, offset
+    if tag == TILE:
+        return board.tiles[struct.unpack_from("<H",data,offset)[0]], offset+2
+    if tag == SKIPPED:
+        return SKIP, offset
+    raise ValueError(f"Unknown value tag {tag} at byte {offset-1}.")
+
+def encode(game:Game|HeadlessGame) -> bytes:
+    '''The position on game.board, as bytes.'''
+    board=game.board
+    mode=game.mode
+    numbers=kind_numbers(mode)
+    name=mode.__name__.split(".")[-1].encode()
+    palette:dict[tuple[type,tuple],int]={} #palette index of each (type, state) seen
+    indexes:dict[bytes,int]={} #and of each entry written, since states that differ only in what isn't written share one
+    entries=bytearray()
+    codes=[]
+    for piece in board.squares:
+        if piece == None:
+            codes.append(0)
+            continue
+        kind=type(piece)
+        state=piece.save_state()
+        try:
+            index=palette.get((kind,state))
+        except TypeError: #a list in the state, which can't be a key
+            index=None
+        if index == None:
+            number=numbers.get(kind)
+            if number == None:
+                raise TypeError(f"{kind.__name__} isn't one of the pieces of {mode.__name__}, so it can't be encoded.")
+            entry=bytearray((number,))
+            for attribute, value in zip(kind.undo_state,state):
+                write(None if attribute == "_image" else value,entry)
+            entry=bytes(entry)
+            index=indexes.get(entry)
+            if index == None:
+                index=indexes[entry]=len(indexes)
+                entries+=entry
+            try:
+                palette[(kind,state)]=index
+            except TypeError:
+                pass
+        codes.append(index+1)
+    size=len(indexes)
+    out=bytearray(HEADER.pack(VERSION,len(name)))
+    out+=name
+    out+=BOARD.pack(board.width,board.height,board.turn,board.turn_number,board.pointless,size)
+    out+=entries
+    out+=bytes(codes) if size < 256 else array("H",codes).tobytes()
+    extras=[(var,value) for var, value in board.__dict__.items() if var not in board.__basevars__ and var != "__basevars__"]
+    out.append(len(extras))
+    for var, value in extras:
+        out.append(len(var))
+        out+=var.encode()
+        write(value,out)
+    return bytes(out)
+
+def header(data:bytes) -> tuple[str,int,int,int,int,int]:
+    '''The mode's module name, width, height, side to move, turn number and pointless counter of encoded bytes, without decoding the rest.'''
+    version, length=HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f"Position format version {version}, expected {VERSION}.")
+    name=data[HEADER.size:HEADER.size+length].decode()
+    return (name,)+BOARD.unpack_from(data,HEADER.size+length)[:5]
+
+def decode(data:bytes, game:Game|HeadlessGame):
+    '''Put the position in data on game.board, which has to be of the same mode and size. Pieces already on the right squares are reused, as Board.unmake_move() does, so only the squares that differ are placed again; the game's MoveTables should still be cleared afterwards, as after Board.restore().'''
+    board=game.board
+    mode=game.mode
+    version, length=HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f"Position format version {version}, expected {VERSION}.")
+    offset=HEADER.size
+    name=data[offset:offset+length].decode()
+    if name != mode.__name__.split(".")[-1]:
+        raise ValueError(f"A position of {name} can't be put on a board of {mode.__name__}.")
+    offset+=length
+    width, height, turn, turn_number, pointless, size=BOARD.unpack_from(data,offset)
+    offset+=BOARD.size
+    if (width,height) != (board.width,board.height):
+        raise ValueError(f"A {width}x{height} position can't be put on a {board.width}x{board.height} board.")
+    types=kinds(mode)
+    palette:list[tuple[type,tuple,bool]]=[] #type, state and whether anything in the state was skipped
+    for i in range(size):
+        kind=types[data[offset]]
+        offset+=1
+        state=[]
+        for attribute in kind.undo_state:
+            value, offset=read(data,offset,board)
+            state.append(value)
+        palette.append((kind,tuple(state),SKIP in state))
+    count=width*height
+    if size < 256:
+        codes=data[offset:offset+count]
+        offset+=count
+    else:
+        codes=array("H",data[offset:offset+2*count])
+        offset+=2*count
+    squares=board.squares
+    tiles=board.tiles
+    changes=[]
+    for index, code in enumerate(codes):
+        old=squares[index]
+        if code == 0:
+            if old != None:
+                changes.append((index,None))
+            continue
+        kind, state, skipped=palette[code-1]
+        if type(old) is kind and not skipped:
+            piece=old
+        else:
+            piece=kind()
+            changes.append((index,piece))
+        piece.parent=tiles[index]
+        values=piece.__dict__
+        for attribute, value in zip(kind.undo_state,state):
+            if value is SKIP:
+                continue
+            if value is MISSING:
+                values.pop(attribute,None)
+            else:
+                values[attribute]=value.copy() if type(value) is list else value #palette entries are shared between squares
+        if skipped and hasattr(piece,"change_costume"):
+            piece.change_costume()
+    board.place_many(changes)
+    board.turn, board.turn_number, board.pointless=turn, turn_number, pointless
+    board.active_options=None
+    count=data[offset]
+    offset+=1
+    for i in range(count):
+        length=data[offset]
+        var=data[offset+1:offset+1+length].decode()
+        value, offset=read(data,offset+1+length,board)
+        if value is not SKIP:
+            setattr(board,var,value)
+
+def load(data:bytes) -> HeadlessGame:
+    '''A HeadlessGame of the mode named in data, in the position in it.'''
+    import modes
+    game=HeadlessGame(modes.load(header(data)[0]))
+    decode(data,game)
+    return game
+
+print('Module "position" (binary positions) loaded.')
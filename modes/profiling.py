@@ -0,0 +1,101 @@
+'''Startup profiling, turned on by python chess_plus.py --profile-startup. Once start() has been called, measure() records the wall time and net allocated memory blocks (sys.getallocatedblocks()) of each mode import, almanac page construct and sprite or font load. write() saves them, slowest first, as JSON and as a text summary.
+Sections nest (a mode import loads sprites, say): "seconds" includes the sections inside, "self" leaves them out. Until start() is called, measure() does nothing.'''
+from __future__ import annotations
+from collections.abc import Generator
+from contextlib import contextmanager
+from importlib.machinery import ModuleSpec
+import importlib.util
+import json
+import sys
+import time
+
+type Record=dict[str,str|int|float]
+
+enabled=False
+records:list[Record]=[]
+stack:list[Record]=[] #sections being measured, innermost last
+started=0.0
+ready=0.0 #when the first frame began, 0 until mark_ready()
+
+@contextmanager
+def measure(kind:str, name:str) -> Generator[None]:
+    '''Time the body of the with statement as one section of the report.'''
+    if not enabled:
+        yield
+        return
+    record={"kind":kind,"name":name,"depth":len(stack),"seconds":0.0,"self":0.0,"blocks":0}
+    records.append(record)
+    stack.append(record)
+    blocks=sys.getallocatedblocks()
+    start=time.perf_counter()
+    try:
+        yield
+    finally:
+        record["seconds"]=time.perf_counter()-start
+        record["blocks"]=sys.getallocatedblocks()-blocks
+        record["self"]+=record["seconds"]
+        stack.pop()
+        if stack:
+            stack[-1]["self"]-=record["seconds"]
+
+class ImportTimer():
+    '''Put at the front of sys.meta_path by start(), so every module in modes is imported inside measure(), however it is imported.'''
+    def find_spec(self, name:str, path, target=None) -> ModuleSpec|None:
+        if not name.startswith("modes."):
+            return None
+        sys.meta_path.remove(self)
+        try:
+            spec=importlib.util.find_spec(name)
+        finally:
+            sys.meta_path.insert(0,self)
+        if spec == None or spec.loader == None or not hasattr(spec.loader,"exec_module"):
+            return spec
+        exec_module=spec.loader.exec_module
+        def timed_exec_module(module):
+            with measure("import",name):
+                exec_module(module)
+        spec.loader.exec_module=timed_exec_module
+        return spec
+
+def start():
+    global enabled, started
+    enabled=True
+    started=time.perf_counter()
+    sys.meta_path.insert(0,ImportTimer())
+
+def mark_ready():
+    '''Call when the first frame begins: the report's startup time ends here.'''
+    global ready
+    if enabled and ready == 0:
+        ready=time.perf_counter()
+
+def report() -> dict:
+    '''The report: startup time, the count and self time of each kind of section, and every section, slowest first.'''
+    totals:dict[str,dict[str,int|float]]={}
+    for record in records:
+        total=totals.setdefault(record["kind"],{"count":0,"self":0.0})
+        total["count"]+=1
+        total["self"]+=record["self"]
+    return {"startup":(ready or time.perf_counter())-started,"totals":totals,"sections":sorted(records,key=lambda record:record["seconds"],reverse=True)}
+
+def summary(data:dict, top:int=25) -> str:
+    lines=[f"Startup: {data["startup"]*1000:.1f} ms (from the --profile-startup switch to the first frame)","","By kind (self time):"]
+    for kind, total in sorted(data["totals"].items(),key=lambda item:item[1]["self"],reverse=True):
+        lines.append(f"  {kind:<8} {total["count"]:>5}x {total["self"]*1000:>9.1f} ms")
+    lines+=["",f"Slowest {min(top,len(data["sections"]))} sections:",f"  {"ms":>9} {"self ms":>9} {"blocks":>8}  section"]
+    for record in data["sections"][:top]:
+        lines.append(f"  {record["seconds"]*1000:>9.1f} {record["self"]*1000:>9.1f} {record["blocks"]:>8}  {record["kind"]}: {record["name"]}")
+    return "\n".join(lines)+"\n"
+
+def write(path:str="startup_profile"):
+    '''Save the report to path.json and its summary to path.txt.'''
+    if not enabled:
+        return
+    data=report()
+    with open(path+".json","w") as file:
+        json.dump(data,file,indent=4)
+    with open(path+".txt","w") as file:
+        file.write(summary(data))
+    print(f"Startup profile written to {path}.json and {path}.txt.")
+
+print('Module "profiling" (startup profiler) loaded.')
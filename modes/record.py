@@ -0,0 +1,140 @@
+'''Game records: a PGN-style text format for games of any mode. RecordWriter streams a game to a file one turn at a time, and read_records() yields the games in a file one at a time, so neither holds more than one game in memory however big the file gets.
+A game is a block of [Tag "value"] lines, a blank line, its turns, a result (1-0, 0-1, 1/2-1/2 or *) and a blank line:
+    [Mode "duck"]
+    [Board "8x8"]
+    [Clock "600+5+0"]
+
+    1. e2e4,d4e5 e7e5,e5d4 2. g1f3,d4c6 *
+Mode (the module name) and Board (width x height, which the squares are read by) always come first. Clock (seconds+increment+delay), Start (a custom starting position, as FEN), Seed (what random was seeded with before the game began, for modes that set up at random) and Result are written when known; any other tag is kept as it is. A turn is every pair of clicks its side made, joined by commas, so a duck placement or a multi-jump in checkers is one more pair. An OptionsBar choice (a promotion, a WOTK alignment) follows the move that brought it up after a colon, as in perft.py. Move numbers are optional when reading.
+Like rules, never imports pygame.'''
+from __future__ import annotations
+from collections.abc import Generator, Iterable
+from typing import TextIO
+import random
+import re
+
+type BoardCoord=tuple[int,int]
+type Move=tuple[BoardCoord,BoardCoord,int|None] #start, end and the OptionsBar choice that goes with it, if one came up
+type Turn=list[Move]
+
+RESULTS:list[str]=["1-0","0-1","1/2-1/2","*"]
+LINE_LENGTH:int=80
+TAG=re.compile(r'\[(\w+)\s+"((?:[^"\\]|\\.)*)"\]')
+MOVE=re.compile(r"([a-z])(\d+)([a-z])(\d+)(?::(\d+))?")
+NUMBER=re.compile(r"\d+\.+")
+
+def move_text(move:Move, height:int) -> str:
+    text="".join(chr(97+x)+str(height-y) for x, y in move[:2])
+    if move[2] != None:
+        text+=f":{move[2]}"
+    return text
+
+def parse_move(text:str, height:int) -> Move:
+    match=MOVE.fullmatch(text)
+    if match == None:
+        raise ValueError(f"Not a move: {text!r}")
+    start_file, start_rank, end_file, end_rank, choice=match.groups()
+    return (ord(start_file)-97,height-int(start_rank)), (ord(end_file)-97,height-int(end_rank)), int(choice) if choice != None else None
+
+def result_text(win:list[bool|int]) -> str:
+    '''The result token for a game's win list, as chess_plus keeps it: win[1] is the side that lost.'''
+    if win[0] == None:
+        return "1/2-1/2"
+    if win[0]:
+        return "1-0" if win[1] == 1 else "0-1"
+    return "*"
+
+class Record():
+    '''One game read back by read_records().'''
+    def __init__(self, tags:dict[str,str], turns:list[Turn], result:str):
+        self.tags=tags
+        self.turns=turns
+        self.result=result
+
+    @property
+    def mode(self) -> str:
+        return self.tags["Mode"]
+
+    def replay(self) -> Generator:
+        '''Play the game again in a HeadlessGame, yielding it before the first turn and after each one.'''
+        import modes
+        from modes.rules import HeadlessGame
+        if "Seed" in self.tags:
+            random.seed(int(self.tags["Seed"]))
+        game=HeadlessGame(modes.load(self.mode),self.tags.get("Start"))
+        yield game
+        for turn in self.turns:
+            for start, end, choice in turn:
+                game.play(start,end)
+                if choice != None:
+                    game.choose(choice)
+            yield game
+
+class RecordWriter():
+    '''Writes games to a text file (or anything with write()), a turn at a time: call begin(), turn() for every turn and end() with the result.'''
+    def __init__(self, file:TextIO):
+        self.file=file
+        self.height=0
+        self.turns=0
+        self.column=0
+
+    def begin(self, mode:str, width:int, height:int, tags:dict[str,str|int]={}):
+        self.height=height
+        self.turns=0
+        self.column=0
+        for name, value in [("Mode",mode),("Board",f"{width}x{height}")]+list(tags.items()):
+            escaped=str(value).replace("\\","\\\\").replace('"','\\"')
+            self.file.write(f'[{name} "{escaped}"]\n')
+        self.file.write("\n")
+
+    def write(self, token:str):
+        if self.column != 0 and self.column+1+len(token) > LINE_LENGTH:
+            self.file.write("\n")
+            self.column=0
+        elif self.column != 0:
+            self.file.write(" ")
+            self.column+=1
+        self.file.write(token)
+        self.column+=len(token)
+
+    def turn(self, moves:Turn):
+        token=",".join(move_text(move,self.height) for move in moves)
+        if self.turns%2 == 0:
+            token=f"{self.turns//2+1}. {token}" #kept together, so a line never ends on a number
+        self.write(token)
+        self.turns+=1
+
+    def end(self, result:str="*"):
+        if result not in RESULTS:
+            raise TypeError(f"Result must be one of {RESULTS}, not {result!r}.")
+        self.write(result)
+        self.file.write("\n\n")
+        self.file.flush()
+
+def read_records(lines:Iterable[str]) -> Generator[Record]:
+    '''The games in a file (or any lines of text) written by RecordWriter, one at a time.'''
+    tags:dict[str,str]={}
+    turns:list[Turn]=[]
+    height=0
+    for line in lines:
+        line=line.strip()
+        if line == "":
+            continue
+        if line.startswith("["):
+            match=TAG.fullmatch(line)
+            if match == None:
+                raise ValueError(f"Not a tag: {line!r}")
+            tags[match[1]]=re.sub(r"\\(.)",r"\1",match[2])
+            continue
+        if height == 0:
+            height=int(tags["Board"].split("x")[1])
+        for token in line.split():
+            if token in RESULTS:
+                yield Record(tags,turns,token)
+                tags, turns, height={}, [], 0
+            elif not NUMBER.fullmatch(token):
+                turns.append([parse_move(move,height) for move in token.split(",")])
+    if tags or turns:
+        yield Record(tags,turns,"*") #cut off before its result
+
+print('Module "record" (game records) loaded.')
@@ -0,0 +1,1331 @@
+'''Headless foundations for chess modes. Includes:
+Piece template, Tile object, Board state, Movement methods, Capture methods and Rules template.
+Also the data side of OptionsBars, almanac pages (Info) and text sprites (Label), so that modes only need this module.
+Nothing in here touches pygame, so rules can be run on a server, in worker processes or in benchmarks. Sprites, Rects and the like are attached by the UI layer (basic).'''
+
+from __future__ import annotations
+from math import copysign, gcd
+from os.path import join
+from typing import Literal
+from collections.abc import Generator, Callable, Iterable, Container
+from functools import partial, cache
+from random import Random
+from array import array
+from modes.bitboard import Bitboards, ORTHOGONALS, DIAGONALS, to_indexes, to_coords
+import itertools
+import copy
+
+type Path=str
+type Coord=tuple[int,int]
+type BoardCoord=tuple[int,int]
+type BoardLayout=list[list[Tile]]
+type Colour=tuple[int,int,int]
+type UndoRecord=tuple[list[tuple[int,Piece|None]],list[tuple[Piece,Tile|None,tuple]],tuple]
+
+numbers=["0","1","2","3","4","5","6","7","8","9"]
+letters=["","a","b","c","d","e","f","g","h","i","j","k","l","m","n","o","p","q","r","s","t","u","v","w","x","y","z"]
+
+STD_TILEDIM=(100,100)
+PCS_IMG_DIR=join("assets","sprites","pieces")
+TIL_IMG_DIR=join("assets","sprites","tiles")
+OTR_IMG_DIR=join("assets","sprites","other")
+FNT_IMG_DIR=join("assets","montserrat")
+WHITE:Colour=(255,255,255)
+BLACK:Colour=(0,0,0)
+CREAM_SQUARE:Colour=(234,234,208) #the board's light squares, also a background for Info pictures
+GREEN_SQUARE:Colour=(119,148,85) #and its dark ones
+
+#per-square flags, as stored in Board.flags
+VOID=1
+LOCKED=2
+MOVE_TARGET=4
+CAPTURE_TARGET=8
+SCRUB_TABLE=bytes(i&VOID for i in range(256)) #bytearray.translate table that clears everything but VOID
+MISSING=object() #stands in for an attribute a piece doesn't have, in Piece.save_state()
+#colour bits, as stored in the low two bits of Board.codes. "all" has both.
+COLOUR_BITS:dict[int|str,int]={0:1,1:2,"all":3}
+OWN_BITS:dict[int|str,int]={0:1,1:2} #a code belongs to colour c if code&OWN_BITS[c], or if its colour bits are 3 ("all")
+
+@cache
+def zobrist_keys(name:str, count:int) -> list[int]:
+    '''count random 64-bit keys, one per square. Seeded by name, so every process gets the same keys and the same hashes. Don't modify the list, it is shared.'''
+    rng=Random(name)
+    return [rng.getrandbits(64) for i in range(count)]
+
+def denest(source:Container, depth:int=999) -> list:
+    result=[]
+    for item in source:
+        if isinstance(item, Container) and depth != 0:
+            result.extend(denest(item, depth-1))
+        else:
+            result.append(item)
+    return result
+
+class Game():
+    '''Placeholder class for properties of game modes so intellisense can check my code. Not supposed to be instantiated.'''
+    def __init__(self):
+        self.clock:object #the UI's pygame Clock
+        self.screen:object #and its display Surface
+        self.FPS:int
+        self.running:bool
+        self.menu:str
+        self.submenu:str
+        self.last_menu:str
+        self.mode
+        self.additional=None
+        self.mode:...
+        self.connect:bool
+        self.incoming:str
+        self.outgoing:str
+        self.a_m_offset:int
+        self.a_p_offset:int
+        self.timer:tuple[int,int,int]
+        self.selected:Tile|None
+        self.prev_selected:Tile|None
+        self.board:Board|None
+        self.tables:dict[tuple,MoveTable]
+        raise RuntimeError("This is a utility placeholder class that is not supposed to be instantiated. This is why you shouldn't try.")
+
+class HeadlessGame():
+    '''The bare minimum of a Game that rules functions look at. Use this to run a mode without the UI.'''
+    def __init__(self, mode, custom_initpos:str|None=None):
+        self.mode=mode
+        self.board:Board=copy.copy(mode.board)
+        self.board.construct_layout()
+        self.board.populate(custom_initpos)
+        self.selected:Tile|None=None
+        self.prev_selected:Tile|None=None
+        self.win:list[bool|int]=[False, -1]
+        self.tables:dict[tuple,MoveTable]={} #see MoveTable.of()
+        if hasattr(mode,"game_start") and custom_initpos == None: #game_start sets up the start, which a custom one replaces
+            mode.game_start(self)
+
+    def run_win(self) -> tuple[list[BoardCoord],bool|None,int]:
+        '''The mode's win(), or Rules.win() if it has none, as the UI calls it after every click.'''
+        return MoveTable.run_win(self)
+
+    def select(self, tile:Tile) -> list[BoardCoord]:
+        '''Click on a tile to select it: lock the board and mark the targets of its piece, as the UI does. Returns the squares the piece can move or capture on.'''
+        table=MoveTable.of(self)
+        self.win[0], self.win[1]=table.win
+        moves, captures=table.select(self,tile)
+        board=self.board
+        for square in moves:
+            board.get(square).move_target=True
+        for square in captures:
+            board.get(square).capture_target=True
+        return list(dict.fromkeys(moves+captures))
+
+    def moves(self) -> list[tuple[BoardCoord,BoardCoord]]:
+        '''Every (start, end) pair of clicks the side to move can make: a piece, then one of its targets. Empty once the game is over, or while an OptionsBar is waiting for a choice (see choose()).'''
+        board=self.board
+        table=MoveTable.of(self)
+        self.win[0], self.win[1]=table.win
+        if self.win[0] or self.win[0] == None or board.active_options != None:
+            return []
+        result=[]
+        for tile in board.tiles:
+            if tile != None and tile.piece != None and tile.piece.belongs_to(board.turn):
+                for square in table.targets(self,tile):
+                    result.append((tile.boardpos,square))
+        board.scrub()
+        self.selected=None
+        return result
+
+    def play(self, start:BoardCoord, end:BoardCoord, select:bool=True):
+        '''Make a move from moves(), going through the same steps as the UI does when a target square is clicked. select=False skips clicking on the piece first, for moves already known to be legal (from Bitboards.legal_moves(), say) in modes whose pieces don't leave anything on the board while their targets are worked out.'''
+        board=self.board
+        if select:
+            self.select(board.get(start))
+        else:
+            self.selected=board.get(start)
+        final=board.get(end)
+        captured=final.piece
+        if captured != None and not getattr(captured,"pointless",False):
+            board.pointless=0
+        else:
+            board.pointless+=1
+        self.selected.piece.move_to(final,self)
+        if captured != None and hasattr(self.mode,"after_capture"):
+            self.mode.after_capture(self,final,captured)
+        self.selected=None
+        self.prev_selected=None
+        if hasattr(self.mode,"after_move"):
+            self.mode.after_move(self)
+        else:
+            from modes.standard import after_move #the UI's default, imported here to keep this module free of pygame
+            after_move(self)
+        board.scrub()
+
+    def options(self) -> int:
+        '''How many choices the active OptionsBar (a promotion, say) offers, or 0 if there isn't one.'''
+        if self.board.active_options == None:
+            return 0
+        return len(self.board.active_options.contains)
+
+    def choose(self, index:int):
+        '''Click on one of the active OptionsBar's choices.'''
+        options=self.board.active_options
+        options.on_click(options.contains[index],options)
+        self.board.active_options=None
+
+    def snapshot(self) -> dict[BoardCoord|str,object]:
+        '''Board.get_layout(), plus the board state it leaves out that a game in progress needs.'''
+        layout=self.board.get_layout()
+        layout["pointless"]=self.board.pointless
+        layout["active_options"]=self.board.active_options
+        return layout
+
+    def restore(self, layout:dict[BoardCoord|str,object]):
+        '''Go back to a snapshot(). The snapshot's pieces (and lists, which modes keep extra state in) are copied again, so it can be restored any number of times.'''
+        self.board.restore({key:copy.copy(value) if isinstance(value,(Piece,list,dict,set)) else value for key, value in layout.items()})
+        self.selected=None
+        self.prev_selected=None
+        self.win=[False,-1]
+        self.tables.clear() #the restored pieces are new copies, with whatever their moves() last left on them
+
+class MoveTable():
+    '''Everything a click can ask about one position, each part worked out the first time it is asked for: the win condition's verdict, and for each piece the squares locked while it is selected (see run_lock(); it can depend on the selection, as Rules.legal_lock() shows), its move and capture targets and the Board.teleport pairs its moves leave. Selecting a piece again, or playing a move from HeadlessGame.moves(), is then a lookup instead of another run of the win condition.'''
+    SIZE:int=64 #tables kept per game. perft and the engine come back to earlier positions after unmaking moves, so keeping only the last one would mean building the parent's again for every child.
+
+    def __init__(self, game:Game):
+        board=game.board
+        selected=game.selected
+        board.scrub()
+        game.selected=None
+        self.win:tuple[bool|None,int]=MoveTable.run_win(game)[1:]
+        self.entries:dict[BoardCoord,tuple[list[int],list[BoardCoord],list[BoardCoord],list[tuple[BoardCoord,BoardCoord]]]]={} #locked square numbers, moves, captures and teleports
+        game.selected=selected
+
+    @staticmethod
+    def run_win(game:Game) -> tuple[list[BoardCoord],bool|None,int]:
+        if hasattr(game.mode,"win"):
+            return game.mode.win(game)
+        return Rules.win(game)
+
+    @staticmethod
+    def run_lock(game:Game) -> list[BoardCoord]:
+        '''The squares locked while game.selected is selected: the mode's lock(), or Rules.lock() for modes that use Rules.win. A mode with a win condition of its own and no lock() locks what its win condition says. Taken apart from the win verdict, so the pointless counter never changes which moves are legal.'''
+        mode=game.mode
+        if hasattr(mode,"lock"):
+            locked=mode.lock(game)
+        elif hasattr(mode,"win") and mode.win is not Rules.win:
+            locked=mode.win(game)[0]
+        else:
+            locked=Rules.lock(game)
+        return locked if isinstance(locked,list) else [] #None and True (stalemate, no royal piece) lock nothing
+
+    @staticmethod
+    def of(game:Game) -> MoveTable:
+        '''The table for the game's current position, made only if none of the last SIZE positions it was asked about match. Positions are told apart by Board.hash and the pointless counter, which the win condition also looks at. Anything that swaps the pieces for copies (Board.restore(), say) should clear game.tables, since pieces can keep state from their moves() for move_to() to use.'''
+        tables=game.tables
+        key=(game.board.hash,game.board.pointless)
+        table=tables.pop(key,None)
+        if table == None:
+            table=MoveTable(game)
+            if len(tables) >= MoveTable.SIZE:
+                del tables[next(iter(tables))]
+        tables[key]=table #most recently used last
+        return table
+
+    def select(self, game:Game, tile:Tile) -> tuple[list[BoardCoord],list[BoardCoord]]:
+        '''Select a tile the way a click does: the board is scrubbed and, if the tile has a piece, locked as the win condition says, with the piece's teleports in place for move_to(). Returns the piece's moves and captures, leaving it to the caller to mark them.'''
+        board=game.board
+        board.scrub()
+        game.selected=tile
+        if tile.piece == None:
+            return [], []
+        entry=self.entries.get(tile.boardpos)
+        if entry == None:
+            locked=[board.get(square).index for square in MoveTable.run_lock(game)]
+            for index in locked:
+                board.flags[index]|=LOCKED
+            piece=tile.piece
+            moves=piece.moves(game)
+            if hasattr(game.mode,"move_filter"):
+                moves=game.mode.move_filter(moves,game)
+            moves=list(moves or [])
+            captures=piece.capture_squares(game)
+            if hasattr(game.mode,"capture_filter"):
+                captures=game.mode.capture_filter(captures,game)
+            captures=list(captures or [])
+            entry=self.entries[tile.boardpos]=(locked,moves,captures,list(board.teleport))
+        else:
+            flags=board.flags
+            for index in entry[0]:
+                flags[index]|=LOCKED
+            board.teleport=list(entry[3])
+        return entry[1], entry[2]
+
+    def targets(self, game:Game, tile:Tile) -> list[BoardCoord]:
+        '''The squares the piece on tile can move or capture on, each once. Leaves the tile selected.'''
+        moves, captures=self.select(game,tile)
+        return list(dict.fromkeys(moves+captures))
+
+class Label():
+    '''A sprite that is a word to write rather than a picture to load, for pieces with no picture of their own. The UI's sprite_loader renders it.'''
+    def __init__(self, text:str, colour:Colour):
+        self.text=text
+        self.colour=colour
+
+class Piece():
+    '''A piece. Does not display itself, that's the Tile's job. The sprite is only loaded when something asks for Piece.image, which is the UI's business.'''
+    sprite_loader:Callable[[str|object,Coord],object]|None=None #set by the UI layer; turns a sprite and size into a displayable image
+    role:str|None=None #the standard chess piece this moves exactly like, if any (see bitboard.ROLES)
+    undo_state:tuple[str,...]=("moved","has_moved","en_passantable","level") #what Board.make_move() saves of each piece, where the piece has it
+    capture_pattern:list[tuple[int,int,int|float]]|None=None #(step_x, step_y, limit) for each line capture_squares(game,True) follows, as White sees it (step_y is flipped for colour 1). None if it can't be put that way
+
+    def __init__(self, name:str, value:int, colour:Literal[0,1,"all"], sprite:str|object, check_target:bool=False, initpos:BoardCoord|None=None, img_size:Coord=STD_TILEDIM):
+        '''Attributes common to all pieces'''
+        self.name=name
+        self.value=value
+        self.colour=colour
+        self.initpos=initpos
+        self.img_size=img_size
+        self.sprite=sprite
+        self._image=None
+        self.royal=check_target #whether the piece is a target for check-like conditions
+        self.parent:Tile|None=None
+        self.promotion:OptionsBar|None=None
+        self.promote_pos:list[BoardCoord]|None=None
+        self.__basevars__=["name","value","colour","initpos","img_size","sprite","_image","royal","parent","promotion","promote_pos"]
+
+    @property
+    def image(self):
+        if self._image is None and Piece.sprite_loader is not None:
+            self._image=Piece.sprite_loader(self.sprite,self.img_size)
+        return self._image
+
+    @image.setter
+    def image(self, value):
+        self._image=value
+
+    def __repr__(self):
+        return f"<{self.colour} coloured {self.name} at {self.parent.boardpos}>"
+
+    def __str__(self):
+        if self.colour == 0:
+            str_name="Black"
+        elif self.colour == 1:
+            str_name="White"
+        elif self.colour == 2:
+            str_name="Anyone's"
+        else:
+            str_name="Colourless"
+        return f"{str_name} {self.name}"
+
+    def moves(self, game:Game) -> list[BoardCoord]:
+        '''Every square the piece can move to (excluding captures). Most of the time, a few calls to Movement functions are enough.'''
+        pass
+
+    def capture_squares(self, game:Game, hypo:bool=False) -> list[BoardCoord]:
+        '''Every square the piece can capture on, factoring in the board. If hypo is True, returns every square the piece can capture on hypothetically.'''
+        pass
+
+    def move_to(self, final:Tile, game:Game):
+        '''Move to a Tile. Set its parent's piece to None and set the final Tile's piece to this.'''
+        self.parent.piece=None
+        for pair in game.board.teleport:
+            if final.boardpos == pair[0]:
+                final.set_piece(None)
+                final=game.board.get(pair[1])
+        final.piece=self
+        self.parent=final
+
+    def save_state(self) -> tuple:
+        return tuple(map(self.__dict__.get,self.undo_state,itertools.repeat(MISSING)))
+
+    def load_state(self, state:tuple):
+        for name, value in zip(self.undo_state,state):
+            if value is not MISSING:
+                setattr(self,name,value)
+            elif name in self.__dict__:
+                delattr(self,name)
+
+    def belongs_to(self, colour:int) -> bool:
+        if self.colour == colour or self.colour == "all":
+            return True
+        return False
+
+    def __copy__(self) -> Piece:
+        base=type(self)()
+        base._image=self._image
+        for var in list(self.__dict__.keys()):
+            value=getattr(self,var)
+            if isinstance(value,partial) and value.args[:1] == (self,): #methods borrowed from the White class, which the new piece has already bound to itself
+                continue
+            if var not in self.__basevars__:
+                setattr(base,var,copy.copy(value))
+        return base
+
+class Tile():
+    '''A container for tile information. Is True if there it contains a piece, is False otherwise.
+    Tiles on a board are only views: the piece and flags live in the Board's flat arrays, at Tile.index. Tiles off the board (options, pockets) keep a one-square store of their own.'''
+    def __init__(self, boardcoord:BoardCoord, base:Literal["empty", "void"], rect:object|None, parent:object, colour:Literal[0,1]|None=None, piece:Piece=None):
+        self.boardpos=boardcoord
+        self.base=base
+        self.board:Board|None=None
+        self.store:list[Piece|None]=[None] #where the piece actually lives
+        self.flagstore:bytearray=bytearray(1) #where the flags actually live
+        self.index:int=0
+        self.piece:Piece|None=piece
+        self.image=None
+        self.colour=colour
+        self.parent=parent
+        self.rect=rect #only the UI gives tiles a Rect
+        self.selected=False
+
+    def view(self, board:Board, index:int):
+        '''Turn this tile into a view of square number index on the board.'''
+        self.board=board
+        self.store=board.squares
+        self.flagstore=board.flags
+        self.index=index
+
+    @property
+    def piece(self) -> Piece|None:
+        return self.store[self.index]
+
+    @piece.setter
+    def piece(self, piece:Piece|None):
+        if self.board is None:
+            self.store[self.index]=piece
+        else:
+            self.board.place(self.index,piece)
+
+    @property
+    def locked(self) -> bool:
+        '''Whether this Tile can be moved to.'''
+        return bool(self.flagstore[self.index]&LOCKED)
+
+    @locked.setter
+    def locked(self, value:bool):
+        self._set_flag(LOCKED,value)
+
+    @property
+    def move_target(self) -> bool:
+        return bool(self.flagstore[self.index]&MOVE_TARGET)
+
+    @move_target.setter
+    def move_target(self, value:bool):
+        self._set_flag(MOVE_TARGET,value)
+
+    @property
+    def capture_target(self) -> bool:
+        return bool(self.flagstore[self.index]&CAPTURE_TARGET)
+
+    @capture_target.setter
+    def capture_target(self, value:bool):
+        self._set_flag(CAPTURE_TARGET,value)
+
+    def _set_flag(self, flag:int, value:bool):
+        if value:
+            self.flagstore[self.index] |= flag
+        else:
+            self.flagstore[self.index] &= ~flag
+
+    def __repr__(self):
+        return f"<Tile at {str(self.boardpos)} containing {self.piece.__repr__()}>"
+
+    def __str__(self):
+        return f"<Tile at ({str(self.boardpos[0]+1)},{str(self.boardpos[1]+1)}) containing {str(self.piece)}>"
+
+    def __bool__(self) -> bool:
+        if isinstance(self.store[self.index],Piece):
+            return True
+        else:
+            return False
+
+    def propagate_options(self, options:OptionsBar):
+        if isinstance(self.parent, Board):
+            self.parent.active_options=options
+        else:
+            raise TypeError("And what exactly are you propagating to?")
+
+    def set_piece(self, piece:Piece|None):
+        '''Call a piece from the vasty deep.'''
+        if isinstance(self.piece,Piece):
+            self.piece.parent=None
+        if isinstance(piece,Piece):
+            piece.parent=self
+        self.piece=piece
+
+class OptionsBar():
+    '''A set of choices a move brings up (a promotion, say), each a Tile holding a piece. on_click is called with the chosen tile and the bar, and also with the tile clicked on the board if choose_tile is True. Where the bar goes and how it is drawn is the UI's business (basic.anchor_options() and basic.display_options()).'''
+    def __init__(self, parent:Piece, contains:list[Tile], clickfunc:Callable[[Tile, OptionsBar, None|Tile], None], choose_tile:bool=False, message:object|None=None, optional:bool=False):
+        self.parent=parent
+        self.contains=contains
+        self.on_click=clickfunc #takes in the tile and optionsbar that called it, also takes the tile that was chosen if choose_tile is True.
+        self.choose_tile=choose_tile
+        self.active_choice:Tile|None=None
+        self.message=message #shown next to the choices, if the UI can draw it
+        self.optional=optional
+        self.anchored:bool=False
+        self.selected:Tile|None=None
+
+class Geometry():
+    '''Precomputed square tables for one board shape. Boards with the same width, height and void squares share a single Geometry, built the first time the shape is constructed.'''
+    cache:dict[tuple,Geometry]={}
+    DIRECTIONS:list[tuple[int,int]]=[(0,-1),(0,1),(-1,0),(1,0),(1,-1),(-1,-1),(-1,1),(1,1)] #forward, backward, left, right, then the diagonals in Movement.diagonals order
+
+    def __init__(self, width:int, height:int, voids:frozenset[int]):
+        self.width=width
+        self.height=height
+        self.voids=voids
+        self.coords:list[BoardCoord]=[(index%width,index//width) for index in range(width*height)] #square number to board coordinate
+        self.rays:dict[tuple[int,int],list[tuple[int,...]]]={step:[self._ray(index,step) for index in range(width*height)] for step in self.DIRECTIONS} #squares in each direction from each square, up to the edge or the first void
+        self.leaps:dict[tuple[int,int],list[tuple[tuple[int,...],...]]]={} #filled in by leaper()
+
+    @staticmethod
+    def of(board:Board) -> Geometry:
+        voids=frozenset(index for index, tile in enumerate(board.tiles) if tile != None and tile.base == "void")
+        key=(board.width,board.height,voids)
+        if key not in Geometry.cache:
+            Geometry.cache[key]=Geometry(board.width,board.height,voids)
+        return Geometry.cache[key]
+
+    def _ray(self, index:int, step:BoardCoord) -> tuple[int,...]:
+        result=[]
+        x, y=self.coords[index]
+        x+=step[0]
+        y+=step[1]
+        while 0 <= x < self.width and 0 <= y < self.height and y*self.width+x not in self.voids:
+            result.append(y*self.width+x)
+            x+=step[0]
+            y+=step[1]
+        return tuple(result)
+
+    def leaper(self, lenx:int, leny:int) -> list[tuple[tuple[int,...],...]]:
+        '''For each square, the squares a (lenx,leny) leaper lands on in each of its eight directions, in Movement.l_shape order. Each direction holds every repeat of the leap that stays on the board, so riders can take as many as they need. Voids are not landed on, but can be leapt over.'''
+        if (lenx,leny) not in self.leaps:
+            units=[(leny,lenx),(leny,-lenx),(-leny,lenx),(-leny,-lenx),(lenx,leny),(lenx,-leny),(-lenx,leny),(-lenx,-leny)]
+            table=[]
+            for index in range(self.width*self.height):
+                x, y=self.coords[index]
+                entry=[]
+                for step in units:
+                    leaps=[]
+                    i=1
+                    while (step[0] != 0 or step[1] != 0) and 0 <= x+step[0]*i < self.width and 0 <= y+step[1]*i < self.height:
+                        leaps.append((y+step[1]*i)*self.width+x+step[0]*i)
+                        i+=1
+                    entry.append(tuple(leaps))
+                table.append(tuple(entry))
+            self.leaps[(lenx,leny)]=table
+        return self.leaps[(lenx,leny)]
+
+class Board():
+    '''Everything to do with the state and management of boards. Drawing them is handled by basic.Board.'''
+    tile_class:type=Tile #what construct_layout fills the board with
+    use_bitboards:bool=True #keep a bitboard.Bitboards alongside the arrays on plain 8x8 boards
+    REBUILD_AFTER:int=6 #squares place_many() updates the bitboards for one at a time; past this, rebuilding them is quicker
+
+    def __init__(self, height:int, width:int, layout:list[str]=None, tile_dim:int=STD_TILEDIM, initpos:list[str]=None, piecesdict:dict[str,type]=None, custom_black_squares:list[BoardCoord]|None=None, grid:bool=False, grid_colour:Colour=(0,0,0), grid_width:int=2):
+        self.height=height #difference between highest and lowest point
+        self.width=width #difference between rightmost and leftmost point
+        self.layout:list[list[str]]=layout #specific tile layout. If None, a square is assumed. Numbers for full spaces, letters for empty ones.
+        self.initpos=initpos #a similar format to layout, with numbers indicating piceless squares and letters according to piecesdict indicating pieces
+        self.piecesdict=piecesdict#dictionary containing the pieces that go on the board, and the letters that represent them.
+        self.reversed={v: k for k, v in self.piecesdict.items()}
+        self.tile_dim=tile_dim
+        self.custom_black=custom_black_squares
+        self.draw_grid=grid
+        self.grid_colour=grid_colour
+        self.grid_width=grid_width
+        self.full_layout:BoardLayout=None #rows of Tiles, which are views onto the flat arrays below
+        self.tiles:list[Tile|None]=[] #the same Tiles, indexed by square number (y*width+x)
+        self.squares:list[Piece|None]=[] #the piece on each square. This is the source of truth.
+        self.codes:array=array("H") #kind<<2 | colour bits for each square, 0 if empty
+        self.flags:bytearray=bytearray() #VOID, LOCKED, MOVE_TARGET and CAPTURE_TARGET for each square
+        self.kinds:dict[type,int]={} #piece type to kind number, handed out as types are first placed
+        self.lines_cache:tuple[int,dict[tuple[int,int],int|float],bool]|None=None #for capture_lines(), with the number of kinds it was made from
+        self.geometry:Geometry|None=None #ray and leaper tables for this board's shape
+        self.bitboards:Bitboards|None=None #only on 8x8 boards without voids
+        self.active_options:OptionsBar|None=None #the active set of options, represented by an OptionsBar
+        self.turn:int=0
+        self.turn_number:int=0
+        self.pointless:int=0
+        self.teleport:list[tuple[BoardCoord,BoardCoord]]=[] #from where to where
+        self.zobrist:dict[int|tuple,list[int]]={} #Zobrist keys for each square: by code, for the codes placed so far, and by (name, type, value) for the piece states hashed so far
+        self.placement_hash:int=0 #Zobrist key of the pieces alone, kept up to date by place(). See Board.hash for the whole position
+        self.journal:list[tuple[int,Piece|None]]|None=None #each square place() changes and what was on it before, while make_move() is recording
+        self.__basevars__=copy.copy(self.__dict__)
+
+    def checker(self,num:int,coord):
+        return 0 if num%2 == 0 else 1
+
+    def custom(self,num,coord:BoardCoord):
+        return 1 if coord in self.custom_black else 0
+
+    def construct_layout(self):
+        '''Creates a list of lists representing the full board without intial pieces placed. Spaces with tiles are called "empty". For non-quadrilateral boards, non-tile spaces are called "void".'''
+        result=[]
+        count=0
+        tiler=self.checker
+        if self.custom_black != None:
+            tiler=self.custom
+        self.squares=[None]*(self.width*self.height)
+        self.codes=array("H",bytes(2*self.width*self.height))
+        self.flags=bytearray(self.width*self.height)
+        self.tiles=[None]*(self.width*self.height)
+        self.zobrist={}
+        self.placement_hash=0
+        if self.layout == None:
+            for y in range(self.height):
+                temp=[]
+                for x in range(self.width):
+                    temp.append(self.tile_class((x,y),"empty",None,self))
+                result.append(temp)
+        else:
+            for i in range(len(self.layout)):
+                temp=[]
+                x_count=0
+                for j in range(len(self.layout[i])):
+                    code=self.layout[i][j]
+                    if code in numbers:
+                        for k in range(int(code)):
+                            temp.append(self.tile_class((x_count,i),"empty",None,self,tiler(count,(x_count,i))))
+                            x_count += 1
+                            count += 1
+                    elif code in letters:
+                        for k in range(letters.index(code)):
+                            temp.append(self.tile_class((x_count+1,i+1),"void",None,self))
+                            x_count += 1
+                            count += 1
+                    else:
+                        raise TypeError(f"Invalid value: {code}")
+                count=i+1
+                result.append(temp)
+        for y, row in enumerate(result):
+            for x, tile in enumerate(row):
+                index=y*self.width+x
+                tile.view(self,index)
+                self.tiles[index]=tile
+                if tile.base == "void":
+                    self.flags[index]=VOID
+        self.full_layout=result
+        self.geometry=Geometry.of(self)
+        self.bitboards=None
+        if self.use_bitboards and self.width == 8 and self.height == 8 and not self.geometry.voids:
+            self.bitboards=Bitboards(self.squares)
+
+    def populate(self, custom_initpos:str|None=None):
+        '''Takes in a constructed board and populates it with pieces: the starting layout in initpos, or the position in a FEN (see modes/fen), which raises ValueError if it doesn't fit the board.'''
+        if custom_initpos != None:
+            from modes import fen #fen imports this module
+            fen.place(self,custom_initpos)
+            return
+        full_board=self.full_layout
+        if self.initpos != None and self.piecesdict != None:
+            for i in range(len(self.initpos)):
+                cur_pos=0
+                for code in self.initpos[i]:
+                    if code in numbers:
+                        cur_pos += int(code)
+                    elif code in self.piecesdict:
+                        full_board[i][cur_pos].piece=self.piecesdict[code]()
+                        full_board[i][cur_pos].piece.parent=full_board[i][cur_pos]
+                        full_board[i][cur_pos].piece.initpos=(cur_pos,i)
+                        cur_pos += 1
+                    else:
+                        raise TypeError(f"Invalid value: {code}")
+        self.full_layout=full_board
+
+    def scrub(self):
+        self.flags[:]=self.flags.translate(SCRUB_TABLE)
+        if self.active_options != None and self.active_options.optional:
+            self.active_options=None
+        self.teleport=[]
+
+    def progress_turn(self):
+        self.turn_number += 1
+        self.turn=self.turn_number%2
+
+    def get(self, coord:BoardCoord|int, coord2:int=None) -> Tile|Literal[False]:
+        '''Get a board tile using its board coordinates. Returns False if the Tile doesn't exist. Like list indexing, negative coordinates count from the other side.'''
+        if coord2 == None:
+            try:
+                x, y=coord
+            except (TypeError, ValueError):
+                raise TypeError(f"Cannot access board position based on these arguments: {coord},{coord2}")
+        else:
+            x, y=coord, coord2
+        if not (isinstance(x,int) and isinstance(y,int)):
+            raise TypeError(f"Cannot access board position based on these arguments: {coord},{coord2}")
+        if -self.width <= x < self.width and -self.height <= y < self.height:
+            tile=self.tiles[(y%self.height)*self.width+x%self.width]
+            if tile != None:
+                return tile
+        return False
+
+    def index(self, x:int, y:int) -> int:
+        '''The square number of a board coordinate, or -1 if it is off the board.'''
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y*self.width+x
+        return -1
+
+    def attack_maps(self) -> Bitboards|None:
+        '''The bitboards, if their attack maps cover every piece on the board (an 8x8 board holding only pieces with a role). Otherwise None, and attacks have to be found the slow way.'''
+        if self.bitboards != None and not self.bitboards.foreign:
+            return self.bitboards
+        return None
+
+    def code(self, piece:Piece|None) -> int:
+        '''The number stored in Board.codes for a piece: its kind in the high bits and its colour bits in the low two.'''
+        if piece == None:
+            return 0
+        kind=self.kinds.get(type(piece))
+        if kind == None:
+            kind=len(self.kinds)+1
+            self.kinds[type(piece)]=kind
+        return (kind<<2)|COLOUR_BITS.get(piece.colour,0)
+
+    def capture_lines(self) -> tuple[dict[tuple[int,int],int|float],bool]:
+        '''Every step that a type of piece on the board captures along, either way up, with the furthest any of them goes; and whether any type has no capture_pattern. Only worked out again when a new type of piece has been placed.'''
+        if self.lines_cache == None or self.lines_cache[0] != len(self.kinds):
+            lines={}
+            unregistered=False
+            for kind in self.kinds:
+                pattern=getattr(kind,"capture_pattern",None)
+                if pattern == None:
+                    unregistered=True
+                    continue
+                for step_x, step_y, limit in pattern:
+                    for step in ((step_x,step_y),(step_x,-step_y)):
+                        lines[step]=max(lines.get(step,0),limit)
+            self.lines_cache=(len(self.kinds),lines,unregistered)
+        return self.lines_cache[1], self.lines_cache[2]
+
+    def place(self, index:int, piece:Piece|None):
+        '''Put a piece (or nothing) on a square. Everything that changes the board goes through here.'''
+        if self.bitboards != None:
+            self.bitboards.place(index,self.squares[index],piece)
+        if self.journal != None:
+            self.journal.append((index,self.squares[index]))
+        old, new=self.codes[index], self.code(piece)
+        if old:
+            self.placement_hash^=self.zobrist[old][index]
+        if new:
+            keys=self.zobrist.get(new)
+            if keys == None:
+                keys=self.zobrist[new]=zobrist_keys(f"{type(piece).__module__}.{type(piece).__qualname__}/{new&3}",len(self.squares))
+            self.placement_hash^=keys[index]
+        self.squares[index]=piece
+        self.codes[index]=new
+
+    def place_many(self, changes:list[tuple[int,Piece|None]]):
+        '''place() each (square number, piece) pair. When more than REBUILD_AFTER squares change, the bitboards are worked out once at the end instead of after every square.'''
+        if self.bitboards == None or len(changes) <= Board.REBUILD_AFTER:
+            for index, piece in changes:
+                self.place(index,piece)
+            return
+        bitboards, self.bitboards=self.bitboards, None
+        try:
+            for index, piece in changes:
+                self.place(index,piece)
+        finally:
+            self.bitboards=bitboards
+            bitboards.rebuild()
+
+    @property
+    def hash(self) -> int:
+        '''Zobrist key of the position, for transposition tables, repetitions and checking two boards agree. Covers the pieces, the side to move, each piece's undo_state (castling and en passant rights among it), a pending OptionsBar and the mode's extras, such as submove or select_again.'''
+        size=len(self.squares)
+        key=self.placement_hash^zobrist_keys(f"turn={self.turn}",1)[0]
+        if self.active_options != None:
+            key^=zobrist_keys("options",1)[0]
+        zobrist=self.zobrist
+        for index, piece in enumerate(self.squares):
+            if piece != None and piece.undo_state:
+                state=piece.__dict__
+                for name in piece.undo_state:
+                    value=state.get(name)
+                    if value is not None and value is not False and isinstance(value,(int,str)):
+                        keys=zobrist.get((name,type(value),value))
+                        if keys == None:
+                            keys=zobrist[(name,type(value),value)]=zobrist_keys(f"{name}={value!r}",size)
+                        key^=keys[index]
+        for var, value in self.__dict__.items():
+            if var in self.__basevars__:
+                continue
+            if isinstance(value,Tile):
+                key^=zobrist_keys(var,size)[value.index]
+            elif isinstance(value,(int,str)):
+                key^=zobrist_keys(f"{var}={value!r}",1)[0]
+        return key
+
+    def get_matching(self, match:Callable[[Tile],bool]) -> list[Tile]:
+        result=[]
+        for tile in self.tiles:
+            if tile != None and match(tile) and tile.colour != None:
+                result.append(tile)
+        return result
+
+    def get_layout(self) -> dict[BoardCoord|str,Piece]:
+        result={}
+        for row in self.full_layout:
+            for tile in row:
+                if isinstance(tile.piece,Piece):
+                    result[tile.boardpos]=copy.copy(tile.piece)
+        result["turn"]=copy.copy(self.turn)
+        result["turn_number"]=copy.copy(self.turn_number)
+        for var in self.__dict__:
+            if var not in self.__basevars__:
+                result[var]=getattr(self,var)
+        return result
+
+    def restore(self, layout:dict[BoardCoord|str,Piece]):
+        for y, row in enumerate(self.full_layout):
+            for x in range(len(row)):
+                if (x,y) in layout:
+                    piece=layout[(x,y)]
+                    tile=self.get(x,y)
+                    tile.piece=piece
+                    piece.parent=tile
+                else:
+                    self.get(x,y).piece=None
+        for key in layout:
+            if isinstance(key,str):
+                setattr(self,key,layout[key])
+
+    def make_move(self, move:tuple[BoardCoord,BoardCoord]|tuple[BoardCoord,BoardCoord,int|None], game:HeadlessGame, select:bool=True) -> UndoRecord:
+        '''Play a move as HeadlessGame.play() does (select is passed on), choosing from the OptionsBar it brings up if the move has a third item. Returns what unmake_move() needs to take it back: the squares that changed, the pieces whose undo_state changed and the board's own state, rather than a copy of everything like get_layout().'''
+        pieces=[(piece,piece.parent,piece.save_state()) for piece in self.squares if piece != None]
+        extras=tuple((var,copy.copy(value) if isinstance(value,list) else value) for var, value in self.__dict__.items() if var not in self.__basevars__)
+        state=(self.turn,self.turn_number,self.pointless,self.active_options,self.teleport,extras)
+        self.journal=[]
+        try:
+            game.play(move[0],move[1],select)
+            if len(move) > 2 and move[2] != None:
+                game.choose(move[2])
+        finally:
+            changed, self.journal=self.journal, None
+        return changed, [entry for entry in pieces if entry[0].parent is not entry[1] or entry[0].save_state() != entry[2]], state
+
+    def unmake_move(self, record:UndoRecord):
+        '''Take back a make_move(), which must be the last one made.'''
+        changed, pieces, state=record
+        for index, piece in reversed(changed):
+            self.place(index,piece)
+        for piece, parent, saved in pieces:
+            piece.parent=parent
+            piece.load_state(saved)
+        self.scrub()
+        self.turn, self.turn_number, self.pointless, self.active_options, self.teleport, extras=state
+        for var, value in extras:
+            setattr(self,var,value)
+
+class Movement():
+    '''Generators for squares a piece can move to. They index the Board's flat arrays directly rather than going through Board.get().'''
+    @staticmethod
+    def out_of_bounds(board:list[list[str]], coord:Coord) -> bool:
+        '''Check if a coordinate is outside the bounds of the board'''
+        try:
+            if board[coord[1]][coord[0]] != "void" and copysign(1,coord[0]) != -1 and copysign(1,coord[1]) != -1:
+                return False
+            else:
+                return True
+        except IndexError:
+            return True
+        except:
+            raise
+        
+    @staticmethod
+    def to_list(gen:Iterable) -> list:
+        '''Convert a movement generator to a list'''
+        return [entry for entry in gen]
+    
+    @staticmethod
+    def line(dir:int, step:int, max:int, limit:int, coord:BoardCoord, game:Game) -> Generator:
+        board=game.board
+        width=board.width
+        if not board.squares[coord[1]*width+coord[0]].belongs_to(board.turn):
+            return
+        codes, flags, geometry=board.codes, board.flags, board.geometry
+        coords=geometry.coords
+        ray=geometry.rays[(step,0) if dir == 0 else (0,step)][coord[1]*width+coord[0]]
+        n=len(ray)
+        span=(max-coord[dir])*step #squares left before passing max, if it is ahead of us
+        if 0 <= span < n:
+            n=span
+        if limit < n:
+            n=limit
+        for index in ray[:n]:
+            if codes[index]:
+                return
+            if not flags[index]&LOCKED:
+                yield coords[index]
+    
+    @staticmethod
+    def diagonal(step_x:int, step_y:int, max_x:int, max_y:int, limit:int, coord:BoardCoord, game:Game) -> Generator:
+        board=game.board
+        width=board.width
+        if not board.squares[coord[1]*width+coord[0]].belongs_to(board.turn):
+            return
+        codes, flags, geometry=board.codes, board.flags, board.geometry
+        coords=geometry.coords
+        step_x=1 if step_x >= 0 else -1
+        step_y=1 if step_y >= 0 else -1
+        ray=geometry.rays[(step_x,step_y)][coord[1]*width+coord[0]]
+        n=len(ray)
+        span=(max_x-coord[0])*step_x
+        if 0 <= span < n:
+            n=span
+        span=(max_y-coord[1])*step_y
+        if 0 <= span < n:
+            n=span
+        if limit < n:
+            n=limit
+        for index in ray[:n]:
+            if codes[index]:
+                return
+            if not flags[index]&LOCKED:
+                yield coords[index]
+    
+    @staticmethod
+    def skip_entries(limit:int, jump_value:int, original:Iterable) -> Generator:
+        '''Yields every nth entry, where n is jump_value'''
+        count=1
+        for coord in original:
+            if (count % jump_value) == 0 and count != (limit+1):
+                yield coord
+            count+=1
+        return
+
+    @staticmethod
+    def compound(maxx:int, maxy:int, limitx:int, limity:int, coord:BoardCoord, genx:Callable, geny:Callable, game:Game) -> Generator:
+        '''Take the x values from genx and the y values from geny'''
+        list1=Movement.to_list(genx(maxx,limitx,coord,game))
+        list2=Movement.to_list(geny(maxy,limity,coord,game))
+        for i in range(min(len(list1),len(list2))):
+            yield list1[i][0], list2[i][1]
+
+    @staticmethod
+    def orthogonals(maxes:tuple[int,int,int,int], limits:tuple[int,int,int,int], coord:BoardCoord, game:Game) -> Generator:
+        '''Forward, backward, left, right, in that order'''
+        if game.board.bitboards != None and maxes == (0,7,0,7) and min(limits) >= 7:
+            return game.board.bitboards.slide_moves(coord,ORTHOGONALS,game.board)
+        return itertools.chain(Movement.line(1,-1,maxes[0],limits[0],coord,game),Movement.line(1,1,maxes[1],limits[1],coord,game),Movement.line(0,-1,maxes[2],limits[2],coord,game),Movement.line(0,1,maxes[3],limits[3],coord,game))
+
+    @staticmethod
+    def diagonals(maxes:tuple[int,int,int,int], limits:tuple[int,int,int,int], coord:BoardCoord, game:Game) -> Generator:
+        '''Inputs: top, bottom, left, right\n
+        Outputs: top-right, top-left, bottom-left, bottom-right'''
+        if game.board.bitboards != None and maxes == (0,7,0,7) and min(limits) >= 7:
+            return game.board.bitboards.slide_moves(coord,DIAGONALS,game.board)
+        return itertools.chain(Movement.diagonal(1,-1,maxes[3],maxes[0],limits[0],coord,game),Movement.diagonal(-1,-1,maxes[2],maxes[0],limits[1],coord,game),Movement.diagonal(-1,1,maxes[2],maxes[1],limits[2],coord,game),Movement.diagonal(1,1,maxes[3],maxes[1],limits[3],coord,game))
+    
+    @staticmethod
+    def l_shape(max:tuple[int,int,int,int], limit:int, coord:BoardCoord, game:Game, lenx:int, leny:int) -> Generator:
+        '''Maxes are forward, backward, left, right, in that order.'''
+        board=game.board
+        width=board.width
+        if not board.squares[coord[1]*width+coord[0]].belongs_to(board.turn):
+            return
+        codes, flags, coords=board.codes, board.flags, board.geometry.coords
+        for leaps in board.geometry.leaper(lenx,leny)[coord[1]*width+coord[0]]:
+            for _, index in zip(range(limit),leaps):
+                next_x, next_y=coords[index]
+                if max[2] <= next_x <= max[3] and max[0] <= next_y <= max[1] and not codes[index] and not flags[index]&(VOID|LOCKED):
+                    yield (next_x,next_y)
+
+    @staticmethod
+    def anywhere(game:Game, coord:BoardCoord):
+        board=game.board
+        if not board.squares[coord[1]*board.width+coord[0]].belongs_to(board.turn):
+            return
+        codes, flags=board.codes, board.flags
+        for index, tile in enumerate(board.tiles):
+            if tile != None and not codes[index] and not flags[index]&LOCKED:
+                yield tile.boardpos
+
+    @staticmethod
+    def from_list(game:Game, origin:Coord, coords:list[BoardCoord], limits:tuple[int,int,int,int]=(0,7,0,7)):
+        '''Limits go forward, backward, left, right'''
+        board=game.board
+        if not board.squares[origin[1]*board.width+origin[0]].belongs_to(board.turn):
+            return
+        for coord in coords:
+            target=(origin[0]-coord[0],origin[1]-coord[1])
+            if limits[0] <= target[1] <= limits[1] and limits[2] <= target[0] <= limits[3]:
+                index=board.index(*target)
+                if index != -1 and board.tiles[index] != None and not board.codes[index]:
+                    yield target
+
+class Capture():
+    '''Generators for squares a piece can capture on. With hypo, they also return the empty and friendly squares the piece is attacking.'''
+    @staticmethod
+    def line(dir:int, step:int, max:int, limit:int, coord:BoardCoord, game:Game, col:int, hypo:bool=False) -> Generator:
+        board=game.board
+        width=board.width
+        if not board.squares[coord[1]*width+coord[0]].belongs_to(board.turn) and not hypo:
+            return
+        codes, flags=board.codes, board.flags
+        geometry=board.geometry
+        coords=geometry.coords
+        bit=OWN_BITS.get(col,0)
+        ray=geometry.rays[(step,0) if dir == 0 else (0,step)][coord[1]*width+coord[0]]
+        n=len(ray)
+        span=(max-coord[dir])*step #squares left before passing max, if it is ahead of us
+        if 0 <= span < n:
+            n=span
+        if limit < n:
+            n=limit
+        for index in ray[:n]:
+            code=codes[index]
+            if code:
+                if (hypo or (code&3 != 3 and not code&bit)) and not flags[index]&LOCKED:
+                    yield coords[index]
+                return
+            if hypo and not flags[index]&LOCKED:
+                yield coords[index]
+    
+    @staticmethod
+    def diagonal(step_x:int, step_y:int, max_x:int, max_y:int, limit:int, coord:BoardCoord, game:Game, col:int, hypo:bool=False) -> Generator:
+        board=game.board
+        width=board.width
+        if not board.squares[coord[1]*width+coord[0]].belongs_to(board.turn) and not hypo:
+            return
+        codes, flags=board.codes, board.flags
+        geometry=board.geometry
+        coords=geometry.coords
+        bit=OWN_BITS.get(col,0)
+        step_x=1 if step_x >= 0 else -1
+        step_y=1 if step_y >= 0 else -1
+        ray=geometry.rays[(step_x,step_y)][coord[1]*width+coord[0]]
+        n=len(ray)
+        span=(max_x-coord[0])*step_x
+        if 0 <= span < n:
+            n=span
+        span=(max_y-coord[1])*step_y
+        if 0 <= span < n:
+            n=span
+        if limit < n:
+            n=limit
+        for index in ray[:n]:
+            code=codes[index]
+            if code:
+                if (hypo or (code&3 != 3 and not code&bit)) and not flags[index]&LOCKED:
+                    yield coords[index]
+                return
+            if hypo and not flags[index]&LOCKED:
+                yield coords[index]
+
+    @staticmethod
+    def compound(maxx:int, maxy:int, limitx:int, limity:int, coord:BoardCoord, genx:Callable, geny:Callable, game:Game, col:int, hypo:bool=False) -> Generator:
+        '''Take the x values from genx and the y values from geny'''
+        list1=Movement.to_list(genx(maxx,limitx,coord,game,col,hypo))
+        list2=Movement.to_list(geny(maxy,limity,coord,game,col,hypo))
+        for i in range(min(len(list1),len(list2))):
+            yield list1[i][0], list2[i][1]
+
+    @staticmethod
+    def orthogonals(maxes:tuple[int,int,int,int], limits:tuple[int,int,int,int], coord:BoardCoord, game:Game, col:int, hypo:bool=False) -> Generator:
+        '''Forward, backward, left, right, in that order'''
+        if game.board.bitboards != None and maxes == (0,7,0,7) and min(limits) >= 7:
+            return game.board.bitboards.slide_captures(coord,ORTHOGONALS,game.board,col,hypo)
+        return itertools.chain(Capture.line(1,-1,maxes[0],limits[0],coord,game,col,hypo),Capture.line(1,1,maxes[1],limits[1],coord,game,col,hypo),Capture.line(0,-1,maxes[2],limits[2],coord,game,col,hypo),Capture.line(0,1,maxes[3],limits[3],coord,game,col,hypo))
+
+    @staticmethod
+    def diagonals(maxes:tuple[int,int,int,int], limits:tuple[int,int,int,int], coord:BoardCoord, game:Game, col:int, hypo:bool=False) -> Generator:
+        '''Inputs: top, bottom, left, right\n
+        Outputs: top-right, top-left, bottom-left, bottom-right'''
+        if game.board.bitboards != None and maxes == (0,7,0,7) and min(limits) >= 7:
+            return game.board.bitboards.slide_captures(coord,DIAGONALS,game.board,col,hypo)
+        return itertools.chain(Capture.diagonal(1,-1,maxes[3],maxes[0],limits[0],coord,game,col,hypo),Capture.diagonal(-1,-1,maxes[2],maxes[0],limits[1],coord,game,col,hypo),Capture.diagonal(-1,1,maxes[2],maxes[1],limits[2],coord,game,col,hypo),Capture.diagonal(1,1,maxes[3],maxes[1],limits[3],coord,game,col,hypo))
+    
+    @staticmethod
+    def l_shape(max:tuple[int,int,int,int], limit:int, coord:BoardCoord, game:Game, lenx:int, leny:int, col:int, hypo:bool=False) -> Generator:
+        '''Maxes are forward, backward, left, right, in that order.'''
+        board=game.board
+        width=board.width
+        if not board.squares[coord[1]*width+coord[0]].belongs_to(board.turn) and not hypo:
+            return
+        codes, flags=board.codes, board.flags
+        coords=board.geometry.coords
+        bit=OWN_BITS.get(col,0)
+        for leaps in board.geometry.leaper(lenx,leny)[coord[1]*width+coord[0]]:
+            for _, index in zip(range(limit),leaps):
+                next_x, next_y=coords[index]
+                if max[2] <= next_x <= max[3] and max[0] <= next_y <= max[1] and not flags[index]&VOID:
+                    code=codes[index]
+                    enemy=code and code&3 != 3 and not code&bit
+                    if (enemy or hypo) and not flags[index]&LOCKED:
+                        yield (next_x,next_y)
+                        if enemy:
+                            break
+
+    @staticmethod
+    def anywhere(game:Game, col:int, coord:BoardCoord, hypo:bool=False):
+        board=game.board
+        if not board.squares[coord[1]*board.width+coord[0]].belongs_to(board.turn) and not hypo:
+            return
+        codes, flags=board.codes, board.flags
+        bit=OWN_BITS.get(col,0)
+        for index, tile in enumerate(board.tiles):
+            code=codes[index]
+            if tile != None and code and code&3 != 3 and not code&bit and not flags[index]&LOCKED:
+                yield tile.boardpos
+
+    @staticmethod
+    def from_list(game:Game, origin:Coord, coords:list[BoardCoord], col:int, hypo:bool=False, limits:tuple[int,int,int,int]=(0,7,0,7)):
+        board=game.board
+        if not board.squares[origin[1]*board.width+origin[0]].belongs_to(board.turn):
+            return
+        bit=OWN_BITS.get(col,0)
+        for coord in coords:
+            target=(origin[0]-coord[0],origin[1]-coord[1])
+            if limits[0] <= target[1] <= limits[1] and limits[2] <= target[0] <= limits[3]:
+                index=board.index(*target)
+                if index != -1 and board.tiles[index] != None:
+                    code=board.codes[index]
+                    if (code and code&3 != 3 and not code&bit) or (hypo and not code):
+                        yield target
+
+BRICK_WALL=Piece("Brick Wall",-1,-1,join(PCS_IMG_DIR,"pawn_w.png"))
+class Rules():
+    '''Gamerules that can be altered or used unchanged depending on the gamemode's requirements. Includes win conditions and check-like conditions (more generally, functions that return the list of board positions to lock)'''
+    @staticmethod
+    def win(game:Game, target:list[Piece]=[]) -> tuple[list[BoardCoord],bool,str]:
+        '''A generalisation of checkmate. Returns whether or not a win has occurred, and which side has won. Is checkmate by default. pieces is a list of movable Pieces.'''
+        '''If the piece is in check, it can be unchecked by movement, occulsion or capturing the checking piece. If the piece has no possible moves, none of your pieces can move to occlusion squares, and none of your pieces can capture the checking piece, checkmate is reached.'''
+        info=Rules.lock(game,True,target)
+        colour=game.board.turn
+        if info == []:
+            return [], False, game.board.turn
+        if info == None:
+            return [], None, -1
+        if game.board.pointless > 75: #a draw, but the selected piece's locks (pins included) still stand
+            return info[0] if isinstance(info,tuple) else [], None, -1
+        if info == True:
+            return [], True, colour
+        locked, squares_to_occlude, possible_moves, attacking_pieces, target=info
+        squares_to_occlude=denest(squares_to_occlude,1)
+        yourpieces=[tile.piece for tile in game.board.get_matching(lambda t: True if t.piece != None and t.piece.belongs_to(colour) else False)]
+
+        if info != None:
+            if possible_moves != []: #check if no possible moves. If there are none, proceed to next check
+                return locked, False, colour
+            elif Rules.legal_maps(game,target) == None: #with attack maps, possible_moves already holds every legal move, pins included
+                your_capture_squares:list[BoardCoord]=[]
+                your_move_squares:list[BoardCoord]=[]
+                for piece in yourpieces:
+                    your_move_squares.extend(piece.moves(game))
+                    your_capture_squares.extend(piece.capture_squares(game))
+                for square in your_move_squares:
+                    if square in squares_to_occlude:
+                        possible_moves.append(square)
+                for square in your_capture_squares:
+                    if square in attacking_pieces:
+                        possible_moves.append(square)
+
+        if possible_moves == []:
+            return locked, True, colour
+        else:
+            return locked, False, colour
+        
+    @staticmethod
+    def gen_capture_squares(game:Game, pcs:list[Piece]) -> list[BoardCoord]:
+        '''Return the list of squares that the specified pieces can currently capture on'''
+        squares:list[BoardCoord]=[]
+        for piece in pcs:
+            temp=piece.capture_squares(game,True)
+            if temp != None:
+                squares.extend(piece.capture_squares(game,True))
+        return squares
+    
+    @staticmethod
+    def gen_move_squares(game:Game, pcs:list[Piece]) -> list[BoardCoord]:
+        '''Return the list of squares that the specified pieces can currently capture on'''
+        squares:list[BoardCoord]=[]
+        for piece in pcs:
+            temp=piece.moves(game)
+            if temp != None:
+                squares.extend(piece.moves(game))
+        return squares
+
+    @staticmethod
+    def lock(game:Game, returnall:bool=False, target:list[Piece]=[]):
+        '''A generalisation of checks. Returns a list of board positions to lock down. Is check by default. Takes around one hundredth of a second to complete with check, and half that without check, so it chould be fine to call a lot.'''
+        '''Entering check:
+        The King is in check if any piece can capture it. This is detected by calling Piece.capture_squares() on every piece and seeing if the King is in one of them. Alternatively, a virtual copy of every piece could be instantiated on the King's position, then their moves detected. If a piece can capture the same type of piece (assuming move and capture symmetry), the King is in check. This is faster but mentally costlier. It is also less general, not applying in variants where moves and captures are not symmetrical across positions and/or colours. The first solution will be implemented.'''
+        '''Squares that can be moved to during check:
+        Check is exited if the King moves into an un-attacked square, if the attacking piece is blocked, or if the attaking piece is captured. Thus, the squares that can be moved to are the safe moves for the checked piece, line-of-sight squares of all the attacking pieces, and the attacking piece itself.'''
+
+        colour=game.board.turn
+        royals=game.board.get_matching(lambda t: True if t.piece != None and t.piece.royal and t.piece.belongs_to(colour) else False)
+        if target != []:
+            royals=target
+        if royals == []:
+            return True
+        target=royals[0].piece
+        maps=Rules.legal_maps(game,target)
+        if maps != None:
+            return Rules.legal_lock(game,maps,target,returnall)
+        check=False #whether the target is in check
+        possible_moves=target.moves(game) #the target's possible moves when not checked
+        attacking_pieces:list[Piece]=[] #the pieces attacking the target
+        not_locked=[] #board spaces that are not locked
+        yourpieces=[tile.piece for tile in game.board.get_matching(lambda t: True if t.piece != None and t.piece.belongs_to(target.colour) else False)]
+        your_moves=Rules.gen_move_squares(game, yourpieces) + Rules.gen_capture_squares(game, yourpieces)
+
+        enemypieces=[tile.piece for tile in game.board.get_matching(lambda t: True if t.piece != None and not t.piece.belongs_to(target.colour) else False)]
+        for piece in enemypieces: #check if the target is in check and which pieces are checking it
+            for square in piece.capture_squares(game,True):
+                if game.board.get(square).piece == target:
+                    check=True
+                    attacking_pieces.append(piece)
+     
+        if not check and your_moves != []:
+            return []
+        elif not check and your_moves == []:
+            return None
+        else:
+            not_locked.extend(target.moves(game)) #squares the target can move to are not locked (obviously)
+
+            if len(attacking_pieces) == 1:
+                not_locked.append(attacking_pieces[0].parent.boardpos) #if only one piece is attacking, it can be captured to end the check.
+
+            occlude=[]
+            '''
+            Each attacking piece can be blocked on the squares of its line of sight to the target: the squares between them that are a whole step of the line apart, as long as the piece can see them at all (a knight's L has no such squares, a rook's file does). Occlude is a list of sets, one for each attacking piece. If there is only one attacking piece, occluding any of its squares can block the check. Otherwise, only sqaures belonging to all the attacking pieces can be occluded to block the check. This is accomplished using set intersection.
+            '''
+            target_pos=target.parent.boardpos
+            for piece in attacking_pieces:
+                occlude.append(set(Rules.line_of_sight(game,piece,target_pos)))
+            if len(attacking_pieces) != 1:
+                real_occlude=occlude[0]
+                for line in occlude:
+                    real_occlude=real_occlude&line
+                occlude=real_occlude
+                not_locked.extend(list(occlude))
+            else:
+                not_locked.extend(list(occlude[0]))
+
+            not_locked=set(not_locked)
+            result=[tile.boardpos for tile in game.board.tiles if tile.boardpos not in not_locked]
+            if not returnall:
+                return result
+            else:
+                return (result, [list(line) for line in occlude], possible_moves, [piece.parent.boardpos for piece in attacking_pieces], target)
+
+    @staticmethod
+    def line_of_sight(game:Game, piece:Piece, target_pos:BoardCoord) -> list[BoardCoord]:
+        '''The squares between a piece and a square it attacks that would block the attack if filled: the steps of the straight line between them, where the piece can see them.'''
+        start=piece.parent.boardpos
+        dx, dy=target_pos[0]-start[0], target_pos[1]-start[1]
+        steps=gcd(dx,dy)
+        if steps <= 1:
+            return []
+        seen=set(piece.capture_squares(game,True))
+        squares=[(start[0]+dx//steps*n,start[1]+dy//steps*n) for n in range(1,steps)]
+        return [square for square in squares if square in seen]
+
+    @staticmethod
+    def legal_maps(game:Game, target:Piece) -> Bitboards|None:
+        '''The board's bitboards, if lock() can use their legal move generation for the target: the board has attack maps and the target is a king.'''
+        maps=game.board.attack_maps()
+        if maps == None or target.role != "king" or target.colour not in (0,1) or target.colour != game.board.turn:
+            return None
+        return maps
+
+    @staticmethod
+    def legal_lock(game:Game, maps:Bitboards, target:Piece, returnall:bool=False):
+        '''lock() from one legal move generation on the bitboards, with the same results. Pins are handled as well: if a piece of the side to move is selected, everything but its legal moves is locked, which also stops it from uncovering a check (en passant along the king's row, say). With returnall, possible_moves is every legal move's destination, so win() needs nothing more to tell checkmate from check.'''
+        board=game.board
+        colour=target.colour
+        king=target.parent.index
+        legal=maps.legal_moves(colour)
+        checkers, block=maps.check_info(colour)[:2]
+        selected=getattr(game,"selected",None)
+        start=selected.index if selected != None and selected.piece != None and selected.piece.belongs_to(colour) else None
+        if legal == [] and not checkers:
+            return None
+        if not checkers and start == None:
+            return []
+        if start != None:
+            allowed={board.tiles[end].boardpos for begin, end in legal if begin == start}
+        else:
+            allowed={board.tiles[end].boardpos for begin, end in legal if begin == king}|set(to_coords(block))
+        result=[tile.boardpos for tile in board.tiles if tile.boardpos not in allowed]
+        if not returnall:
+            return result
+        attackers=to_indexes(checkers)
+        occlude=[to_coords(block&~checkers)] if len(attackers) == 1 else [[]]
+        return (result, occlude, [board.tiles[end].boardpos for begin, end in legal], [board.tiles[square].boardpos for square in attackers], target)
+            
+    @staticmethod
+    def is_attacked(game:Game, square:BoardCoord, by_colour:int|str, ignore:BoardCoord|None=None, royals:bool=True) -> bool:
+        '''Whether a piece of by_colour could capture on square, if there was something there to capture. ignore is a square to treat as empty, such as the one a king is stepping off.'''
+        return Rules.attacked_among(game,[square],by_colour,ignore,royals) != []
+
+    @staticmethod
+    def attacked_among(game:Game, squares:Iterable[BoardCoord], by_colour:int|str, ignore:BoardCoord|None=None, royals:bool=True) -> list[BoardCoord]:
+        '''The squares that is_attacked(). Instead of asking every enemy piece for its capture squares, this looks backwards from each square along the lines of the capture_pattern of the piece types on the board, and checks the first piece met on each. On boards with attack maps it is a lookup in those.
+        Pieces with no capture_pattern still have to be asked, once for all the squares. royals=False leaves the royal ones among them out, for royal pieces that would otherwise end up asking each other.'''
+        board=game.board
+        squares=[square for square in squares if board.index(*square) != -1]
+        ignored=board.index(*ignore) if ignore != None else -1
+        maps=board.attack_maps()
+        if maps != None and by_colour in (0,1):
+            occupied=maps.occupied&~(1<<ignored) if ignored != -1 else None
+            return [square for square in squares if maps.attacked(square[1]*8+square[0],by_colour,occupied)]
+        lines, unregistered=board.capture_lines()
+        asked=set()
+        if unregistered:
+            lifted=board.squares[ignored] if ignored != -1 else None
+            if lifted != None:
+                board.place(ignored,None)
+            for piece in board.squares:
+                if piece != None and piece.colour == by_colour and piece.capture_pattern == None and (royals or not piece.royal):
+                    asked.update(piece.capture_squares(game,True) or [])
+            if lifted != None:
+                board.place(ignored,lifted)
+        return [square for square in squares if square in asked or Rules.attacked_along(board,square,by_colour,lines,ignored)]
+
+    @staticmethod
+    def attacked_along(board:Board, square:BoardCoord, by_colour:int|str, lines:dict[tuple[int,int],int|float], ignored:int=-1) -> bool:
+        '''Walk back from square along each line, and see if the first piece in the way is one of by_colour's that captures along it from that far.'''
+        width, height, pieces, flags=board.width, board.height, board.squares, board.flags
+        for (step_x, step_y), limit in lines.items():
+            x, y=square[0]-step_x, square[1]-step_y
+            distance=1
+            while distance <= limit and 0 <= x < width and 0 <= y < height:
+                index=y*width+x
+                if flags[index]&VOID:
+                    break
+                piece=pieces[index]
+                if piece != None and index != ignored:
+                    if piece.colour == by_colour and piece.capture_pattern != None:
+                        flip=-1 if piece.colour == 1 else 1
+                        for pattern_x, pattern_y, reach in piece.capture_pattern:
+                            if pattern_x == step_x and pattern_y*flip == step_y and distance <= reach:
+                                return True
+                    break
+                x-=step_x
+                y-=step_y
+                distance+=1
+        return False
+
+    @staticmethod
+    def interpret():
+        pass
+
+
+class Info():
+    '''What the almanac says about a mode or a piece. img and img_bg are pictures (a file, or whatever the UI can draw) or, for img_bg, a Colour; basic.Page lays the page out.'''
+    def __init__(self, name:str, abstract:str, info:str, img:str|object, img_bg:str|Colour|object, covers:Literal["mode","piece"], links:list[Info]=None, internal_name:str=None):
+        self.name=name
+        self.internal_name=internal_name
+        self.abstract=abstract
+        self.body=info
+        self.covers=covers
+        self.img=img
+        self.img_bg=img_bg
+        self.links=links
+        self._image=None #the picture the UI puts together from img and img_bg, once asked for
+
+    def set_links(self, links:list[Info]):
+        self.links=links
+
+print('Module "rules" (headless game rules) loaded.')
@@ -1,17 +1,23 @@
 '''Gamemode: occidental standard chess'''
-from modes.basic import *
-from pygame import *
+from modes.rules import *
 from math import inf
 from functools import partial
+from modes.bitboard import to_coords
 m=Movement
 c=Capture
-font.init()
+ORTHOGONAL_LINES=[(0,-1,inf),(0,1,inf),(-1,0,inf),(1,0,inf)] #capture patterns, see Piece.capture_pattern
+DIAGONAL_LINES=[(1,-1,inf),(-1,-1,inf),(-1,1,inf),(1,1,inf)]
+KNIGHT_LEAPS=[(1,2,1),(-1,2,1),(1,-2,1),(-1,-2,1),(2,1,1),(2,-1,1),(-2,1,1),(-2,-1,1)]
+KING_STEPS=[(x,y,1) for x, y, limit in ORTHOGONAL_LINES+DIAGONAL_LINES]
 
 def promote(source:Tile, options:OptionsBar):
     options.parent.parent.piece=source.piece
     source.piece.parent=options.parent.parent
 
 class WhitePawn(Piece):
+    role="pawn"
+    capture_pattern=[(-1,-1,1),(1,-1,1)]
+
     def __init__(self):
         super().__init__("Pawn",1,0,join(PCS_IMG_DIR,"pawn_w.png"))
         self.en_passantable=False
@@ -40,12 +46,12 @@ class WhitePawn(Piece):
             right=False
         if left:
             target=game.board.full_layout[self.parent.boardpos[1]][self.parent.boardpos[0]-1].piece
-            if isinstance(target,Piece) and target.name == "Pawn" and target.en_passantable:
+            if isinstance(target,Piece) and target.name == "Pawn" and target.en_passantable and not target.parent.locked:
                 temp=itertools.chain(temp,[target.parent.boardpos])
                 #game.board.arrows.append(Arrow(game.board.board_to_coord((target.parent.boardpos[0],target.parent.boardpos[1])),game.board.board_to_coord((target.parent.boardpos[0],target.parent.boardpos[1]-1))))
         if right:
             target=game.board.full_layout[self.parent.boardpos[1]][self.parent.boardpos[0]+1].piece
-            if isinstance(target,Piece) and target.name == "Pawn" and target.en_passantable:
+            if isinstance(target,Piece) and target.name == "Pawn" and target.en_passantable and not target.parent.locked:
                 temp=itertools.chain(temp,[target.parent.boardpos])
                 #game.board.arrows.append(Arrow(game.board.board_to_coord((target.parent.boardpos[0],target.parent.boardpos[1])),game.board.board_to_coord((target.parent.boardpos[0],target.parent.boardpos[1]-1))))
         return temp
@@ -67,22 +73,22 @@ class WhitePawn(Piece):
             self.get_options()
 
     def get_options(self) -> OptionsBar:
-        queen_tile=Tile((0,0),"empty",Rect(0,0,0,0),self,None)
+        queen_tile=Tile((0,0),"empty",None,self,None)
         if self.colour == 0:
             queen_tile.piece=WhiteQueen()
         else:
             queen_tile.piece=BlackQueen()
-        rook_tile=Tile((0,0),"empty",Rect(0,0,0,0),self,None)
+        rook_tile=Tile((0,0),"empty",None,self,None)
         if self.colour == 0:
             rook_tile.piece=WhiteRook()
         else:
             rook_tile.piece=BlackRook()
-        bishop_tile=Tile((0,0),"empty",Rect(0,0,0,0),self,None)
+        bishop_tile=Tile((0,0),"empty",None,self,None)
         if self.colour == 0:
             bishop_tile.piece=WhiteBishop()
         else:
             bishop_tile.piece=BlackBishop()
-        knight_tile=Tile((0,0),"empty",Rect(0,0,0,0),self,None)
+        knight_tile=Tile((0,0),"empty",None,self,None)
         if self.colour == 0:
             knight_tile.piece=WhiteKnight()
         else:
@@ -90,6 +96,9 @@ class WhitePawn(Piece):
         self.parent.propagate_options(OptionsBar(self, [queen_tile,rook_tile,bishop_tile,knight_tile],promote))
     
 class BlackPawn(Piece):
+    role="pawn"
+    capture_pattern=[(-1,-1,1),(1,-1,1)]
+
     def __init__(self):
         super().__init__("Pawn",1,1,join(PCS_IMG_DIR,"pawn_b.png"))
         self.en_passantable=False
@@ -119,12 +128,12 @@ class BlackPawn(Piece):
             right=False
         if left:
             target=game.board.full_layout[self.parent.boardpos[1]][self.parent.boardpos[0]-1].piece
-            if isinstance(target,Piece) and target.name == "Pawn" and target.en_passantable:
+            if isinstance(target,Piece) and target.name == "Pawn" and target.en_passantable and not target.parent.locked:
                 temp=itertools.chain(temp,[target.parent.boardpos])
                 #game.board.arrows.append(Arrow(game.board.board_to_coord((target.parent.boardpos[0],target.parent.boardpos[1])),game.board.board_to_coord((target.parent.boardpos[0],target.parent.boardpos[1]+1))))
         if right:
             target=game.board.full_layout[self.parent.boardpos[1]][self.parent.boardpos[0]+1].piece
-            if isinstance(target,Piece) and target.name == "Pawn" and target.en_passantable:
+            if isinstance(target,Piece) and target.name == "Pawn" and target.en_passantable and not target.parent.locked:
                 temp=itertools.chain(temp,[target.parent.boardpos])
                 #game.board.arrows.append(Arrow(game.board.board_to_coord((target.parent.boardpos[0],target.parent.boardpos[1])),game.board.board_to_coord((target.parent.boardpos[0],target.parent.boardpos[1]+1))))
         return temp
@@ -142,8 +151,13 @@ class BlackPawn(Piece):
             self.en_passantable=True
         self.parent.piece=None
         self.parent=final
+        if self.parent.boardpos[1] == game.board.height-1:
+            self.get_options()
     
 class WhiteBishop(Piece):
+    role="bishop"
+    capture_pattern=DIAGONAL_LINES
+
     def __init__(self):
         super().__init__("Bishop",3,0,join(PCS_IMG_DIR,"bishop_w.png"))
 
@@ -154,6 +168,9 @@ class WhiteBishop(Piece):
         return c.diagonals((0,game.board.height-1,0,game.board.width-1),(inf,inf,inf,inf),self.parent.boardpos,game,self.colour,hypo)
     
 class BlackBishop(Piece):
+    role="bishop"
+    capture_pattern=DIAGONAL_LINES
+
     def __init__(self):
         super().__init__("Bishop",3,1,join(PCS_IMG_DIR,"bishop_b.png"))
         self.moves=partial(WhiteBishop.moves,self)
@@ -161,6 +178,9 @@ class BlackBishop(Piece):
         self.move_to=partial(WhiteBishop.move_to,self)
     
 class WhiteKnight(Piece):
+    role="knight"
+    capture_pattern=KNIGHT_LEAPS
+
     def __init__(self):
         super().__init__("Knight",3,0,join(PCS_IMG_DIR,"knight_w.png"))
 
@@ -171,6 +191,9 @@ class WhiteKnight(Piece):
         return c.l_shape((0,7,0,7),1,self.parent.boardpos,game,2,1,self.colour,hypo)
     
 class BlackKnight(Piece):
+    role="knight"
+    capture_pattern=KNIGHT_LEAPS
+
     def __init__(self):
         super().__init__("Knight",3,1,join(PCS_IMG_DIR,"knight_b.png"))
         self.moves=partial(WhiteKnight.moves,self)
@@ -178,6 +201,9 @@ class BlackKnight(Piece):
         self.move_to=partial(WhiteKnight.move_to,self)
 
 class WhiteRook(Piece):
+    role="rook"
+    capture_pattern=ORTHOGONAL_LINES
+
     def __init__(self):
         super().__init__("Rook",5,0,join(PCS_IMG_DIR,"rook_w.png"))
         self.has_moved=False
@@ -193,6 +219,9 @@ class WhiteRook(Piece):
         return Piece.move_to(self,final, game)
     
 class BlackRook(Piece):
+    role="rook"
+    capture_pattern=ORTHOGONAL_LINES
+
     def __init__(self):
         super().__init__("Rook",5,1,join(PCS_IMG_DIR,"rook_b.png"))
         self.has_moved=False
@@ -201,6 +230,9 @@ class BlackRook(Piece):
         self.move_to=partial(WhiteRook.move_to,self)
 
 class WhiteQueen(Piece):
+    role="queen"
+    capture_pattern=ORTHOGONAL_LINES+DIAGONAL_LINES
+
     def __init__(self):
         super().__init__("Queen",9,0,join(PCS_IMG_DIR,"queen_w.png"))
 
@@ -214,6 +246,9 @@ class WhiteQueen(Piece):
         return Piece.move_to(self, final, game)
     
 class BlackQueen(Piece):
+    role="queen"
+    capture_pattern=ORTHOGONAL_LINES+DIAGONAL_LINES
+
     def __init__(self):
         super().__init__("Queen",9,1,join(PCS_IMG_DIR,"queen_b.png"))
         self.moves=partial(WhiteQueen.moves,self)
@@ -221,52 +256,44 @@ class BlackQueen(Piece):
         self.move_to=partial(WhiteQueen.move_to,self)
 
 class WhiteKing(Piece):
+    role="king"
+    capture_pattern=KING_STEPS
+
     def __init__(self):
         super().__init__("King",inf,0,join(PCS_IMG_DIR,"king_w.png"),True)
         self.has_moved=False
 
     def moves(self, game:Game):
         temp=Movement.to_list(itertools.chain(m.diagonals((0,7,0,7),(1,1,1,1),self.parent.boardpos,game),m.orthogonals((0,7,0,7),(1,1,1,1),self.parent.boardpos,game))) 
-        self.parent.piece=None
-        for tile in game.board.get_matching(lambda t: True if t.piece != None and t.piece.colour != self.colour else False):
-            for square in tile.piece.capture_squares(game, True):
-                if square in temp:
-                    temp.remove(square)
-        self.parent.piece=self
+        maps=game.board.attack_maps()
+        if maps != None:
+            safe=maps.safe_squares(self.parent.index,self.colour,sum(1<<(square[1]*8+square[0]) for square in temp))
+            temp=[square for square in temp if safe>>(square[1]*8+square[0])&1]
+        else:
+            attacked=Rules.attacked_among(game,temp,1-self.colour,self.parent.boardpos)
+            temp=[square for square in temp if square not in attacked]
         if game.board.turn == self.colour and not self.has_moved:
-            pieces:list[Piece]=[]
-            for row in game.board.full_layout:
-                for tile in row:
-                    if tile and tile.piece.colour != self.colour:
-                        pieces.append(tile.piece)
-            capture_squares=Rules.gen_capture_squares(game,pieces)
             right=[self.parent.boardpos,(self.parent.boardpos[0]+1,self.parent.boardpos[1]),(self.parent.boardpos[0]+2,self.parent.boardpos[1]),(self.parent.boardpos[0]+3,self.parent.boardpos[1])]
             left=[self.parent.boardpos,(self.parent.boardpos[0]-1,self.parent.boardpos[1]),(self.parent.boardpos[0]-2,self.parent.boardpos[1]),(self.parent.boardpos[0]-3,self.parent.boardpos[1]),(self.parent.boardpos[0]-4,self.parent.boardpos[1])]
+            if maps != None:
+                capture_squares=to_coords(maps.attacked_by[1-self.colour])
+            else:
+                capture_squares=Rules.attacked_among(game,right[:-1]+left[1:-1],1-self.colour)
             for direction in [right,left]:
-                potential=game.board.get(direction[-1]).piece
+                corner=game.board.get(direction[-1]) if 0 <= direction[-1][0] < game.board.width else False #the king might not be on its usual file
+                potential=corner.piece if corner != False else None
                 if True not in [bool(game.board.get(tile)) for tile in direction[1:-1]] and True not in [(tile in capture_squares) for tile in direction[:-1]] and isinstance(potential,Piece) and potential.name == "Rook" and potential.colour == self.colour and not potential.has_moved:
                     temp=itertools.chain(temp,[direction[2]])
         return temp
     
     def capture_squares(self, game:Game, hypo = False):
         temp=Movement.to_list(itertools.chain(c.diagonals((0,7,0,7),(1,1,1,1),self.parent.boardpos,game,self.colour,hypo),c.orthogonals((0,7,0,7),(1,1,1,1),self.parent.boardpos,game,self.colour,hypo)))
-        restore_pieces={}
-        for tile in temp:
-            restore_pieces[tile]=game.board.get(tile).piece
-            game.board.get(tile).piece=None
-            for tile in game.board.get_matching(lambda t: True if t.piece != None and t.piece.colour != self.colour else False):
-                if isinstance(tile.piece,(BlackKing, WhiteKing)):
-                    for square in [(0,1),(0,-1),(1,0),(-1,0),(1,1),(1,-1),(-1,1),(-1,-1)]:
-                        target_coord=(tile.boardpos[0]-square[0],tile.boardpos[1]-square[1])
-                        if game.board.get(target_coord) and target_coord in temp:
-                            temp.remove(target_coord)
-                else:
-                    for square in tile.piece.capture_squares(game, True):
-                        if square in temp:
-                            temp.remove(square)
-        for tile in restore_pieces:
-            game.board.get(tile).piece=restore_pieces[tile]
-        return temp
+        maps=game.board.attack_maps()
+        if maps != None: #defended squares are the ones in the enemy's attack map
+            safe=maps.safe_squares(self.parent.index,self.colour,sum(1<<(square[1]*8+square[0]) for square in temp))
+            return [square for square in temp if safe>>(square[1]*8+square[0])&1]
+        attacked=Rules.attacked_among(game,temp,1-self.colour,self.parent.boardpos)
+        return [square for square in temp if square not in attacked]
     
     def move_to(self, final, game:Game):
         self.has_moved=True
@@ -277,6 +304,9 @@ class WhiteKing(Piece):
         return Piece.move_to(self,final, game)
     
 class BlackKing(Piece):
+    role="king"
+    capture_pattern=KING_STEPS
+
     def __init__(self):
         super().__init__("King",inf,1,join(PCS_IMG_DIR,"king_b.png"),True)
         self.has_moved=False
@@ -304,22 +334,20 @@ STD_INIT_POS:list[str]=["rnbqkbnr","pppppppp","8","8","8","8","PPPPPPPP","RNBQKB
 hidden=False
 board=Board(8,8,["8","8","8","8","8","8","8","8"],piecesdict=STD_PCS_DICT,initpos=STD_INIT_POS)
 
-pawn_info=Info("Pawn","The most numerous piece on the board.","Little guys that usually can only go one step forward, but can take two steps on their first move. They capture differently, doing so one step forward diagonally in either direction. Can promote on the last row of the board. Experienced players can also make use of the abstruse method termed \"en passant\".",join(PCS_IMG_DIR,"pawn_w.png"),GREEN_TILE,"piece")
-bishop_info=Info("Bishop","Snipers that really come into play after the early-game.","Moves and captures infinitely diagonally. A useful piece for sniping and plugging gaps, but its sieve-like capture structure and inability to move to more than half the squares on the board mean it is not as useful alone.",join(PCS_IMG_DIR,"bishop_w.png"),GREEN_TILE,"piece")
-knight_info=Info("Knight","A piece with a truly odd movement pattern, when you think about it.","Moves in an L-shape of 2 tiles then 1 tile (or vice versa). Has the ability to teleport straight to the end of its movement. Is useful in the early game due to its mobility, but drops off later.",join(PCS_IMG_DIR,"knight_w.png"),GREEN_TILE,"piece")
-rook_info=Info("Rook","The shining star of the famed \"twin towers\" strategy.","One of the most powerful pieces on the board due to its ability to entirely block off ranks and files. Moves and captures infinitely in the orthogonal directions.",join(PCS_IMG_DIR,"rook_w.png"),GREEN_TILE,"piece")
-queen_info=Info("Queen","In a shocking move for the time, the creators of chess made a woman the most powerful piece.","The most powerful and versatile piece on the board. Has the combined traits of the bishop and the rook. Tends to be blundered.",join(PCS_IMG_DIR,"queen_w.png"),GREEN_TILE,"piece")
-king_info=Info("King","Useless aside from decorative value, similar to many actual kings.","The crux of the game. Threats against it need to be immediately answered, and trapping it ends the game whether by stalemate or checkmate. Can only move a single, pitiful, tile in any direction around it.",join(PCS_IMG_DIR,"king_w.png"),GREEN_TILE,"piece")
+pawn_info=Info("Pawn","The most numerous piece on the board.","Little guys that usually can only go one step forward, but can take two steps on their first move. They capture differently, doing so one step forward diagonally in either direction. Can promote on the last row of the board. Experienced players can also make use of the abstruse method termed \"en passant\".",join(PCS_IMG_DIR,"pawn_w.png"),GREEN_SQUARE,"piece")
+bishop_info=Info("Bishop","Snipers that really come into play after the early-game.","Moves and captures infinitely diagonally. A useful piece for sniping and plugging gaps, but its sieve-like capture structure and inability to move to more than half the squares on the board mean it is not as useful alone.",join(PCS_IMG_DIR,"bishop_w.png"),GREEN_SQUARE,"piece")
+knight_info=Info("Knight","A piece with a truly odd movement pattern, when you think about it.","Moves in an L-shape of 2 tiles then 1 tile (or vice versa). Has the ability to teleport straight to the end of its movement. Is useful in the early game due to its mobility, but drops off later.",join(PCS_IMG_DIR,"knight_w.png"),GREEN_SQUARE,"piece")
+rook_info=Info("Rook","The shining star of the famed \"twin towers\" strategy.","One of the most powerful pieces on the board due to its ability to entirely block off ranks and files. Moves and captures infinitely in the orthogonal directions.",join(PCS_IMG_DIR,"rook_w.png"),GREEN_SQUARE,"piece")
+queen_info=Info("Queen","In a shocking move for the time, the creators of chess made a woman the most powerful piece.","The most powerful and versatile piece on the board. Has the combined traits of the bishop and the rook. Tends to be blundered.",join(PCS_IMG_DIR,"queen_w.png"),GREEN_SQUARE,"piece")
+king_info=Info("King","Useless aside from decorative value, similar to many actual kings.","The crux of the game. Threats against it need to be immediately answered, and trapping it ends the game whether by stalemate or checkmate. Can only move a single, pitiful, tile in any direction around it.",join(PCS_IMG_DIR,"king_w.png"),GREEN_SQUARE,"piece")
 
 lore='''    The form of chess known by billions and played by millions worldwide. Its ancient significance has been lost to time. In the abscence of the continous vitalisation and esteem it once enjoyed, the once great Seed of ASBG has been reduced to a mere shadow of its former power. Many stars have stopped watching, many nebulae gone blind, but not all of them. Sometimes, those that remain still cast their gaze on our little blue planet to watch the games we humans play without realising their meaning, and cause the strange effects the ancients so often enjoyed to occur once more for just a moment. [RETURN] [RETURN]    Throughout it all, they who have been silently watching continued their vigil. Watching the daily lives, the joys and the sorrows, the triumphs and failures, of the puny creatures called humans. And the humans no longer need them. And they are pleased.'''
 
-info=Info("Chess","The most commonly played variant of chess.","WIP",join(PCS_IMG_DIR,"pawn_w.png"),GREEN_TILE,"mode",[pawn_info,bishop_info,knight_info,rook_info,queen_info,king_info],internal_name="standard")
-info.construct()
+info=Info("Chess","The most commonly played variant of chess.","WIP",join(PCS_IMG_DIR,"pawn_w.png"),GREEN_SQUARE,"mode",[pawn_info,bishop_info,knight_info,rook_info,queen_info,king_info],internal_name="standard")
 
 piece_infos:list[Info]=[pawn_info,bishop_info,knight_info,rook_info,queen_info,king_info]
 for piece_info in piece_infos:
     piece_info.set_links([info])
-    piece_info.construct()
 
 local_play=True
 online_play=False
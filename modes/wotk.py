@@ -1,12 +1,9 @@
-import modes.basic as b
+import modes.rules as r
 import modes.standard as s
-from pygame import *
 from itertools import chain
+from os.path import isfile
 
-font.init()
-msrt_small=font.Font(b.join(b.FNT_IMG_DIR,"bold.ttf"),30)
-
-def improve_choice(tile:b.Tile, options:b.OptionsBar):
+def improve_choice(tile:r.Tile, options:r.OptionsBar):
     if options.contains.index(tile) == 0:
         options.parent.alignment="k"
     else:
@@ -18,11 +15,12 @@ def no_win(game):
 
 sprites:dict[int,dict[int|None,str]]={1:{None:'pawn'},2:{"b":'ad',"k":'wfd'},3:{"b":'bishop',"k":'knight'},4:{"b":'db',"k":'nw'},5:{None:'rook'},6:{"b":'fld',"k":'nightrider'},7:{None:'bn'},8:{"b":'queen',"k":'C'},9:{None:'NrB'},10:{None:'NrR'},11:{None:'king'}}
 
-class WhiteAdventurer(b.Piece):
+class WhiteAdventurer(r.Piece):
+    undo_state=("moved","level","alignment","sprite","_image") #levelling up changes the costume too
     def __init__(self):
-        super().__init__("Adventurer",1,0,b.join(b.PCS_IMG_DIR,"pawn_w.png"))
+        super().__init__("Adventurer",1,0,r.join(r.PCS_IMG_DIR,"pawn_w.png"))
         self.level:int=1
-        self.alignment:b.Literal["k","b",None]=None
+        self.alignment:r.Literal["k","b",None]=None
         self.moved=False
 
     def moves(self, game):
@@ -35,14 +33,14 @@ class WhiteAdventurer(b.Piece):
                 return s.BlackPawn.moves(self,game)
         elif self.level == 2:
             if self.alignment == "k":
-                temp=b.Movement.orthogonals((0,7,0,7),(1,1,1,1),self.parent.boardpos,game)
+                temp=r.Movement.orthogonals((0,7,0,7),(1,1,1,1),self.parent.boardpos,game)
                 if self.parent.boardpos[1] >= 2:
                     temp=chain(temp,[(self.parent.boardpos[0],self.parent.boardpos[1]-2)])
                 if self.parent.boardpos[1] <= 5:
                     temp=chain(temp,[(self.parent.boardpos[0],self.parent.boardpos[1]+2)])
                 return temp
             elif self.alignment == "b":
-                return b.Movement.from_list(game, self.parent.boardpos,[(2,0),(-2,0),(0,2),(0,-2),(2,2),(-2,2),(2,-2),(-2,-2)])
+                return r.Movement.from_list(game, self.parent.boardpos,[(2,0),(-2,0),(0,2),(0,-2),(2,2),(-2,2),(2,-2),(-2,-2)])
         elif self.level == 3:
             if self.alignment == "k":
                 return s.WhiteKnight.moves(self, game)
@@ -50,16 +48,16 @@ class WhiteAdventurer(b.Piece):
                 return s.WhiteBishop.moves(self, game)
         elif self.level == 4:
             if self.alignment == "k":
-                return chain(s.WhiteKnight.moves(self,game),b.Movement.orthogonals((0,7,0,7),(1,1,1,1),self.parent.boardpos,game))
+                return chain(s.WhiteKnight.moves(self,game),r.Movement.orthogonals((0,7,0,7),(1,1,1,1),self.parent.boardpos,game))
             elif self.alignment == "b":
-                return chain(s.WhiteBishop.moves(self,game),b.Movement.from_list(game,self.parent.boardpos,[(0,2),(0,-2),(2,0),(-2,0)]))
+                return chain(s.WhiteBishop.moves(self,game),r.Movement.from_list(game,self.parent.boardpos,[(0,2),(0,-2),(2,0),(-2,0)]))
         elif self.level == 5:
             return s.WhiteRook.moves(self,game)
         elif self.level == 6:
             if self.alignment == "k":
-                return b.Movement.l_shape((0,7,0,7),s.inf,self.parent.boardpos,game,2,1)
+                return r.Movement.l_shape((0,7,0,7),s.inf,self.parent.boardpos,game,2,1)
             elif self.alignment == "b":
-                return b.Movement.from_list(game,self.parent.boardpos,[(1,1),(-1,1),(1,-1),(-1,-1),(2,0),(-2,0),(0,2),(0,-2),(1,3),(-1,3),(1,-3),(-1,-3),(3,1),(3,-1),(-3,1),(-3,-1)])
+                return r.Movement.from_list(game,self.parent.boardpos,[(1,1),(-1,1),(1,-1),(-1,-1),(2,0),(-2,0),(0,2),(0,-2),(1,3),(-1,3),(1,-3),(-1,-3),(3,1),(3,-1),(-3,1),(-3,-1)])
         elif self.level == 7:
             return chain(s.WhiteBishop.moves(self,game),s.WhiteKnight.moves(self,game))
         elif self.level == 8:
@@ -68,9 +66,9 @@ class WhiteAdventurer(b.Piece):
             elif self.alignment == "b":
                 return s.WhiteQueen.moves(self,game)
         elif self.level == 9:
-            return chain(s.WhiteBishop.moves(self,game),b.Movement.l_shape((0,7,0,7),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game,2,1))
+            return chain(s.WhiteBishop.moves(self,game),r.Movement.l_shape((0,7,0,7),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game,2,1))
         elif self.level == 10:
-            return chain(s.WhiteRook.moves(self,game),b.Movement.l_shape((0,7,0,7),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game,2,1))
+            return chain(s.WhiteRook.moves(self,game),r.Movement.l_shape((0,7,0,7),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game,2,1))
         else:
             return s.WhiteKing.moves(self,game)
     
@@ -84,16 +82,16 @@ class WhiteAdventurer(b.Piece):
                 return s.BlackPawn.capture_squares(self,game,hypo)
         elif self.level == 2:
             if self.alignment == "k":
-                temp=b.Capture.orthogonals((0,7,0,7),(1,1,1,1),self.parent.boardpos,game,self.colour,hypo)
+                temp=r.Capture.orthogonals((0,7,0,7),(1,1,1,1),self.parent.boardpos,game,self.colour,hypo)
                 target=(self.parent.boardpos[0],self.parent.boardpos[1]-2)
-                if self.parent.boardpos[1] >= 2 and isinstance(game.board.get(target),b.Tile) and isinstance(game.board.get(target).piece,b.Piece):
+                if self.parent.boardpos[1] >= 2 and isinstance(game.board.get(target),r.Tile) and isinstance(game.board.get(target).piece,r.Piece):
                     temp=chain(temp,[target])
                 target=(self.parent.boardpos[0],self.parent.boardpos[1]+2)
-                if self.parent.boardpos[1] <= 5 and isinstance(game.board.get(target),b.Tile) and isinstance(game.board.get(target).piece,b.Piece):
+                if self.parent.boardpos[1] <= 5 and isinstance(game.board.get(target),r.Tile) and isinstance(game.board.get(target).piece,r.Piece):
                     temp=chain(temp,[target])
                 return temp
             elif self.alignment == "b":
-                return b.Capture.from_list(game, self.parent.boardpos, [(2,0),(-2,0),(0,2),(0,-2),(2,2),(-2,2),(2,-2),(-2,-2)], self.colour,hypo)
+                return r.Capture.from_list(game, self.parent.boardpos, [(2,0),(-2,0),(0,2),(0,-2),(2,2),(-2,2),(2,-2),(-2,-2)], self.colour,hypo)
         elif self.level == 3:
             if self.alignment == "k":
                 return s.WhiteKnight.capture_squares(self, game, hypo)
@@ -101,16 +99,16 @@ class WhiteAdventurer(b.Piece):
                 return s.WhiteBishop.capture_squares(self, game, hypo)
         elif self.level == 4:
             if self.alignment == "k":
-                return chain(s.WhiteKnight.capture_squares(self,game,hypo),b.Capture.orthogonals((0,7,0,7),(1,1,1,1),self.parent.boardpos,game,self.colour,hypo))
+                return chain(s.WhiteKnight.capture_squares(self,game,hypo),r.Capture.orthogonals((0,7,0,7),(1,1,1,1),self.parent.boardpos,game,self.colour,hypo))
             elif self.alignment == "b":
                 return chain(s.WhiteBishop.capture_squares(self,game,hypo),s.Capture.from_list(game,self.parent.boardpos,[(0,2),(0,-2),(2,0),(-2,0)],self.colour,hypo))
         elif self.level == 5:
             return s.WhiteRook.capture_squares(self,game,hypo)
         elif self.level == 6:
             if self.alignment == "k":
-                return b.Capture.l_shape((0,7,0,7),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game,2,1,self.colour,hypo)
+                return r.Capture.l_shape((0,7,0,7),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game,2,1,self.colour,hypo)
             elif self.alignment == "b":
-                return b.Capture.from_list(game,self.parent.boardpos,[(1,1),(-1,1),(1,-1),(-1,-1),(2,0),(-2,0),(0,2),(0,-2),(1,3),(-1,3),(1,-3),(-1,-3),(3,1),(3,-1),(-3,1),(-3,-1)],self.colour,hypo)
+                return r.Capture.from_list(game,self.parent.boardpos,[(1,1),(-1,1),(1,-1),(-1,-1),(2,0),(-2,0),(0,2),(0,-2),(1,3),(-1,3),(1,-3),(-1,-3),(3,1),(3,-1),(-3,1),(-3,-1)],self.colour,hypo)
         elif self.level == 7:
             return chain(s.WhiteBishop.capture_squares(self,game,hypo),s.WhiteKnight.capture_squares(self,game,hypo))
         elif self.level == 8:
@@ -119,49 +117,49 @@ class WhiteAdventurer(b.Piece):
             elif self.alignment == "b":
                 return s.WhiteQueen.capture_squares(self,game,hypo)
         elif self.level == 9:
-            return chain(s.WhiteBishop.capture_squares(self,game,hypo),b.Capture.l_shape((0,7,0,7),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game,2,1,self.colour,hypo))
+            return chain(s.WhiteBishop.capture_squares(self,game,hypo),r.Capture.l_shape((0,7,0,7),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game,2,1,self.colour,hypo))
         elif self.level == 10:
-            return chain(s.WhiteRook.capture_squares(self,game,hypo),b.Capture.l_shape((0,7,0,7),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game,2,1,self.colour,hypo))
+            return chain(s.WhiteRook.capture_squares(self,game,hypo),r.Capture.l_shape((0,7,0,7),(s.inf,s.inf,s.inf,s.inf),self.parent.boardpos,game,2,1,self.colour,hypo))
         else:
             return s.WhiteKing.capture_squares(self,game,hypo)
     
     def move_to(self, final, game = None):
-        if (isinstance(final.piece,b.Piece) and final.piece.level >= self.level/2) or (final.boardpos[1] <= self.parent.boardpos[1]-5):
+        if (isinstance(final.piece,r.Piece) and final.piece.level >= self.level/2) or (final.boardpos[1] <= self.parent.boardpos[1]-5):
             if self.level in [1,5,7]:
                 if self.colour == 0:
-                    wotk=b.Tile(None,"empty",Rect(0,0,0,0),self,piece=s.WhiteKnight())
-                    wotb=b.Tile(None,"empty",Rect(0,0,0,0),self,piece=s.WhiteBishop())
+                    wotk=r.Tile(None,"empty",None,self,piece=s.WhiteKnight())
+                    wotb=r.Tile(None,"empty",None,self,piece=s.WhiteBishop())
                 else:
-                    wotk=b.Tile(None,"empty",Rect(0,0,0,0),self,piece=s.BlackKnight())
-                    wotb=b.Tile(None,"empty",Rect(0,0,0,0),self,piece=s.BlackBishop())
-                align=b.OptionsBar(self,[wotk,wotb],improve_choice)
+                    wotk=r.Tile(None,"empty",None,self,piece=s.BlackKnight())
+                    wotb=r.Tile(None,"empty",None,self,piece=s.BlackBishop())
+                align=r.OptionsBar(self,[wotk,wotb],improve_choice)
                 self.parent.propagate_options(align)
             elif self.level in [4,6,8]:
                 self.alignment=None
             self.level += 1
             self.change_costume()
         self.moved=True
-        return b.Piece.move_to(self,final, game)
+        return r.Piece.move_to(self,final, game)
     
     def change_costume(self):
+        '''Swap the sprite for the current level and alignment. The new image is loaded whenever it is next drawn.'''
         try:
             img=sprites[self.level][self.alignment]
-            if self.colour == 0:
-                img += "_w"
-            else:
-                img += "_b"
-            self.image=transform.scale(image.load(b.join(b.PCS_IMG_DIR,f"{img}.png")),b.STD_TILEDIM).convert_alpha()
-        except:
-            try:
-                self.image=transform.scale(msrt_small.render(sprites[self.level][self.alignment],True,b.WHITE if self.colour == 0 else b.BLACK),b.STD_TILEDIM).convert_alpha()
-            except:
-                pass
+        except KeyError:
+            return
+        path=r.join(r.PCS_IMG_DIR,f"{img}_w.png" if self.colour == 0 else f"{img}_b.png")
+        if isfile(path):
+            self.sprite=path
+        else:
+            self.sprite=r.Label(img,r.WHITE if self.colour == 0 else r.BLACK)
+        self.image=None
     
-class BlackAdventurer(b.Piece):
+class BlackAdventurer(r.Piece):
+    undo_state=WhiteAdventurer.undo_state
     def __init__(self):
-        super().__init__("Adventurer",1,1,b.join(b.PCS_IMG_DIR,"pawn_b.png"),True)
+        super().__init__("Adventurer",1,1,r.join(r.PCS_IMG_DIR,"pawn_b.png"),True)
         self.level:int=1
-        self.alignment:b.Literal["k","b",None]=None
+        self.alignment:r.Literal["k","b",None]=None
         self.moved=False
         self.moves=s.partial(WhiteAdventurer.moves,self)
         self.capture_squares=s.partial(WhiteAdventurer.capture_squares,self)
@@ -171,18 +169,16 @@ class BlackAdventurer(b.Piece):
 hidden=False
 piecesdict={"a":BlackAdventurer,"A":WhiteAdventurer}
 initpos=["aaaaaaaa","aaaaaaaa","8","8","8","8","AAAAAAAA","AAAAAAAA"]
-board=b.Board(8,8,["8","8","8","8","8","8","8","8"],piecesdict=piecesdict,initpos=initpos)
+board=r.Board(8,8,["8","8","8","8","8","8","8","8"],piecesdict=piecesdict,initpos=initpos)
 local_play=True
 online_play=False
 
-adv_info=b.Info("Adventurer","Oh, the places you'll go!","WIP",b.join(b.PCS_IMG_DIR,"pawn_w.png"),b.CREAM_TILE,"piece",None)
+adv_info=r.Info("Adventurer","Oh, the places you'll go!","WIP",r.join(r.PCS_IMG_DIR,"pawn_w.png"),r.CREAM_SQUARE,"piece",None)
 
 lore="WIP"
 
-info=b.Info("Way of the Knight (2-path)","This is to chess what Mamono Sweeper is to Minesweeper.",lore,b.join(b.PCS_IMG_DIR,"fld_w.png"),b.GREEN_TILE,"mode",[adv_info],"wotk")
-info.construct()
+info=r.Info("Way of the Knight (2-path)","This is to chess what Mamono Sweeper is to Minesweeper.",lore,r.join(r.PCS_IMG_DIR,"fld_w.png"),r.GREEN_SQUARE,"mode",[adv_info],"wotk")
 adv_info.set_links([info])
-adv_info.construct()
 piece_infos=[adv_info]
 
 win=no_win
\ No newline at end of file
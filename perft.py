@@ -0,0 +1,93 @@
+'''Perft: counts every sequence of moves of a given length from a position, in any mode in modes.__all__. Moves come from HeadlessGame.moves(), which makes the same calls as the UI, so this is the check to run after touching move generation, and its nodes per second are the benchmark for it.
+Usage: python perft.py <mode> <depth> [--fen FEN] [--divide] [--epd FILE]'''
+from __future__ import annotations
+from collections.abc import Generator, Iterable
+import argparse
+import time
+import modes
+from modes import fen
+from modes.rules import HeadlessGame, BoardCoord
+
+type Move=tuple[BoardCoord,BoardCoord,int|None] #start, end and the OptionsBar choice that goes with it, if one came up
+
+def children(game:HeadlessGame) -> Generator[Move]:
+    '''Play each move in turn and yield it while the game is in the position after it. The move is unmade before the next one. If a move brings up an OptionsBar (a promotion, say), each choice is a move of its own.'''
+    board=game.board
+    for start, end in game.moves():
+        record=board.make_move((start,end),game)
+        count=game.options()
+        if count == 0:
+            yield start, end, None
+            board.unmake_move(record)
+        else:
+            board.unmake_move(record)
+            for index in range(count):
+                record=board.make_move((start,end,index),game)
+                yield start, end, index
+                board.unmake_move(record)
+
+def perft(game:HeadlessGame, depth:int) -> int:
+    '''The number of move sequences of length depth from the game's position. Sequences that end the game early are not counted.'''
+    if depth == 0:
+        return 1
+    return sum(perft(game,depth-1) for move in children(game))
+
+def divide(game:HeadlessGame, depth:int) -> dict[Move,int]:
+    '''perft(), broken down by the first move.'''
+    return {move:perft(game,depth-1) for move in children(game)}
+
+def suite(lines:Iterable[str], mode, depth:int) -> Generator[tuple[str,int,int,int]]:
+    '''Check an EPD perft suite, whose positions give their counts as operations (D1 20; D2 400 ...): yields the FEN, depth, expected count and perft() of each count up to depth.'''
+    for game, operations in fen.read_epd(lines,mode):
+        text=fen.write(game)
+        for opcode, operand in operations.items():
+            if opcode[0] == "D" and opcode[1:].isdigit() and int(opcode[1:]) <= depth:
+                yield text, int(opcode[1:]), int(operand), perft(game,int(opcode[1:]))
+
+def move_name(game:HeadlessGame, move:Move) -> str:
+    '''A move in coordinate notation (e2e4), with the OptionsBar choice after a colon.'''
+    height=game.board.height
+    name="".join(chr(97+x)+str(height-y) for x, y in move[:2])
+    if move[2] != None:
+        name+=f":{move[2]}"
+    return name
+
+def main():
+    parser=argparse.ArgumentParser(description="Count the move sequences of a given length from a position.")
+    parser.add_argument("mode",choices=modes.__all__,help="module name of the mode")
+    parser.add_argument("depth",type=int,help="length of the move sequences")
+    parser.add_argument("--fen",default=None,help="starting position, as FEN (see modes/fen)")
+    parser.add_argument("--divide",action="store_true",help="show the count after each first move")
+    parser.add_argument("--epd",default=None,help="check the counts in an EPD perft suite instead, up to depth")
+    args=parser.parse_args()
+    start=time.perf_counter()
+    if args.epd != None:
+        checks=failures=nodes=0
+        with open(args.epd) as file:
+            for text, depth, expected, counted in suite(file,getattr(modes,args.mode),args.depth):
+                checks+=1
+                nodes+=counted
+                if counted != expected:
+                    failures+=1
+                    print(f"{text} D{depth}: expected {expected}, counted {counted}")
+        elapsed=time.perf_counter()-start
+        print(f"Checks: {checks}, failed: {failures}")
+        print(f"Nodes: {nodes}")
+        print(f"Time: {elapsed:.3f}s")
+        print(f"Nodes/s: {nodes/elapsed:.0f}" if elapsed > 0 else "Nodes/s: -")
+        return
+    game=HeadlessGame(getattr(modes,args.mode),args.fen)
+    if args.divide:
+        results=divide(game,args.depth)
+        for move, count in results.items():
+            print(f"{move_name(game,move)}: {count}")
+        nodes=sum(results.values())
+    else:
+        nodes=perft(game,args.depth)
+    elapsed=time.perf_counter()-start
+    print(f"Nodes: {nodes}")
+    print(f"Time: {elapsed:.3f}s")
+    print(f"Nodes/s: {nodes/elapsed:.0f}" if elapsed > 0 else "Nodes/s: -")
+
+if __name__ == "__main__":
+    main()
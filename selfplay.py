@@ -0,0 +1,153 @@
+'''Self-play: plays games of each mode with no one at the controls, spread over a process pool, as a throughput benchmark and a crash-finder. Games are HeadlessGames, so every move goes through the mode's after_move() and after_capture(), and its win() is run on every position. Moves are picked at random or by the engine (in the modes engine.supports()).
+Prints games/s, moves/s, the average time win() takes and the results of each mode. A game that raises is stopped, and the seed, moves and board leading up to it are saved in --crashes. --record adds every game to a file of game records (see modes/record), as each one finishes.
+Usage: python selfplay.py [modes ...] [--games N] [--policy random|engine] [--plies P] [--workers W] [--seed S] [--record FILE]'''
+from __future__ import annotations
+from multiprocessing import Pool
+import argparse
+import json
+import os
+import random
+import time
+import traceback
+import modes
+from modes import engine
+from modes.rules import HeadlessGame, MoveTable
+from modes.record import RecordWriter, Turn, result_text
+from perft import move_name
+
+type Task=tuple[str,str,int,int,float|None,int|None,str] #mode, policy, seed, ply limit, engine seconds and depth per move, crash folder
+
+worker_engine:engine.Engine|None=None
+
+def result_name(game:HeadlessGame) -> str:
+    if game.win[0] == None:
+        return "draw"
+    if game.win[0]:
+        return "White wins" if game.win[1] == 1 else "Black wins" #win[1] is the side that lost, as in chess_plus
+    return "unfinished" if game.moves() != [] else "no moves"
+
+def save_crash(folder:str, task:Task, game:HeadlessGame|None, played:list[str], error:Exception) -> str:
+    '''Write what's needed to replay a crashed game (mode, seed and moves; random is seeded before the game is made, so random layouts repeat too) and the board it got to.'''
+    mode, policy, seed=task[:3]
+    os.makedirs(folder,exist_ok=True)
+    path=os.path.join(folder,f"{mode}-{policy}-{seed}.json")
+    board=None
+    if game != None:
+        board=[[type(game.board.get((x,y)).piece).__name__ if game.board.get((x,y)) != None and game.board.get((x,y)).piece != None else None for x in range(game.board.width)] for y in range(game.board.height)]
+    with open(path,"w") as file:
+        json.dump({"mode":mode,"policy":policy,"seed":seed,"moves":played,"board":board,"error":repr(error),"traceback":traceback.format_exc()},file,indent=4)
+    return path
+
+def play_game(task:Task) -> dict:
+    '''Play one game and return how it went: the mode, result, moves made (and the turns they make up, for the record), seconds taken, and the time spent in win() and how often it ran. A crash's result is "error", with the saved file under "crash".'''
+    global worker_engine
+    mode, policy, seed, plies, seconds, depth, folder=task
+    random.seed(seed)
+    picker=random.Random(seed)
+    game=None
+    played:list[str]=[]
+    turns:list[Turn]=[]
+    win_time=0.0
+    win_runs=0
+    history:list[int]=[]
+    started=time.perf_counter()
+    try:
+        game=HeadlessGame(modes.load(mode))
+        board=game.board
+        for ply in range(plies):
+            if (board.hash,board.pointless) not in game.tables:
+                clock=time.perf_counter()
+                MoveTable.of(game) #runs the mode's win() on the new position; moves() below reads the verdict from it
+                win_time+=time.perf_counter()-clock
+                win_runs+=1
+            moves=game.moves()
+            if moves == []:
+                break
+            if policy == "engine":
+                if worker_engine == None:
+                    worker_engine=engine.Engine()
+                start, end, choice=worker_engine.search(engine.position(game),seconds,depth,history)
+            else:
+                (start, end), choice=picker.choice(moves), None
+            history.append(board.hash)
+            side=board.turn
+            game.play(start,end)
+            if game.options() != 0:
+                choice=picker.randrange(game.options()) if choice == None else choice
+                game.choose(choice)
+            played.append(move_name(game,(start,end,choice)))
+            if turns == [] or turns[-1] == None:
+                turns.append([])
+            turns[-1].append((start,end,choice))
+            if board.turn != side:
+                turns.append(None) #the next move starts a turn
+        result=result_name(game)
+        crash=None
+    except Exception as error:
+        result="error"
+        crash=save_crash(folder,task,game,played,error)
+    size=(game.board.width,game.board.height) if game != None else (0,0)
+    return {"mode":mode,"seed":seed,"size":size,"result":result,"record":result_text(game.win) if game != None and crash == None else "*","turns":[turn for turn in turns if turn != None],"moves":len(played),"seconds":time.perf_counter()-started,"win_time":win_time,"win_runs":win_runs,"crash":crash}
+
+def main():
+    parser=argparse.ArgumentParser(description="Play games of each mode without the UI, on several processes.")
+    parser.add_argument("modes",nargs="*",help="module names of the modes to play (default: every mode)")
+    parser.add_argument("--games",type=int,default=10,help="games per mode")
+    parser.add_argument("--policy",choices=["random","engine"],default="random",help="how moves are picked")
+    parser.add_argument("--plies",type=int,default=200,help="moves after which a game is stopped as unfinished")
+    parser.add_argument("--seconds",type=float,default=None,help="engine thinking time per move")
+    parser.add_argument("--depth",type=int,default=None,help="engine depth per move (default 2 if --seconds isn't given)")
+    parser.add_argument("--workers",type=int,default=os.cpu_count(),help="processes to play on")
+    parser.add_argument("--seed",type=int,default=0,help="seed of the first game; the rest count up from it")
+    parser.add_argument("--crashes",default="selfplay_crashes",help="folder for the games that raised")
+    parser.add_argument("--record",default=None,help="file to add the games to, as game records")
+    args=parser.parse_args()
+    chosen=args.modes or modes.__all__
+    for mode in chosen:
+        if mode not in modes.registry:
+            parser.error(f"unknown mode {mode} (choose from {", ".join(modes.__all__)})")
+    if args.policy == "engine":
+        skipped=[mode for mode in chosen if not engine.supports(modes.load(mode))]
+        if skipped:
+            print(f"The engine can't play {", ".join(skipped)}; skipping.")
+        chosen=[mode for mode in chosen if mode not in skipped]
+    depth=args.depth if args.depth != None or args.seconds != None else 2
+    tasks=[(mode,args.policy,args.seed+number,args.plies,args.seconds,depth,args.crashes) for mode in chosen for number in range(args.games)]
+    stats:dict[str,dict]={mode:{"games":0,"moves":0,"seconds":0.0,"win_time":0.0,"win_runs":0,"results":{}} for mode in chosen}
+    crashes:list[str]=[]
+    started=time.perf_counter()
+    record=open(args.record,"a") if args.record != None else None
+    writer=RecordWriter(record) if record != None else None
+    with Pool(args.workers) as pool:
+        for game in pool.imap_unordered(play_game,tasks):
+            if writer != None and game["turns"]:
+                writer.begin(game["mode"],*game["size"],{"Seed":game["seed"],"Policy":args.policy})
+                for turn in game["turns"]:
+                    writer.turn(turn)
+                writer.end(game["record"])
+            mode=stats[game["mode"]]
+            mode["games"]+=1
+            for key in ("moves","seconds","win_time","win_runs"):
+                mode[key]+=game[key]
+            mode["results"][game["result"]]=mode["results"].get(game["result"],0)+1
+            if game["crash"] != None:
+                crashes.append(game["crash"])
+    elapsed=time.perf_counter()-started
+    if record != None:
+        record.close()
+    print(f"{"Mode":<16} {"Games":>5} {"Moves":>7} {"Games/s":>8} {"Moves/s":>8} {"win() ms":>9}  Results")
+    for name, mode in stats.items():
+        rate=lambda count: f"{count/mode["seconds"]:.1f}" if mode["seconds"] > 0 else "-"
+        win_ms=f"{mode["win_time"]/mode["win_runs"]*1000:.3f}" if mode["win_runs"] else "-"
+        results=", ".join(f"{result} {count}" for result, count in sorted(mode["results"].items()))
+        print(f"{name:<16} {mode["games"]:>5} {mode["moves"]:>7} {rate(mode["games"]):>8} {rate(mode["moves"]):>8} {win_ms:>9}  {results}")
+    games=sum(mode["games"] for mode in stats.values())
+    moves=sum(mode["moves"] for mode in stats.values())
+    print(f"Total: {games} games, {moves} moves in {elapsed:.2f}s on {args.workers} processes: {games/elapsed:.2f} games/s, {moves/elapsed:.0f} moves/s")
+    if crashes:
+        print(f"{len(crashes)} games raised:")
+        for path in sorted(crashes):
+            print(f"  {path}")
+
+if __name__ == "__main__":
+    main()
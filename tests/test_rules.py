@@ -0,0 +1,14 @@
+'''Regression tests for the headless rules. Run with python -m pytest from the repository root.'''
+import pytest
+import modes
+from modes import fen
+from modes.rules import MoveTable
+
+PINNED="4r1k1/8/8/8/8/8/4B3/4K3 w - - {} 1" #the bishop on e2 is pinned to its king by the rook on e8
+
+@pytest.mark.parametrize("name",["standard","atomic","duck"])
+@pytest.mark.parametrize("pointless",[0,80])
+def test_pinned_piece_stays_pinned(name:str, pointless:int):
+    '''Past 75 pointless moves the win condition calls a draw, which must not unlock a pinned piece.'''
+    game=fen.load(PINNED.format(pointless),modes.load(name))
+    assert MoveTable.of(game).targets(game,game.board.get((4,6))) == []